@@ -6,40 +6,370 @@ Aplicación de escritorio persistente con vista dual (editor/preview)
 
 import sys
 import os
+import json
+import logging
+import multiprocessing
+import time
+import uuid
+from bisect import bisect_right
+from collections import deque
 from pathlib import Path
+
+if __name__ == '__main__':
+    # Procesos de trabajo del ejecutable empaquetado (indexado, exportación por lotes)
+    multiprocessing.freeze_support()
+    if sys.argv[1:2] == ['export']:
+        # Exportación por lotes sin ventana (cli.py): se despacha antes de importar Qt.
+        # cli pasa a ser el módulo principal, y es el que cargan los procesos de trabajo
+        import runpy
+        runpy.run_module('cli', run_name='__main__', alter_sys=True)
+
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QTextEdit, QSplitter, QPushButton, QFileDialog, QMenuBar,
-    QMenu, QToolBar, QMessageBox, QFontDialog
+    QMenu, QToolBar, QMessageBox, QFontDialog, QLabel, QDockWidget,
+    QPlainTextEdit, QTreeWidget, QTreeWidgetItem, QProgressDialog, QTabBar,
+    QLineEdit, QListWidget, QListWidgetItem, QProgressBar
 )
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QAction, QIcon, QFont, QTextDocument
+from PyQt6.QtCore import Qt, QTimer, QObject, QRunnable, QThreadPool, QPoint, QLockFile, QUrl, pyqtSignal
+from PyQt6.QtGui import QAction, QIcon, QFont, QTextDocument, QTextCursor, QDesktopServices
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-import markdown
-from markdown.extensions import fenced_code, tables, toc, nl2br, sane_lists
-from docx import Document
-from docx.shared import Pt, RGBColor
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-import re
-
-# ReportLab para exportación PDF nativa
-from reportlab.lib.pagesizes import A4, letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle, Preformatted
-from reportlab.lib import colors
-from reportlab.pdfgen import canvas
+from PyQt6.QtWebEngineCore import QWebEnginePage, QWebEngineSettings
+import exporters
+from markdown_render import (
+    BlockRenderer, RenderCancelled, AdaptiveDebounce, diff_blocks,
+    markdown_to_html, PREVIEW_SHELL, PREVIEW_SCHEME
+)
+from disk_cache import RenderCache
+from document_model import PieceTable
+from document_tabs import DocumentTab, render_budget_from_env, renders_to_evict
+from file_loader import LoadCancelled, TextFileReader, file_stamp
+from file_saver import write_atomic
+from file_watcher import FileWatcher
+from pdf_export import PdfExportQueue
+from workspace_index import WorkspaceIndex
+from text_merge import changed_range, merge3
+from edit_journal import EditJournal, JournalError, JOURNAL_SUFFIX, load_journal, remove_journal
+from app_paths import user_data_dir
+from instrumentation import instrumentation
+from editor_widgets import CodeEditor
+from markdown_highlighter import MarkdownHighlighter
+
+# A partir de este tamaño (caracteres) se usa el editor de archivos grandes
+LARGE_FILE_THRESHOLD = 1024 * 1024
+# Archivos mayores (bytes) se abren por fragmentos en segundo plano
+STREAM_THRESHOLD = 1024 * 1024
+# Caracteres insertados en el editor por lote durante una apertura por fragmentos
+INSERT_BATCH = 256 * 1024
+# Por encima de este tamaño (bytes) no se resalta la sintaxis al abrir
+HIGHLIGHT_LIMIT = 8 * 1024 * 1024
+# Intervalo (ms) con el que se vuelcan al diario las ediciones recientes
+JOURNAL_INTERVAL = 5000
+# Tamaño mínimo del diario antes de compactarlo en una nueva base
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+# Equivalencias de QTextCursor.selectedText() con QTextDocument.toPlainText()
+QT_PLAIN_TEXT = str.maketrans({'\u2029': '\n', '\u2028': '\n', '\u00a0': ' '})
+
+
+def timed_render(renderer, text, timings, cancelled=None):
+    """Renderizar por bloques registrando parseo y resaltado por separado"""
+    with instrumentation.activate(timings), timings.stage('parse'):
+        result = renderer.render(text, cancelled=cancelled)
+    # El resaltado se mide dentro del parseo
+    timings.exclude('parse', 'highlight')
+    timings.meta['blocks'] = len(result.keys)
+    timings.meta['rendered'] = result.rendered
+    return result
+
+
+class RenderSignals(QObject):
+    """Señales emitidas por una tarea de renderizado"""
+    finished = pyqtSignal(int, object, object)
+    failed = pyqtSignal(int, str)
+
+
+class PerfSignals(QObject):
+    """Reenvía al hilo de la interfaz los tiempos publicados desde cualquier hilo"""
+    recorded = pyqtSignal(object)
+
+
+class RenderTask(QRunnable):
+    """Renderizar una revisión del documento fuera del hilo de la interfaz"""
+
+    def __init__(self, renderer, snapshot, revision, is_current, timings):
+        super().__init__()
+        self.renderer = renderer
+        self.snapshot = snapshot
+        self.revision = revision
+        self.is_current = is_current
+        self.timings = timings
+        self.signals = RenderSignals()
+
+    def run(self):
+        if not self.is_current(self.revision):
+            return
+        try:
+            # El texto se materializa aquí, fuera del hilo de la interfaz
+            with self.timings.stage('extract'):
+                text = self.snapshot.text()
+            result = timed_render(
+                self.renderer, text, self.timings,
+                cancelled=lambda: not self.is_current(self.revision)
+            )
+        except RenderCancelled:
+            return
+        except Exception as e:
+            self.signals.failed.emit(self.revision, str(e))
+            return
+        self.signals.finished.emit(self.revision, result, self.timings)
+
+
+class LoadSignals(QObject):
+    """Señales emitidas por la lectura de un archivo en segundo plano"""
+    finished = pyqtSignal(str, float)
+    failed = pyqtSignal(str)
+
+
+class OpenTask(QRunnable):
+    """Leer un archivo por fragmentos fuera del hilo de la interfaz.
+    Los fragmentos decodificados se dejan en ``queue`` y la interfaz los
+    inserta por lotes; al terminar se emite la clave de la caché en disco.
+    """
+
+    def __init__(self, path, render_cache):
+        super().__init__()
+        self.reader = TextFileReader(path)
+        # Versión del archivo que se va a leer (para detectar cambios externos)
+        self.stamp = file_stamp(path)
+        self.hasher = render_cache.key_hasher()
+        self.queue = deque()
+        self.cancelled = False
+        self.signals = LoadSignals()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            for text, done in self.reader.chunks(cancelled=lambda: self.cancelled):
+                self.hasher.update(text.encode('utf-8', 'surrogatepass'))
+                self.queue.append((text, done))
+        except LoadCancelled:
+            return
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(self.hasher.hexdigest(), time.perf_counter() - start)
+
+
+class SaveSignals(QObject):
+    """Señal de guardado terminado (con o sin error)"""
+    finished = pyqtSignal()
+
+
+class SaveTask(QRunnable):
+    """Guardar una instantánea del documento fuera del hilo de la interfaz.
+    Con ``expected`` no se sobrescribe el archivo si en disco hay otra versión.
+    Se escribe con la codificación y el BOM con los que se leyó.
+    """
+
+    def __init__(self, path, snapshot, timings, expected=None, encoding='utf-8', bom=b''):
+        super().__init__()
+        self.path = path
+        self.snapshot = snapshot
+        self.timings = timings
+        self.encoding = encoding
+        self.bom = bom
+        self.expected = expected
+        self.stamp = None
+        self.conflict = False
+        self.error = None
+        self.signals = SaveSignals()
+
+    def run(self):
+        try:
+            if self.expected is not None and os.path.exists(self.path) \
+                    and file_stamp(self.path) != self.expected:
+                self.conflict = True
+                self.error = "El archivo cambió en disco"
+            else:
+                with self.timings.stage('write'):
+                    write_atomic(self.path, self.snapshot.chunks(), self.encoding, self.bom)
+                self.stamp = file_stamp(self.path)
+        except UnicodeEncodeError as e:
+            self.error = (f"El texto contiene caracteres que no se pueden guardar en {self.encoding} "
+                          f"({e.object[e.start:e.end]!r})")
+        except Exception as e:
+            self.error = str(e)
+        self.signals.finished.emit()
+
+
+class ReloadSignals(QObject):
+    """Señal de comparación con el disco terminada"""
+    finished = pyqtSignal()
+
+
+class ReloadTask(QRunnable):
+    """Leer la nueva versión de un archivo y compararla con el búfer.
+    Calcula la zona a sustituir para recargar y, si el búfer tiene cambios y
+    se conoce la versión de partida ``base``, la combinación a tres bandas.
+    """
+
+    def __init__(self, path, snapshot, base):
+        super().__init__()
+        self.path = path
+        self.snapshot = snapshot
+        self.base = base
+        self.stamp = None
+        self.reader = None
+        self.theirs = None
+        self.missing = False
+        self.error = None
+        self.reload_edit = None
+        self.merge_edit = None
+        self.merge_clean = False
+        self.conflicts = 0
+        self.signals = ReloadSignals()
+
+    def run(self):
+        try:
+            self.stamp = file_stamp(self.path)
+            self.reader = TextFileReader(self.path)
+            self.theirs = self.reader.read()
+            ours = self.snapshot.text()
+            self.reload_edit = changed_range(ours, self.theirs)
+            if self.base is not None and self.theirs != ours:
+                merged = merge3(self.base.text(), ours, self.theirs)
+                self.merge_edit = changed_range(ours, merged.text)
+                self.merge_clean = merged.text == self.theirs
+                self.conflicts = merged.conflicts
+        except FileNotFoundError:
+            self.missing = True
+        except Exception as e:
+            self.error = str(e)
+        self.signals.finished.emit()
+
+
+class IndexSignals(QObject):
+    """Progreso y fin de la actualización del índice de la carpeta"""
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal()
+
+
+class IndexTask(QRunnable):
+    """Poner al día el índice de búsqueda de la carpeta de trabajo.
+    Los lotes ya indexados quedan confirmados aunque se cancele.
+    """
+
+    def __init__(self, workspace):
+        super().__init__()
+        self.workspace = workspace
+        self.cancelled = False
+        self.stats = None
+        self.error = None
+        self.signals = IndexSignals()
+
+    def run(self):
+        try:
+            self.stats = self.workspace.update(
+                progress=self.signals.progress.emit, cancelled=lambda: self.cancelled
+            )
+        except Exception as e:
+            self.error = str(e)
+        self.signals.finished.emit()
+
+
+class PreviewPage(QWebEnginePage):
+    """Página del preview que convierte los clics en bloques y enlaces en señales"""
+    block_clicked = pyqtSignal(int, float)
+    link_clicked = pyqtSignal(QUrl)
+
+    def acceptNavigationRequest(self, url, nav_type, is_main_frame):
+        if url.scheme() == PREVIEW_SCHEME:
+            # mdviewer:block/<índice>/<fracción>
+            parts = url.path().split('/')
+            try:
+                self.block_clicked.emit(int(parts[1]), float(parts[2]))
+            except (IndexError, ValueError):
+                pass
+            return False
+        if is_main_frame and nav_type == QWebEnginePage.NavigationType.NavigationTypeLinkClicked:
+            # Salvo las anclas (#id) de la propia página, un enlace sustituiría
+            # la página base y el preview dejaría de actualizarse
+            fragment = QUrl.UrlFormattingOption.RemoveFragment
+            if not (url.hasFragment() and url.adjusted(fragment) == self.url().adjusted(fragment)):
+                self.link_clicked.emit(url)
+                return False
+        return super().acceptNavigationRequest(url, nav_type, is_main_frame)
 
 
 class MarkdownViewer(QMainWindow):
-    def __init__(self):
+    def __init__(self, render_budget=None):
         super().__init__()
-        self.current_file = None
-        self.is_modified = False
+        # Documentos abiertos: comparten el editor y el preview; ``tab`` es el activo.
+        # Cada uno tiene una copia del texto alimentada con los deltas del editor
+        self.tabs = []
+        self.tab = DocumentTab()
+        self._tab_clock = 0
+        # Memoria para los renderizados de las pestañas ocultas (LRU)
+        self.render_budget = render_budget if render_budget is not None else render_budget_from_env()
+        # Cambio de pestaña en curso: el texto del editor no es una edición
+        self._switching = False
         self.edit_mode = True
+        self.large_file_mode = False
+        self._outline_headings = []
+        self._outline_shape = None
+        self.block_renderer = BlockRenderer()
+        # Renderizado en segundo plano: un solo hilo, las revisiones viejas se descartan
+        self.revision = 0
+        self.render_pool = QThreadPool()
+        self.render_pool.setMaxThreadCount(1)
+        self._render_task = None
+        # Revisión forzada por el presupuesto de retraso: no se cancela al teclear
+        self._forced_revision = None
+        self.debounce = AdaptiveDebounce()
+        # Caché en disco del HTML de los archivos abiertos
+        self.render_cache = RenderCache()
+        self._cache_key = None
+        self._cache_revision = None
+        # Claves de los bloques mostrados en la página base del preview
+        self._preview_keys = []
+        self._preview_loaded = False
+        # La página base se está recargando tras salir de ella
+        self._reloading_shell = False
+        # Mapa línea de origen -> bloque del preview (inicios ordenados)
+        self._preview_lines = []
+        self._line_starts = []
+        self._scroll_sync_blocked = False
+        # Apertura por fragmentos en curso
+        self._loading = False
+        self._open_task = None
+        self._open_tab = None
+        self._open_key = None
+        self._open_timings = None
+        self._open_progress = None
+        self._open_started = None
+        # Guardados en segundo plano: uno en curso y, por ruta, el último pendiente
+        self.save_pool = QThreadPool()
+        self.save_pool.setMaxThreadCount(1)
+        self._save_task = None
+        self._save_pending = {}
+        # Diario de ediciones para recuperar cambios tras un cierre inesperado
+        self._journal_paused = False
+        self._journal_count = 0
+        self.journal_session = uuid.uuid4().hex[:12]
+        self.journal_dir, self.journal_lock = self.init_journal_dir()
+        # Cambios externos en los archivos de las pestañas
+        self.file_watcher = FileWatcher(self)
+        self.file_watcher.changed.connect(self.on_file_changed)
+        # Carpeta de trabajo: índice de búsqueda y actualización en curso
+        self.workspace = None
+        self._index_task = None
+        self._index_again = False
         self.init_ui()
         self.setup_auto_save()
+        QTimer.singleShot(0, self.recover_journals)
 
     def init_ui(self):
         """Inicializar interfaz de usuario"""
@@ -53,17 +383,38 @@ class MarkdownViewer(QMainWindow):
         # Layout principal
         main_layout = QVBoxLayout(central_widget)
 
+        # Pestañas de los documentos abiertos (el editor es compartido)
+        self.tab_bar = QTabBar()
+        self.tab_bar.setDocumentMode(True)
+        self.tab_bar.setTabsClosable(True)
+        self.tab_bar.setMovable(True)
+        self.tab_bar.setExpanding(False)
+        self.tab_bar.setElideMode(Qt.TextElideMode.ElideMiddle)
+        self.tab_bar.currentChanged.connect(self.on_tab_changed)
+        self.tab_bar.tabCloseRequested.connect(lambda index: self.close_tab(self.tabs[index]))
+        self.tab_bar.tabMoved.connect(self.on_tab_moved)
+        main_layout.addWidget(self.tab_bar)
+
         # Splitter para editor y preview (crear antes de menú/toolbar)
         self.splitter = QSplitter(Qt.Orientation.Horizontal)
 
         # Editor de texto
-        self.editor = QTextEdit()
+        self.editor = self.create_editor(large=False)
         self.editor.setFont(QFont("Consolas", 11))
-        self.editor.textChanged.connect(self.on_text_changed)
-        self.editor.setPlaceholderText("Escribe tu Markdown aquí...")
+        self.attach_editor(self.editor)
 
         # Preview web
         self.preview = QWebEngineView()
+        page = PreviewPage(self.preview)
+        page.settings().setUnknownUrlSchemePolicy(
+            QWebEngineSettings.UnknownUrlSchemePolicy.AllowAllUnknownUrlSchemes
+        )
+        page.block_clicked.connect(self.on_preview_block_clicked)
+        page.link_clicked.connect(self.on_preview_link_clicked)
+        self.preview.setPage(page)
+        self.preview.loadFinished.connect(self.on_preview_loaded)
+        # La página base (con el CSS) se carga una única vez
+        self.preview.setHtml(PREVIEW_SHELL)
 
         # Agregar al splitter
         self.splitter.addWidget(self.editor)
@@ -72,6 +423,63 @@ class MarkdownViewer(QMainWindow):
 
         main_layout.addWidget(self.splitter)
 
+        # Instrumentación: lectura en la barra de estado y panel de depuración
+        self.perf_label = QLabel()
+        self.statusBar().addPermanentWidget(self.perf_label)
+        self.perf_log = QPlainTextEdit()
+        self.perf_log.setReadOnly(True)
+        self.perf_log.setMaximumBlockCount(500)
+        self.perf_dock = QDockWidget("Rendimiento", self)
+        self.perf_dock.setWidget(self.perf_log)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.perf_dock)
+        self.perf_dock.hide()
+        self.perf_signals = PerfSignals()
+        self.perf_signals.recorded.connect(self.show_timings)
+        instrumentation.subscribe(self.perf_signals.recorded.emit)
+
+        # Exportaciones a PDF en segundo plano (página de WebEngine oculta)
+        self.pdf_exports = PdfExportQueue(self)
+        self.pdf_exports.progress.connect(self.on_pdf_export_progress)
+        self.pdf_exports.finished.connect(self.on_pdf_export_finished)
+        self.pdf_progress = QProgressBar()
+        self.pdf_progress.setRange(0, 0)
+        self.pdf_progress.setMaximumWidth(120)
+        self.pdf_progress.hide()
+        self.statusBar().addPermanentWidget(self.pdf_progress)
+
+        # Esquema del documento a partir del índice de encabezados
+        self.outline = QTreeWidget()
+        self.outline.setHeaderHidden(True)
+        self.outline.itemClicked.connect(self.jump_to_heading)
+        self.outline.itemActivated.connect(self.jump_to_heading)
+        self.outline_dock = QDockWidget("Esquema", self)
+        self.outline_dock.setWidget(self.outline)
+        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.outline_dock)
+        self.outline_dock.hide()
+        self.outline_dock.visibilityChanged.connect(lambda visible: visible and self.refresh_outline())
+
+        # Búsqueda en los documentos de la carpeta de trabajo
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Buscar en la carpeta")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(lambda: self.search_timer.start(150))
+        self.search_input.returnPressed.connect(self.run_workspace_search)
+        self.search_results = QListWidget()
+        self.search_results.setWordWrap(True)
+        self.search_results.itemClicked.connect(self.open_search_result)
+        self.search_results.itemActivated.connect(self.open_search_result)
+        search_panel = QWidget()
+        search_layout = QVBoxLayout(search_panel)
+        search_layout.setContentsMargins(0, 0, 0, 0)
+        search_layout.addWidget(self.search_input)
+        search_layout.addWidget(self.search_results)
+        self.search_dock = QDockWidget("Buscar", self)
+        self.search_dock.setWidget(search_panel)
+        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.search_dock)
+        self.tabifyDockWidget(self.outline_dock, self.search_dock)
+        self.search_dock.hide()
+        self.search_dock.visibilityChanged.connect(lambda visible: visible and self.update_workspace_index())
+
         # Crear menú y toolbar después de instanciar editor/preview
         self.create_menu()
         self.create_toolbar()
@@ -81,8 +489,29 @@ class MarkdownViewer(QMainWindow):
         self.update_timer.timeout.connect(self.update_preview)
         self.update_timer.setSingleShot(True)
 
-        # Actualizar preview inicial
-        self.update_preview()
+        # Timer para refrescar el esquema
+        self.outline_timer = QTimer()
+        self.outline_timer.timeout.connect(self.refresh_outline)
+        self.outline_timer.setSingleShot(True)
+
+        # Timer de la búsqueda en la carpeta mientras se escribe
+        self.search_timer = QTimer()
+        self.search_timer.timeout.connect(self.run_workspace_search)
+        self.search_timer.setSingleShot(True)
+
+        # Timer de sincronización del scroll (como mucho una por fotograma)
+        self.scroll_timer = QTimer()
+        self.scroll_timer.timeout.connect(self.sync_preview_scroll)
+        self.scroll_timer.setSingleShot(True)
+
+        # Timer que vuelca al editor los fragmentos de una apertura en curso
+        self.open_timer = QTimer()
+        self.open_timer.setInterval(10)
+        self.open_timer.timeout.connect(self.pump_open)
+
+        # Primera pestaña y preview inicial
+        self.add_tab(self.tab)
+        self.update_preview(synchronous=True)
 
     def create_menu(self):
         """Crear barra de menú"""
@@ -101,6 +530,11 @@ class MarkdownViewer(QMainWindow):
         open_action.triggered.connect(self.open_file)
         file_menu.addAction(open_action)
 
+        open_folder_action = QAction("Abrir &carpeta...", self)
+        open_folder_action.setShortcut("Ctrl+Shift+K")
+        open_folder_action.triggered.connect(self.open_workspace)
+        file_menu.addAction(open_folder_action)
+
         save_action = QAction("&Guardar", self)
         save_action.setShortcut("Ctrl+S")
         save_action.triggered.connect(self.save_file)
@@ -111,6 +545,11 @@ class MarkdownViewer(QMainWindow):
         save_as_action.triggered.connect(self.save_file_as)
         file_menu.addAction(save_as_action)
 
+        close_tab_action = QAction("C&errar pestaña", self)
+        close_tab_action.setShortcut("Ctrl+W")
+        close_tab_action.triggered.connect(lambda: self.close_tab(self.tab))
+        file_menu.addAction(close_tab_action)
+
         file_menu.addSeparator()
 
         # Submenú Exportar
@@ -140,12 +579,12 @@ class MarkdownViewer(QMainWindow):
 
         undo_action = QAction("&Deshacer", self)
         undo_action.setShortcut("Ctrl+Z")
-        undo_action.triggered.connect(self.editor.undo)
+        undo_action.triggered.connect(lambda: self.editor.undo())
         edit_menu.addAction(undo_action)
 
         redo_action = QAction("&Rehacer", self)
         redo_action.setShortcut("Ctrl+Y")
-        redo_action.triggered.connect(self.editor.redo)
+        redo_action.triggered.connect(lambda: self.editor.redo())
         edit_menu.addAction(redo_action)
 
         edit_menu.addSeparator()
@@ -231,6 +670,44 @@ class MarkdownViewer(QMainWindow):
         preview_only_action.triggered.connect(self.set_preview_only)
         view_menu.addAction(preview_only_action)
 
+        view_menu.addSeparator()
+
+        next_tab_action = QAction("Pestaña &siguiente", self)
+        next_tab_action.setShortcut("Ctrl+Tab")
+        next_tab_action.triggered.connect(lambda: self.cycle_tab(1))
+        view_menu.addAction(next_tab_action)
+
+        previous_tab_action = QAction("Pestaña &anterior", self)
+        previous_tab_action.setShortcut("Ctrl+Shift+Tab")
+        previous_tab_action.triggered.connect(lambda: self.cycle_tab(-1))
+        view_menu.addAction(previous_tab_action)
+
+        view_menu.addSeparator()
+
+        self.large_file_action = QAction("Modo archivo &grande", self)
+        self.large_file_action.setCheckable(True)
+        self.large_file_action.toggled.connect(self.set_large_file_mode)
+        view_menu.addAction(self.large_file_action)
+
+        self.sync_scroll_action = QAction("&Sincronizar desplazamiento", self)
+        self.sync_scroll_action.setCheckable(True)
+        self.sync_scroll_action.setChecked(True)
+        view_menu.addAction(self.sync_scroll_action)
+
+        perf_action = self.perf_dock.toggleViewAction()
+        perf_action.setText("Panel de &rendimiento")
+        view_menu.addAction(perf_action)
+
+        outline_action = self.outline_dock.toggleViewAction()
+        outline_action.setText("&Esquema")
+        outline_action.setShortcut("Ctrl+Shift+O")
+        view_menu.addAction(outline_action)
+
+        search_action = self.search_dock.toggleViewAction()
+        search_action.setText("&Buscar en la carpeta")
+        search_action.setShortcut("Ctrl+Shift+F")
+        view_menu.addAction(search_action)
+
     def create_toolbar(self):
         """Crear toolbar con botones rápidos"""
         toolbar = QToolBar()
@@ -299,204 +776,703 @@ class MarkdownViewer(QMainWindow):
         export_docx_btn.clicked.connect(self.export_to_docx)
         toolbar.addWidget(export_docx_btn)
 
+    def create_editor(self, large):
+        """Crear el widget de edición (texto plano por bloques en modo archivo grande)"""
+        if large:
+            editor = CodeEditor()
+        else:
+            editor = QTextEdit()
+        editor.setPlaceholderText("Escribe tu Markdown aquí...")
+        return editor
+
+    def attach_editor(self, editor):
+        """Conectar las señales del editor activo"""
+        editor.textChanged.connect(self.on_text_changed)
+        editor.document().contentsChange.connect(self.on_contents_change)
+        editor.verticalScrollBar().valueChanged.connect(self.on_editor_scrolled)
+        if not self._switching:
+            self.resync_document_model()
+        # Resaltado incremental por bloque (se destruye con el documento)
+        self.highlighter = MarkdownHighlighter(editor.document())
+
+    def set_large_file_mode(self, enabled, keep_text=True):
+        """Cambiar entre el editor normal y el de archivos grandes conservando el texto"""
+        self.tab.large_file_mode = enabled
+        if enabled == self.large_file_mode:
+            return
+        self.large_file_mode = enabled
+        self.large_file_action.setChecked(enabled)
+
+        old = self.editor
+        new = self.create_editor(large=enabled)
+        new.setFont(old.font())
+        new.setVisible(old.isVisible())
+        if keep_text:
+            # Copiar el texto antes de conectar señales: no es una modificación
+            new.setPlainText(old.toPlainText())
+            cursor = new.textCursor()
+            cursor.setPosition(min(old.textCursor().position(), new.document().characterCount() - 1))
+            new.setTextCursor(cursor)
+
+        self.splitter.replaceWidget(self.splitter.indexOf(old), new)
+        self.editor = new
+        self.attach_editor(new)
+        old.deleteLater()
+
+    def on_contents_change(self, position, removed, added):
+        """Aplicar al modelo del documento el delta de una edición"""
+        if self._switching:
+            # El editor recibe el texto de otra pestaña: su modelo ya lo tiene
+            return
+        model = self.tab.document_model
+        document = self.editor.document()
+        length = document.characterCount() - 1
+        # Qt cuenta el separador final del documento en algunos deltas
+        removed = min(removed, len(model) - position)
+        added = length - len(model) + removed
+        if position < 0 or removed < 0 or added < 0 or position + added > length:
+            self.resync_document_model()
+            return
+        inserted = ''
+        if added:
+            cursor = QTextCursor(document)
+            cursor.setPosition(position)
+            cursor.setPosition(position + added, QTextCursor.MoveMode.KeepAnchor)
+            inserted = cursor.selectedText().translate(QT_PLAIN_TEXT)
+        if removed or inserted:
+            before = model.snapshot()
+            removed_lines = before.slice(position, position + removed).count('\n')
+            model.replace(position, removed, inserted)
+            self.update_heading_index(position, removed_lines, added)
+            self.journal_edit(before, position, removed, inserted)
+
+    def update_heading_index(self, position, removed_lines, added):
+        """Volver a clasificar sólo las líneas tocadas por un delta"""
+        document = self.editor.document()
+        first = document.findBlock(position)
+        last = document.findBlock(position + added)
+        end = last.position() + last.length() - 1
+        snapshot = self.tab.document_model.snapshot()
+        lines = snapshot.slice(first.position(), end).split('\n')
+        number = first.blockNumber()
+        # Dos líneas previas: de ellas depende un subrayado Setext al principio
+        context = snapshot.lines(max(0, number - 2), number) if number else []
+        self.tab.heading_index.update(number, removed_lines + 1, lines, context)
+
+    def resync_document_model(self):
+        """Reconstruir el modelo a partir del editor si se ha desincronizado"""
+        text = self.editor.toPlainText()
+        self.tab.document_model.set_text(text)
+        self.tab.heading_index.reset(text)
+
     def on_text_changed(self):
         """Manejar cambios en el texto"""
-        self.is_modified = True
+        self.revision += 1
+        if self._loading or self._switching:
+            # Lotes de una apertura en curso o cambio de pestaña: no son modificaciones
+            return
+        self.tab.is_modified = True
         self.update_title()
-        # Reiniciar timer para actualización del preview (delay 500ms)
-        self.update_timer.start(500)
+        if self.outline_dock.isVisible():
+            self.outline_timer.start(300)
+        # Reiniciar timer del preview con un retardo adaptado al coste medido
+        now = time.monotonic()
+        self.debounce.record_keystroke(now)
+        self.update_timer.start(self.debounce.next_delay(now))
+
+    def update_preview(self, synchronous=False):
+        """Actualizar vista previa del Markdown.
+        El renderizado se hace en un hilo de fondo con el número de revisión del
+        documento; un cambio posterior cancela o sustituye el renderizado en curso.
+        """
+        timings = instrumentation.begin('update_preview')
+        with timings.stage('extract'):
+            snapshot = self.tab.document_model.snapshot()
+        timings.meta['chars'] = len(snapshot)
+        if synchronous:
+            self.debounce.render_started()
+            with timings.stage('extract'):
+                markdown_text = snapshot.text()
+            result = timed_render(self.block_renderer, markdown_text, timings)
+            self.apply_render(self.revision, result, timings)
+            return
 
-    def update_preview(self):
-        """Actualizar vista previa del Markdown"""
-        markdown_text = self.editor.toPlainText()
-        html = self.markdown_to_html(markdown_text)
-        self.preview.setHtml(html)
+        # Si se agotó el presupuesto de retraso, este renderizado se mostrará
+        # aunque se siga escribiendo
+        if self.debounce.overdue(time.monotonic()):
+            self._forced_revision = self.revision
+        self.debounce.render_started()
+
+        # Descartar tareas pendientes que aún no han empezado
+        self.render_pool.clear()
+        task = RenderTask(self.block_renderer, snapshot, self.revision,
+                          self.is_current_revision, timings)
+        task.signals.finished.connect(self.apply_render)
+        task.signals.failed.connect(self.on_render_failed)
+        self._render_task = task
+        self.render_pool.start(task)
+
+    def is_current_revision(self, revision):
+        """Indicar si la revisión sigue siendo válida para el preview (seguro entre hilos)"""
+        return revision == self.revision or revision == self._forced_revision
+
+    def apply_render(self, revision, result, timings=None):
+        """Aplicar un renderizado al preview.
+        Sólo se envían los bloques modificados a la página base ya cargada
+        mediante runJavaScript, sin recargarla ni perder la posición de scroll.
+        """
+        if not self.is_current_revision(revision):
+            # Resultado obsoleto: llegará uno más reciente
+            return
+        self.debounce.record_render(result.elapsed)
+        if revision == self._forced_revision:
+            self._forced_revision = None
+        if revision == self._cache_revision:
+            self.store_render_cache(self._cache_key, result)
+
+        if result is not self.tab.last_render:
+            # Sólo está al día con el texto si no hubo cambios desde que empezó
+            current = self.tab.document_model.revision if revision == self.revision else None
+            self.tab.set_render(result, current)
+        if not self._preview_loaded:
+            # Se aplicará cuando termine de cargar la página base
+            if timings is not None:
+                instrumentation.finish(timings)
+            return
+
+        start, removed, end = diff_blocks(self._preview_keys, result.keys)
+        if removed or end > start:
+            if timings is None:
+                timings = instrumentation.begin('update_preview')
+            with timings.stage('wrap'):
+                script = f"mdPatch({start}, {removed}, {json.dumps(result.blocks[start:end])});"
+            timings.meta['patched'] = end - start
+            timings.meta['script_bytes'] = len(script)
+            sent = time.perf_counter()
+            self.preview.page().runJavaScript(
+                script, lambda _: self.on_patch_applied(timings, sent)
+            )
+        elif timings is not None:
+            instrumentation.finish(timings)
+        self._preview_keys = result.keys
+        self._preview_lines = result.lines
+        self._line_starts = [start for start, _ in result.lines]
+
+        # Actualización final cuando el usuario deje de escribir
+        if revision != self.revision and not self.update_timer.isActive():
+            self.update_timer.start(self.debounce.next_delay(time.monotonic()))
+
+    def store_render_cache(self, key, result):
+        """Guardar en disco (en segundo plano) el renderizado de un archivo recién abierto"""
+        self._cache_revision = None
+        QThreadPool.globalInstance().start(lambda: self.render_cache.store(key, result))
+
+    def on_patch_applied(self, timings, sent):
+        """Cerrar la medición cuando la página ha aplicado el parche"""
+        timings.add('load', time.perf_counter() - sent)
+        instrumentation.finish(timings)
+
+    def show_timings(self, timings):
+        """Mostrar los tiempos de una operación en la barra de estado y el panel"""
+        summary = timings.summary()
+        self.perf_label.setText(summary)
+        if self.perf_dock.isVisible():
+            self.perf_log.appendPlainText(
+                f"{time.strftime('%H:%M:%S', time.localtime(timings.timestamp))}  {summary}  {timings.meta}"
+            )
+
+    def on_render_failed(self, revision, message):
+        """Registrar un error de renderizado en segundo plano"""
+        logger.error("Error al renderizar el preview (revisión %s): %s", revision, message)
+        self.statusBar().showMessage(f"Error al renderizar el preview: {message}", 10000)
+
+    def on_preview_loaded(self, ok):
+        """Comprobar que la página cargada es la página base antes de parchearla"""
+        self._preview_loaded = False
+        self._preview_keys = []
+        self.preview.page().runJavaScript(
+            "typeof window.mdPatch === 'function'", self.on_preview_checked
+        )
+
+    def on_preview_checked(self, is_shell):
+        """Volcar el último renderizado en la página base o volver a cargarla"""
+        if not is_shell:
+            if self._reloading_shell:
+                logger.warning("No se pudo cargar la página base del preview")
+                self._reloading_shell = False
+                return
+            # Se salió de la página base: sin ella no se pueden aplicar parches
+            self._reloading_shell = True
+            self.preview.setHtml(PREVIEW_SHELL)
+            return
+        self._reloading_shell = False
+        self._preview_loaded = True
+        if self.tab.last_render is not None:
+            self.apply_render(self.revision, self.tab.last_render)
+
+    def on_preview_link_clicked(self, url):
+        """Abrir en la aplicación del sistema los enlaces pulsados en el preview"""
+        if not QDesktopServices.openUrl(url):
+            self.statusBar().showMessage(f"No se pudo abrir el enlace: {url.toDisplayString()}", 10000)
+
+    def refresh_outline(self):
+        """Reconstruir el panel de esquema si cambiaron los encabezados"""
+        if not self.outline_dock.isVisible():
+            return
+        headings = self.tab.heading_index.headings()
+        self._outline_headings = headings
+        shape = [(h.level, h.text) for h in headings]
+        if shape == self._outline_shape:
+            # Sólo se desplazaron líneas: los elementos siguen siendo válidos
+            return
+        self._outline_shape = shape
+
+        self.outline.clear()
+        parents = []
+        for index, heading in enumerate(headings):
+            while parents and parents[-1][0] >= heading.level:
+                parents.pop()
+            item = QTreeWidgetItem([heading.text])
+            item.setData(0, Qt.ItemDataRole.UserRole, index)
+            if parents:
+                parents[-1][1].addChild(item)
+            else:
+                self.outline.addTopLevelItem(item)
+            parents.append((heading.level, item))
+        self.outline.expandAll()
+
+    def jump_to_heading(self, item):
+        """Llevar el editor y el preview al encabezado seleccionado"""
+        heading = self._outline_headings[item.data(0, Qt.ItemDataRole.UserRole)]
+        self.go_to_line(heading.line)
+        self.preview.page().runJavaScript(
+            f"mdScrollToHeading({json.dumps(heading.base)}, {heading.occurrence});"
+        )
+
+    def go_to_line(self, line):
+        """Poner el cursor al principio de una línea y dejarla arriba del editor"""
+        block = self.editor.document().findBlockByNumber(line)
+        if not block.isValid():
+            return False
+        cursor = self.editor.textCursor()
+        cursor.setPosition(block.position())
+        self._scroll_sync_blocked = True
+        try:
+            self.editor.setTextCursor(cursor)
+            # Desplazar al final y volver deja la línea arriba del todo
+            scrollbar = self.editor.verticalScrollBar()
+            scrollbar.setValue(scrollbar.maximum())
+            self.editor.ensureCursorVisible()
+        finally:
+            self._scroll_sync_blocked = False
+        return True
+
+    def on_editor_scrolled(self):
+        """Programar la sincronización del preview con el editor"""
+        if (self.sync_scroll_action.isChecked() and not self._scroll_sync_blocked
+                and not self.scroll_timer.isActive()):
+            self.scroll_timer.start(16)
+
+    def sync_preview_scroll(self):
+        """Desplazar el preview al bloque de la primera línea visible del editor"""
+        if not self._line_starts:
+            return
+        scrollbar = self.editor.verticalScrollBar()
+        if scrollbar.value() >= scrollbar.maximum() > 0:
+            index, fraction = len(self._line_starts) - 1, 1.0
+        else:
+            line = self.editor.cursorForPosition(QPoint(0, 0)).blockNumber()
+            index = max(0, bisect_right(self._line_starts, line) - 1)
+            start, end = self._preview_lines[index]
+            fraction = min(1.0, max(0.0, (line - start) / max(1, end - start)))
+        self.preview.page().runJavaScript(f"mdScrollToBlock({index}, {fraction:.3f});")
+
+    def on_preview_block_clicked(self, index, fraction):
+        """Llevar el cursor del editor a la línea pulsada en el preview"""
+        if not 0 <= index < len(self._preview_lines):
+            return
+        start, end = self._preview_lines[index]
+        line = start + min(max(0, end - start - 1), int(fraction * (end - start)))
+        block = self.editor.document().findBlockByNumber(line)
+        if not block.isValid():
+            return
+        cursor = self.editor.textCursor()
+        cursor.setPosition(block.position())
+        # El preview ya muestra esa zona: no devolverle el desplazamiento
+        self._scroll_sync_blocked = True
+        try:
+            self.editor.setTextCursor(cursor)
+            self.editor.ensureCursorVisible()
+        finally:
+            self._scroll_sync_blocked = False
+        self.editor.setFocus()
 
     def markdown_to_html(self, markdown_text):
         """Convertir Markdown a HTML con estilo"""
-        # Configurar extensiones de Markdown
-        md = markdown.Markdown(extensions=[
-            'fenced_code',
-            'tables',
-            'toc',
-            'nl2br',
-            'sane_lists',
-            'codehilite',
-            'extra'
-        ])
-
-        html_content = md.convert(markdown_text)
-
-        # Envolver con CSS
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 900px;
-                    margin: 20px auto;
-                    padding: 20px;
-                    background-color: #f9f9f9;
-                }}
-                h1, h2, h3, h4, h5, h6 {{
-                    color: #2c3e50;
-                    margin-top: 24px;
-                    margin-bottom: 16px;
-                    font-weight: 600;
-                    line-height: 1.25;
-                }}
-                h1 {{
-                    font-size: 2em;
-                    border-bottom: 2px solid #eaecef;
-                    padding-bottom: 0.3em;
-                }}
-                h2 {{
-                    font-size: 1.5em;
-                    border-bottom: 1px solid #eaecef;
-                    padding-bottom: 0.3em;
-                }}
-                h3 {{ font-size: 1.25em; }}
-                h4 {{ font-size: 1em; }}
-                h5 {{ font-size: 0.875em; }}
-                h6 {{ font-size: 0.85em; color: #6a737d; }}
-
-                p {{
-                    margin-bottom: 16px;
-                }}
-
-                code {{
-                    background-color: #f6f8fa;
-                    padding: 2px 6px;
-                    border-radius: 3px;
-                    font-family: 'Consolas', 'Monaco', monospace;
-                    font-size: 0.9em;
-                }}
-
-                pre {{
-                    background-color: #f6f8fa;
-                    padding: 16px;
-                    border-radius: 6px;
-                    overflow-x: auto;
-                    margin-bottom: 16px;
-                }}
-
-                pre code {{
-                    background-color: transparent;
-                    padding: 0;
-                }}
-
-                blockquote {{
-                    border-left: 4px solid #dfe2e5;
-                    padding-left: 16px;
-                    color: #6a737d;
-                    margin-left: 0;
-                }}
-
-                table {{
-                    border-collapse: collapse;
-                    width: 100%;
-                    margin-bottom: 16px;
-                }}
-
-                table th, table td {{
-                    border: 1px solid #dfe2e5;
-                    padding: 8px 12px;
-                    text-align: left;
-                }}
-
-                table th {{
-                    background-color: #f6f8fa;
-                    font-weight: 600;
-                }}
-
-                table tr:nth-child(even) {{
-                    background-color: #f9f9f9;
-                }}
-
-                ul, ol {{
-                    padding-left: 2em;
-                    margin-bottom: 16px;
-                }}
-
-                li {{
-                    margin-bottom: 4px;
-                }}
-
-                a {{
-                    color: #0366d6;
-                    text-decoration: none;
-                }}
-
-                a:hover {{
-                    text-decoration: underline;
-                }}
-
-                img {{
-                    max-width: 100%;
-                    height: auto;
-                }}
-
-                hr {{
-                    border: 0;
-                    border-top: 2px solid #eaecef;
-                    margin: 24px 0;
-                }}
-            </style>
-        </head>
-        <body>
-            {html_content}
-        </body>
-        </html>
-        """
+        timings = instrumentation.begin('markdown_to_html', chars=len(markdown_text))
+        html = markdown_to_html(markdown_text, timings)
+        instrumentation.finish(timings)
         return html
 
     def update_title(self):
         """Actualizar título de la ventana"""
         title = "Markdown Viewer & Editor"
-        if self.current_file:
-            title = f"{Path(self.current_file).name} - {title}"
-        if self.is_modified:
+        if self.tab.path:
+            title = f"{Path(self.tab.path).name} - {title}"
+        if self.tab.is_modified:
             title = f"*{title}"
         self.setWindowTitle(title)
+        self.update_tab_label(self.tab)
+
+    # ------------------------------------------------------------------
+    # Pestañas
+    # ------------------------------------------------------------------
+
+    def update_tab_label(self, tab):
+        if tab not in self.tabs:
+            return
+        index = self.tabs.index(tab)
+        name = tab.display_name()
+        self.tab_bar.setTabText(index, f"*{name}" if tab.is_modified else name)
+        self.tab_bar.setTabToolTip(index, tab.path or "")
+
+    def add_tab(self, tab):
+        self.tabs.append(tab)
+        self.tab_bar.addTab(tab.display_name())
+        self.update_tab_label(tab)
+        return tab
+
+    def find_tab(self, file_path):
+        for tab in self.tabs:
+            if tab.path and os.path.normcase(os.path.abspath(tab.path)) == os.path.normcase(os.path.abspath(file_path)):
+                return tab
+        return None
+
+    def activate_tab(self, tab):
+        """Mostrar una pestaña (se lee su archivo si aún no se había cargado)"""
+        index = self.tabs.index(tab)
+        if self.tab_bar.currentIndex() != index:
+            # on_tab_changed hace el cambio
+            self.tab_bar.setCurrentIndex(index)
+        elif not tab.loaded:
+            self.load_tab(tab)
+
+    def cycle_tab(self, step):
+        if len(self.tabs) > 1 and self.tab_bar.isEnabled():
+            self.tab_bar.setCurrentIndex((self.tab_bar.currentIndex() + step) % len(self.tabs))
+
+    def on_tab_moved(self, source, target):
+        self.tabs.insert(target, self.tabs.pop(source))
+
+    def on_tab_changed(self, index):
+        if 0 <= index < len(self.tabs) and self.tabs[index] is not self.tab:
+            self.switch_to_tab(self.tabs[index])
+
+    def switch_to_tab(self, tab):
+        """Pasar al editor el texto de otra pestaña.
+        La pestaña que se oculta conserva sólo su modelo de texto y su último
+        renderizado; el editor y el preview son los mismos para todas.
+        """
+        old = self.tab
+        old.cursor_position = self.editor.textCursor().position()
+        old.scroll_value = self.editor.verticalScrollBar().value()
+        self.tab = tab
+        # Los renderizados en curso de la otra pestaña quedan obsoletos
+        self.revision += 1
+        self._tab_clock += 1
+        tab.last_used = self._tab_clock
+        self._forced_revision = None
+        self._cache_key = None
+        self._cache_revision = None
+        self._outline_shape = None
+
+        self._switching = True
+        try:
+            self.set_large_file_mode(tab.large_file_mode, keep_text=False)
+            document = self.editor.document()
+            if len(tab.document_model) > HIGHLIGHT_LIMIT:
+                self.highlighter.setDocument(None)
+            elif self.highlighter.document() is None:
+                self.highlighter.setDocument(document)
+            self.editor.setPlainText(tab.document_model.text())
+            cursor = self.editor.textCursor()
+            cursor.setPosition(min(tab.cursor_position, document.characterCount() - 1))
+            self.editor.setTextCursor(cursor)
+            self.editor.verticalScrollBar().setValue(tab.scroll_value)
+        finally:
+            self._switching = False
+        self.update_title()
+        if self.outline_dock.isVisible():
+            self.refresh_outline()
+        self.evict_renders()
+
+        if not tab.loaded:
+            self.load_tab(tab)
+            return
+        self.show_tab_render(tab)
+        if tab.external_change:
+            tab.external_change = False
+            self.on_file_changed(tab.path)
+
+    def show_tab_render(self, tab):
+        """Mostrar al instante el último renderizado de la pestaña y ponerlo al día"""
+        result = tab.last_render
+        if result is None and tab.render_key is not None and tab.render_key[0] == tab.document_model.revision:
+            result = self.render_cache.load(tab.render_key[1])
+            if result is not None:
+                tab.set_render(result, tab.render_key[0])
+        if result is not None:
+            self.block_renderer.seed(result)
+            self.apply_render(self.revision, result)
+        self.update_preview()
+
+    def evict_renders(self):
+        """Liberar los renderizados de pestañas ocultas que no caben en el presupuesto"""
+        for tab in renders_to_evict(self.tabs, self.tab, self.render_budget):
+            result, revision = tab.last_render, tab.render_revision
+            tab.drop_render()
+            if revision is not None and revision == tab.document_model.revision:
+                # Se guarda en la caché en disco para mostrarlo al instante al volver
+                snapshot = tab.document_model.snapshot()
+                QThreadPool.globalInstance().start(
+                    lambda tab=tab, snapshot=snapshot, result=result: self.spill_render(tab, snapshot, result)
+                )
+
+    def spill_render(self, tab, snapshot, result):
+        """Guardar en la caché en disco un renderizado expulsado (hilo de trabajo)"""
+        key = self.render_cache.make_key(snapshot.text())
+        self.render_cache.store(key, result)
+        tab.render_key = (snapshot.revision, key)
+
+    def close_tab(self, tab):
+        """Cerrar una pestaña, preguntando antes si tiene cambios sin guardar"""
+        if self._loading:
+            return False
+        if tab.is_modified:
+            self.activate_tab(tab)
+            if not self.check_save_changes():
+                return False
+        self.remove_tab(tab)
+        return True
+
+    def remove_tab(self, tab):
+        """Quitar una pestaña sin preguntar; siempre queda al menos una"""
+        self.discard_journal(tab)
+        if tab.watched_path:
+            self.file_watcher.unwatch(tab.watched_path)
+            tab.watched_path = None
+        tab.reload_task = None
+        if len(self.tabs) == 1:
+            self.add_tab(DocumentTab())
+        index = self.tabs.index(tab)
+        if tab is self.tab:
+            self.activate_tab(self.tabs[index + 1] if index + 1 < len(self.tabs) else self.tabs[index - 1])
+        # Quitar de la lista antes que de la barra: removeTab emite currentChanged
+        index = self.tabs.index(tab)
+        self.tabs.remove(tab)
+        self.tab_bar.removeTab(index)
 
     def new_file(self):
-        """Crear nuevo archivo"""
-        if self.check_save_changes():
-            self.editor.clear()
-            self.current_file = None
-            self.is_modified = False
-            self.update_title()
+        """Crear un documento nuevo en otra pestaña"""
+        if not (self.tab.is_pristine() and self.tab.loaded):
+            self.activate_tab(self.add_tab(DocumentTab()))
 
     def open_file(self):
-        """Abrir archivo Markdown"""
-        if self.check_save_changes():
-            file_path, _ = QFileDialog.getOpenFileName(
-                self,
-                "Abrir archivo Markdown",
-                "",
-                "Archivos Markdown (*.md *.markdown);;Todos los archivos (*.*)"
+        """Abrir archivos Markdown, cada uno en su pestaña"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Abrir archivo Markdown",
+            "",
+            "Archivos Markdown (*.md *.markdown);;Todos los archivos (*.*)"
+        )
+        if file_paths:
+            self.open_paths(file_paths)
+
+    def open_paths(self, file_paths):
+        """Abrir archivos en pestañas; sólo se lee el que queda a la vista, el resto al activarlo"""
+        target = None
+        for file_path in file_paths:
+            tab = self.find_tab(file_path)
+            if tab is None:
+                if target is None and self.tab.is_pristine() and self.tab.loaded:
+                    # Reutilizar la pestaña vacía
+                    tab = self.tab
+                    tab.path = file_path
+                    tab.loaded = False
+                    self.update_tab_label(tab)
+                else:
+                    tab = self.add_tab(DocumentTab(file_path))
+            target = tab
+        if target is not None:
+            self.activate_tab(target)
+
+    def load_tab(self, tab):
+        """Leer el archivo de la pestaña activa; si falla se cierra la pestaña"""
+        file_path = tab.path
+        try:
+            size = os.path.getsize(file_path)
+            if size > STREAM_THRESHOLD:
+                self.start_streaming_open(file_path, size)
+                return
+            timings = instrumentation.begin('open_file', path=file_path)
+            with timings.stage('read'):
+                stamp = file_stamp(file_path)
+                reader = TextFileReader(file_path)
+                content = reader.read()
+            timings.meta['chars'] = len(content)
+            self.set_file_encoding(tab, reader, timings)
+            self.set_large_file_mode(len(content) >= LARGE_FILE_THRESHOLD, keep_text=False)
+            with timings.stage('load'):
+                self.set_buffer_text(content)
+            tab.loaded = True
+            self.watch_file(file_path, stamp, tab.document_model.snapshot())
+            tab.is_modified = False
+            self.update_title()
+            self.show_cached_render(self.render_cache.make_key(content), timings)
+            instrumentation.finish(timings)
+            self.show_pending_line(tab)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error al abrir archivo:\n{str(e)}")
+            self.remove_tab(tab)
+
+    def show_cached_render(self, key, timings):
+        """Mostrar al instante el preview si este contenido ya se renderizó"""
+        self._cache_key = key
+        self._cache_revision = self.revision
+        cached = self.render_cache.load(key)
+        timings.meta['render_cache_hit'] = cached is not None
+        if cached is not None:
+            self._cache_revision = None
+            self.block_renderer.seed(cached)
+            self.apply_render(self.revision, cached)
+
+    def start_streaming_open(self, file_path, size):
+        """Abrir un archivo grande leyéndolo por fragmentos en segundo plano"""
+        self._open_timings = instrumentation.begin('open_file', path=file_path, bytes=size, streamed=True)
+        self._open_started = time.perf_counter()
+        self.set_large_file_mode(size >= LARGE_FILE_THRESHOLD, keep_text=False)
+        self._loading = True
+        self._open_tab = self.tab
+        # La apertura llena el editor compartido: no se cambia de pestaña mientras tanto
+        self.tab_bar.setEnabled(False)
+        self.editor.clear()
+        self.discard_journal()
+        document = self.editor.document()
+        # Los lotes no deben acabar en la pila de deshacer
+        document.setUndoRedoEnabled(False)
+        if size > HIGHLIGHT_LIMIT:
+            self.highlighter.setDocument(None)
+
+        progress = QProgressDialog(f"Abriendo {Path(file_path).name}...", "Cancelar", 0, 1000, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
+        progress.canceled.connect(self.cancel_open)
+        self._open_progress = progress
+
+        task = OpenTask(file_path, self.render_cache)
+        task.signals.finished.connect(lambda key, secs: self.on_open_read(task, key, secs))
+        task.signals.failed.connect(lambda message: self.on_open_failed(task, message))
+        self._open_task = task
+        self._open_key = None
+        QThreadPool.globalInstance().start(task)
+        self.open_timer.start()
+
+    def pump_open(self):
+        """Insertar en el editor los fragmentos ya leídos durante unos 30 ms"""
+        task = self._open_task
+        if task is None:
+            return
+        start = time.perf_counter()
+        cursor = None
+        while task.queue and time.perf_counter() - start < 0.03:
+            text, done = task.queue.popleft()
+            if len(text) > INSERT_BATCH:
+                task.queue.appendleft((text[INSERT_BATCH:], done))
+                text = text[:INSERT_BATCH]
+            if cursor is None:
+                cursor = QTextCursor(self.editor.document())
+                cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(text)
+            self._open_progress.setValue(int(done * 1000 / max(1, task.reader.size)))
+        if cursor is not None:
+            self._open_timings.add('load', time.perf_counter() - start)
+            self._open_timings.meta.setdefault(
+                'first_screen_ms', round((time.perf_counter() - self._open_started) * 1000, 1)
+            )
+        if not task.queue and self._open_key is not None:
+            self.finish_open()
+
+    def on_open_read(self, task, key, seconds):
+        """La lectura terminó: sólo queda vaciar la cola en el editor"""
+        if task is self._open_task:
+            self._open_key = key
+            self._open_timings.add('read', seconds)
+
+    def on_open_failed(self, task, message):
+        if task is self._open_task:
+            self.abort_open()
+            QMessageBox.critical(self, "Error", f"Error al abrir archivo:\n{message}")
+
+    def cancel_open(self):
+        """Cancelar la apertura en curso y cerrar su pestaña"""
+        if self._open_task is not None:
+            self.abort_open()
+            self.statusBar().showMessage("Apertura cancelada", 5000)
+
+    def abort_open(self):
+        self._open_task.cancelled = True
+        self.end_open()
+        self.editor.clear()
+        self._loading = False
+        tab, self._open_tab = self._open_tab, None
+        self.remove_tab(tab)
+
+    def end_open(self):
+        """Restaurar el editor tras una apertura por fragmentos"""
+        self.open_timer.stop()
+        self._open_task = None
+        self.tab_bar.setEnabled(True)
+        progress, self._open_progress = self._open_progress, None
+        progress.close()
+        progress.deleteLater()
+        document = self.editor.document()
+        document.setUndoRedoEnabled(True)
+        if self.highlighter.document() is None and document.characterCount() <= HIGHLIGHT_LIMIT:
+            self.highlighter.setDocument(document)
+
+    def finish_open(self):
+        """Terminar una apertura por fragmentos y preparar el preview"""
+        task, timings = self._open_task, self._open_timings
+        self.end_open()
+        self._loading = False
+        self.editor.moveCursor(QTextCursor.MoveOperation.Start)
+        self.tab.loaded = True
+        self.watch_file(task.reader.path, task.stamp, self.tab.document_model.snapshot())
+        self.tab.is_modified = False
+        self.update_title()
+        timings.meta['chars'] = len(self.tab.document_model)
+        self.set_file_encoding(self.tab, task.reader, timings)
+        self.show_cached_render(self._open_key, timings)
+        self.update_preview()
+        instrumentation.finish(timings)
+        self.show_pending_line(self.tab)
+
+    def set_file_encoding(self, tab, reader, timings=None):
+        """Recordar la codificación del archivo leído para guardarlo igual"""
+        tab.encoding = reader.write_encoding
+        tab.bom = reader.bom
+        tab.replaced_bytes = reader.replaced
+        if timings is not None:
+            timings.meta['encoding'] = reader.encoding
+        if reader.replaced:
+            self.statusBar().showMessage(
+                f"Se sustituyeron bytes no válidos para {reader.encoding}", 10000
             )
-
-            if file_path:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    self.editor.setPlainText(content)
-                    self.current_file = file_path
-                    self.is_modified = False
-                    self.update_title()
-                except Exception as e:
-                    QMessageBox.critical(self, "Error", f"Error al abrir archivo:\n{str(e)}")
 
     def save_file(self):
         """Guardar archivo actual"""
-        if self.current_file:
-            return self.save_to_file(self.current_file)
+        if self.tab.path:
+            return self.save_to_file(self.tab.path)
         else:
             return self.save_file_as()
 
@@ -512,42 +1488,399 @@ class MarkdownViewer(QMainWindow):
         if file_path:
             if not file_path.endswith('.md'):
                 file_path += '.md'
+            other = self.find_tab(file_path)
+            if other is not None and other is not self.tab:
+                QMessageBox.warning(self, "Guardar archivo",
+                                    f"«{Path(file_path).name}» está abierto en otra pestaña.")
+                return False
             return self.save_to_file(file_path)
         return False
 
     def save_to_file(self, file_path):
-        """Guardar contenido a archivo específico"""
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(self.editor.toPlainText())
-            self.current_file = file_path
-            self.is_modified = False
-            self.update_title()
-            return True
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error al guardar archivo:\n{str(e)}")
+        """Guardar contenido a archivo específico.
+        Se escribe en segundo plano una instantánea del documento; los guardados
+        pedidos mientras otro está en curso se agrupan en uno por archivo.
+        """
+        tab = self.tab
+        if tab.replaced_bytes and not self.confirm_replaced_bytes(file_path):
             return False
+        snapshot = tab.document_model.snapshot()
+        tab.path = file_path
+        self.update_title()
+        if self._save_task is not None:
+            # Un guardado pendiente del mismo archivo se sustituye por este
+            previous = self._save_pending.pop(file_path, None)
+            merged = previous[2] + 1 if previous else 0
+            self._save_pending[file_path] = (tab, snapshot, merged)
+        else:
+            self.start_save(tab, file_path, snapshot)
+        return True
+
+    def start_save(self, tab, file_path, snapshot, merged=0, force=False):
+        timings = instrumentation.begin('save_file', path=file_path, chars=len(snapshot), merged=merged)
+        # Sólo se sobrescribe la versión en disco de la que parte el búfer
+        expected = None
+        if not force and file_path == tab.watched_path:
+            expected = tab.disk_stamp
+        task = SaveTask(file_path, snapshot, timings, expected, tab.encoding, tab.bom)
+        task.tab = tab
+        task.signals.finished.connect(lambda: self.on_save_finished(task))
+        self._save_task = task
+        self.save_pool.start(task)
+
+    def on_save_finished(self, task):
+        """Registrar un guardado terminado y lanzar el siguiente pendiente"""
+        if task is not self._save_task:
+            # Ya procesado por wait_for_saves()
+            return
+        self._save_task = None
+        instrumentation.finish(task.timings)
+        tab = task.tab
+        if task.conflict and self.confirm_overwrite(task.path):
+            task.error = None
+            self.start_save(tab, task.path, task.snapshot, force=True)
+            return
+        if task.error is not None:
+            if not task.conflict:
+                QMessageBox.critical(self, "Error", f"Error al guardar archivo:\n{task.error}")
+        elif tab in self.tabs:
+            if task.path == tab.path:
+                self.watch_file(task.path, task.stamp, task.snapshot, tab)
+            # Los bytes sustituidos al abrir ya no están en el archivo
+            tab.replaced_bytes = False
+            # Sólo queda limpio si no se editó desde la instantánea guardada
+            if task.path == tab.path and task.snapshot.revision == tab.document_model.revision:
+                tab.is_modified = False
+                self.update_tab_label(tab)
+                self.update_title()
+            self.rebase_journal(task)
+            self.statusBar().showMessage(f"Guardado: {Path(task.path).name}", 3000)
+            self.on_workspace_file_saved(task.path)
+        if self._save_pending:
+            file_path = next(iter(self._save_pending))
+            tab, snapshot, merged = self._save_pending.pop(file_path)
+            self.start_save(tab, file_path, snapshot, merged)
+
+    def wait_for_saves(self):
+        """Esperar a que terminen los guardados en curso; indica si todos fueron bien"""
+        ok = True
+        while self._save_task is not None:
+            task = self._save_task
+            self.save_pool.waitForDone()
+            self.on_save_finished(task)
+            ok = ok and task.error is None
+        return ok
+
+    def check_all_changes(self):
+        """Preguntar por los cambios sin guardar de todas las pestañas"""
+        for tab in list(self.tabs):
+            if tab.is_modified:
+                self.activate_tab(tab)
+                if not self.check_save_changes():
+                    return False
+        return True
+
+    def confirm_replaced_bytes(self, file_path):
+        reply = QMessageBox.question(
+            self,
+            "Guardar archivo",
+            f"Al abrir «{Path(self.tab.path).name}» se sustituyeron bytes no válidos para su "
+            f"codificación ({self.tab.encoding}).\n"
+            f"Si se guarda en «{Path(file_path).name}» se escribirán sustituidos por «\ufffd». "
+            "¿Desea guardar de todos modos?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        return reply == QMessageBox.StandardButton.Yes
+
+    def confirm_overwrite(self, file_path):
+        reply = QMessageBox.question(
+            self,
+            "Archivo modificado",
+            f"«{Path(file_path).name}» cambió en disco desde que se abrió.\n"
+            "¿Desea sobrescribirlo con el contenido del editor?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        return reply == QMessageBox.StandardButton.Yes
 
     def check_save_changes(self):
         """Verificar si hay cambios sin guardar"""
-        if self.is_modified:
+        if self.tab.is_modified:
             reply = QMessageBox.question(
                 self,
                 "Cambios sin guardar",
                 "¿Desea guardar los cambios antes de continuar?",
-                QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel
+                QMessageBox.StandardButton.Save | QMessageBox.StandardButton.Discard
+                | QMessageBox.StandardButton.Cancel
             )
 
-            if reply == QMessageBox.Save:
-                return self.save_file()
+            if reply == QMessageBox.StandardButton.Save:
+                return self.save_file() and self.wait_for_saves()
             elif reply == QMessageBox.StandardButton.Cancel:
                 return False
         return True
 
+    # ------------------------------------------------------------------
+    # Carpeta de trabajo
+    # ------------------------------------------------------------------
+
+    def open_workspace(self):
+        """Elegir una carpeta e indexar sus documentos para buscar en ellos"""
+        root = QFileDialog.getExistingDirectory(self, "Abrir carpeta")
+        if root:
+            self.set_workspace(root)
+
+    def set_workspace(self, root):
+        try:
+            workspace = WorkspaceIndex(root)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error al abrir el índice de la carpeta:\n{str(e)}")
+            return
+        if self._index_task is not None:
+            self._index_task.cancelled = True
+            self._index_task = None
+        if self.workspace is not None:
+            self.workspace.close()
+        self.workspace = workspace
+        self.search_dock.setWindowTitle(f"Buscar en {Path(workspace.root).name}")
+        self.search_dock.show()
+        self.search_dock.raise_()
+        self.search_input.setFocus()
+        self.update_workspace_index()
+        self.run_workspace_search()
+
+    def update_workspace_index(self):
+        """Poner al día el índice en segundo plano; sólo se leen los archivos que cambiaron"""
+        if self.workspace is None:
+            return
+        if self._index_task is not None:
+            self._index_again = True
+            return
+        self._index_again = False
+        task = IndexTask(self.workspace)
+        task.signals.progress.connect(self.on_index_progress)
+        task.signals.finished.connect(lambda: self.on_index_finished(task))
+        self._index_task = task
+        QThreadPool.globalInstance().start(task)
+
+    def on_index_progress(self, done, total):
+        self.statusBar().showMessage(f"Indexando {Path(self.workspace.root).name}: {done}/{total}")
+
+    def on_index_finished(self, task):
+        if task is not self._index_task:
+            return
+        self._index_task = None
+        if task.error is not None:
+            QMessageBox.critical(self, "Error", f"Error al indexar la carpeta:\n{task.error}")
+            return
+        stats = task.stats
+        if stats.indexed or stats.removed or stats.unchanged:
+            self.statusBar().showMessage(
+                f"Índice al día: {stats.files} documentos ({stats.indexed} indexados, "
+                f"{stats.removed} quitados)", 5000
+            )
+        if stats.indexed or stats.removed:
+            self.run_workspace_search()
+        if self._index_again:
+            self.update_workspace_index()
+
+    def run_workspace_search(self):
+        """Mostrar las secciones de la carpeta que coinciden con la búsqueda"""
+        self.search_timer.stop()
+        self.search_results.clear()
+        if self.workspace is None:
+            return
+        text = self.search_input.text()
+        timings = instrumentation.begin('workspace_search', query=text)
+        with timings.stage('search'):
+            hits = self.workspace.search(text)
+        timings.meta['hits'] = len(hits)
+        instrumentation.finish(timings)
+        for hit in hits:
+            location = os.path.relpath(hit.path, self.workspace.root)
+            label = f"{location}:{hit.line + 1}"
+            if hit.title:
+                label += f" · {hit.title}"
+            item = QListWidgetItem(f"{label}\n{hit.snippet}")
+            item.setData(Qt.ItemDataRole.UserRole, (hit.path, hit.line))
+            item.setToolTip(hit.path)
+            self.search_results.addItem(item)
+
+    def open_search_result(self, item):
+        """Abrir el documento del resultado en la línea encontrada"""
+        file_path, line = item.data(Qt.ItemDataRole.UserRole)
+        if self._loading:
+            return
+        self.open_paths([file_path])
+        tab = self.find_tab(file_path)
+        if tab is not None:
+            # Si se está leyendo por fragmentos, se lleva a la línea al terminar
+            tab.pending_line = line
+            if tab.loaded:
+                self.show_pending_line(tab)
+
+    def show_pending_line(self, tab):
+        """Llevar el editor a la línea pendiente de la pestaña activa"""
+        if tab is not self.tab or tab.pending_line is None:
+            return
+        line, tab.pending_line = tab.pending_line, None
+        if self.go_to_line(line):
+            self.on_editor_scrolled()
+            self.editor.setFocus()
+
+    def on_workspace_file_saved(self, file_path):
+        """Reindexar tras guardar un documento de la carpeta de trabajo"""
+        if self.workspace is None:
+            return
+        relative = os.path.relpath(os.path.abspath(file_path), self.workspace.root)
+        if not relative.startswith(os.pardir):
+            self.update_workspace_index()
+
+    # ------------------------------------------------------------------
+    # Cambios externos
+    # ------------------------------------------------------------------
+
+    def watch_file(self, file_path, stamp=None, snapshot=None, tab=None):
+        """Vigilar el archivo de una pestaña; ``snapshot`` es su contenido en la versión ``stamp``"""
+        tab = tab or self.tab
+        if file_path != tab.watched_path:
+            if tab.watched_path:
+                self.file_watcher.unwatch(tab.watched_path)
+            tab.watched_path = file_path
+            if file_path:
+                self.file_watcher.watch(file_path, stamp)
+        elif file_path and stamp is not None:
+            self.file_watcher.set_stamp(file_path, stamp)
+        tab.disk_snapshot = snapshot
+        tab.disk_stamp = self.file_watcher.stamp(file_path) if file_path else None
+
+    def is_saving(self, file_path):
+        return (self._save_task is not None and self._save_task.path == file_path) \
+            or file_path in self._save_pending
+
+    def on_file_changed(self, file_path):
+        """El archivo cambió en disco: compararlo con el búfer en segundo plano"""
+        tab = self.find_tab(file_path)
+        if tab is None or not tab.loaded:
+            return
+        if tab is not self.tab or self._loading:
+            # Pestañas ocultas: se compara al activarlas
+            tab.external_change = True
+            return
+        if self.is_saving(file_path):
+            # Seguramente es nuestro guardado; al terminar se vuelve a comprobar
+            return
+        base = self.tab.disk_snapshot if self.tab.is_modified else None
+        task = ReloadTask(file_path, self.tab.document_model.snapshot(), base)
+        task.tab = self.tab
+        task.signals.finished.connect(lambda: self.on_reload_ready(task))
+        self.tab.reload_task = task
+        QThreadPool.globalInstance().start(task)
+
+    def on_reload_ready(self, task):
+        """Recargar un búfer sin cambios u ofrecer combinar si los tiene"""
+        tab = task.tab
+        if task is not tab.reload_task:
+            return
+        tab.reload_task = None
+        if task.path != tab.path:
+            return
+        if tab is not self.tab or self._loading:
+            tab.external_change = True
+            return
+        name = Path(task.path).name
+        if task.missing:
+            self.tab.is_modified = True
+            self.update_title()
+            self.statusBar().showMessage(f"«{name}» se eliminó del disco", 10000)
+            return
+        if task.error is not None:
+            self.statusBar().showMessage(f"No se pudo leer «{name}»: {task.error}", 10000)
+            return
+        if task.stamp != self.file_watcher.stamp(task.path):
+            # Hubo otra escritura después: llegará su propia notificación
+            return
+        if task.snapshot.revision != self.tab.document_model.revision:
+            # Se editó mientras se comparaba: repetir con el texto actual
+            self.on_file_changed(task.path)
+            return
+
+        start, end, text = task.reload_edit
+        if start == end and not text:
+            # Mismo contenido en disco que en el editor
+            self.set_disk_version(task, clean=True)
+            return
+        if not self.tab.is_modified:
+            self.replace_buffer_range(start, end, text)
+            self.set_disk_version(task, clean=True)
+            self.statusBar().showMessage(f"Recargado: {name} (modificado fuera del editor)", 5000)
+            return
+
+        choice = self.ask_external_change(name, task)
+        if choice == 'merge':
+            self.replace_buffer_range(*task.merge_edit)
+            self.set_disk_version(task, clean=task.merge_clean)
+            if task.conflicts:
+                self.statusBar().showMessage(
+                    f"Cambios combinados con {task.conflicts} conflicto(s) marcados con <<<<<<<", 10000
+                )
+        elif choice == 'reload':
+            self.replace_buffer_range(start, end, text)
+            self.set_disk_version(task, clean=True)
+        else:
+            self.set_disk_version(task, clean=False)
+
+    def ask_external_change(self, name, task):
+        """Preguntar qué hacer con un búfer modificado cuyo archivo cambió en disco"""
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Warning)
+        box.setWindowTitle("Archivo modificado")
+        box.setText(f"«{name}» cambió en disco y el editor tiene cambios sin guardar.")
+        merge_button = None
+        if task.merge_edit is not None:
+            if task.conflicts:
+                detail = (f"Al combinar hay {task.conflicts} conflicto(s), que quedarán "
+                          "marcados en el texto con <<<<<<< y >>>>>>>.")
+            else:
+                detail = "Los cambios del disco y los del editor se pueden combinar sin conflictos."
+            box.setInformativeText(detail)
+            merge_button = box.addButton("Combinar", QMessageBox.ButtonRole.AcceptRole)
+        reload_button = box.addButton("Recargar del disco", QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton("Conservar mis cambios", QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+        clicked = box.clickedButton()
+        if merge_button is not None and clicked is merge_button:
+            return 'merge'
+        if clicked is reload_button:
+            return 'reload'
+        return 'keep'
+
+    def replace_buffer_range(self, start, end, text):
+        """Sustituir una zona del editor en un solo paso de deshacer"""
+        cursor = QTextCursor(self.editor.document())
+        cursor.beginEditBlock()
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        cursor.insertText(text)
+        cursor.endEditBlock()
+
+    def set_disk_version(self, task, clean):
+        """Tomar la versión leída del disco como punto de partida del búfer"""
+        self.set_file_encoding(self.tab, task.reader)
+        self.tab.disk_snapshot = PieceTable(task.theirs).snapshot()
+        self.tab.disk_stamp = task.stamp
+        self.tab.is_modified = not clean
+        self.update_title()
+        # La base del diario (el archivo anterior) ya no es válida
+        self.discard_journal()
+        if self.tab.is_modified and self.journal_dir is not None:
+            snapshot = self.tab.document_model.snapshot()
+            self.start_journal(EditJournal.text_base(self.tab.path, snapshot.revision, snapshot))
+
     def export_to_pdf(self):
         """Exportar a PDF.
-        Intenta primero imprimir el HTML del preview con Qt WebEngine (fiel a la vista),
-        y en caso de fallo recurre al exportador nativo con ReportLab.
+        La exportación se hace en segundo plano: se imprime el documento con Qt
+        WebEngine en una página oculta y, si falla, se recurre al exportador
+        nativo con ReportLab. Varias exportaciones seguidas se encolan.
         """
         file_path, _ = QFileDialog.getSaveFileName(
             self,
@@ -560,188 +1893,30 @@ class MarkdownViewer(QMainWindow):
             return
         if not file_path.lower().endswith('.pdf'):
             file_path += '.pdf'
-
-        # Asegurar que el preview esté actualizado
-        self.update_preview()
-
-        # Intento 1: WebEngine printToPdf (preferido)
-        try:
-            page = self.preview.page()
-            if hasattr(page, 'printToPdf'):
-                page.printToPdf(file_path)
-                QMessageBox.information(self, "Éxito", f"PDF exportado a:\n{file_path}")
-                return
-        except Exception as e:
-            # Si falla, se registrará en la consola y se pasará al método nativo
-            print(f"La exportación con WebEngine falló, usando método nativo: {e}")
-            pass
-
-        # Intento 2: Exportador nativo ReportLab
-        try:
-            self.export_to_pdf_native(file_path)
-            QMessageBox.information(self, "Éxito", f"PDF exportado a:\n{file_path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error al exportar PDF:\n{str(e)}")
-
-    def export_to_pdf_native(self, file_path):
-        """Exportar a PDF usando ReportLab (sin dependencias externas)"""
-        markdown_text = self.editor.toPlainText()
-
-        # Crear documento PDF
-        doc = SimpleDocTemplate(
-            file_path,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=18
-        )
-
-        # Estilos
-        styles = getSampleStyleSheet()
-
-        # Estilos personalizados
-        styles.add(ParagraphStyle(
-            name='CustomHeading1',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=12,
-            spaceBefore=12
-        ))
-
-        styles.add(ParagraphStyle(
-            name='CustomHeading2',
-            parent=styles['Heading2'],
-            fontSize=18,
-            textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=10,
-            spaceBefore=10
-        ))
-
-        styles.add(ParagraphStyle(
-            name='CustomHeading3',
-            parent=styles['Heading3'],
-            fontSize=14,
-            textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=8,
-            spaceBefore=8
-        ))
-
-        styles.add(ParagraphStyle(
-            name='CustomCode',
-            parent=styles['Code'],
-            fontSize=9,
-            fontName='Courier',
-            backgroundColor=colors.HexColor('#f6f8fa'),
-            borderPadding=10,
-            leftIndent=10,
-            rightIndent=10
-        ))
-
-        # Lista de elementos del documento
-        story = []
-
-        # Parsear Markdown manualmente
-        lines = markdown_text.split('\n')
-        i = 0
-        in_code_block = False
-        code_block_lines = []
-
-        while i < len(lines):
-            line = lines[i]
-
-            # Bloques de código
-            if line.strip().startswith('```'):
-                if not in_code_block:
-                    in_code_block = True
-                    code_block_lines = []
-                else:
-                    # Finalizar bloque de código
-                    code_text = '\n'.join(code_block_lines)
-                    story.append(Preformatted(code_text, styles['CustomCode']))
-                    story.append(Spacer(1, 12))
-                    in_code_block = False
-                i += 1
-                continue
-
-            if in_code_block:
-                code_block_lines.append(line)
-                i += 1
-                continue
-
-            # Encabezados
-            if line.startswith('# '):
-                text = line[2:].strip()
-                story.append(Paragraph(text, styles['CustomHeading1']))
-                story.append(Spacer(1, 6))
-            elif line.startswith('## '):
-                text = line[3:].strip()
-                story.append(Paragraph(text, styles['CustomHeading2']))
-                story.append(Spacer(1, 6))
-            elif line.startswith('### '):
-                text = line[4:].strip()
-                story.append(Paragraph(text, styles['CustomHeading3']))
-                story.append(Spacer(1, 6))
-            elif line.startswith('#### '):
-                text = line[5:].strip()
-                story.append(Paragraph(text, styles['Heading4']))
-                story.append(Spacer(1, 6))
-            elif line.startswith('##### '):
-                text = line[6:].strip()
-                story.append(Paragraph(text, styles['Heading5']))
-                story.append(Spacer(1, 6))
-            elif line.startswith('###### '):
-                text = line[7:].strip()
-                story.append(Paragraph(text, styles['Heading6']))
-                story.append(Spacer(1, 6))
-
-            # Listas
-            elif line.strip().startswith('- ') or line.strip().startswith('* '):
-                text = line.strip()[2:]
-                text = f"• {text}"
-                story.append(Paragraph(text, styles['BodyText']))
-            elif re.match(r'^\d+\.\s', line.strip()):
-                text = line.strip()
-                story.append(Paragraph(text, styles['BodyText']))
-
-            # Código inline (convertir backticks a formato)
-            elif '`' in line:
-                # Convertir `código` a formato monoespaciado
-                text = re.sub(r'`([^`]+)`', r'<font name="Courier" color="#c7254e" backColor="#f9f2f4">\1</font>', line)
-                if text.strip():
-                    story.append(Paragraph(text, styles['BodyText']))
-                    story.append(Spacer(1, 6))
-
-            # Negrita y cursiva
-            elif '**' in line or '*' in line:
-                # Convertir **negrita** y *cursiva*
-                text = re.sub(r'\*\*([^\*]+)\*\*', r'<b>\1</b>', line)
-                text = re.sub(r'\*([^\*]+)\*', r'<i>\1</i>', text)
-                if text.strip():
-                    story.append(Paragraph(text, styles['BodyText']))
-                    story.append(Spacer(1, 6))
-
-            # Líneas horizontales
-            elif line.strip() in ['---', '***', '___']:
-                story.append(Spacer(1, 12))
-                from reportlab.platypus import HRFlowable
-                story.append(HRFlowable(width="100%", thickness=1, color=colors.grey))
-                story.append(Spacer(1, 12))
-
-            # Texto normal
-            elif line.strip():
-                story.append(Paragraph(line, styles['BodyText']))
-                story.append(Spacer(1, 6))
-
-            # Líneas vacías
-            else:
-                story.append(Spacer(1, 12))
-
-            i += 1
-
-        # Construir PDF
-        doc.build(story)
+        self.pdf_exports.submit(file_path, self.tab.document_model.snapshot())
+
+    def on_pdf_export_progress(self, path, stage, pending):
+        queued = f" ({pending - 1} en cola)" if pending > 1 else ""
+        self.statusBar().showMessage(f"Exportando PDF {Path(path).name}: {stage}...{queued}")
+        self.pdf_progress.show()
+
+    def on_pdf_export_finished(self, job):
+        if not self.pdf_exports.pending():
+            self.pdf_progress.hide()
+            self.statusBar().clearMessage()
+        if job.error is not None:
+            QMessageBox.critical(self, "Error", f"Error al exportar PDF:\n{job.error}")
+            return
+        message = f"PDF exportado a:\n{job.path}"
+        if job.method == 'native':
+            message += (f"\n\nSe usó el exportador nativo ({job.webengine_error}).\n"
+                        f"{job.timings.meta['pages']} páginas "
+                        f"({job.timings.meta['pages_per_s']:.0f} páginas/s)")
+        if self.pdf_exports.pending():
+            # Sin interrumpir con diálogos mientras quedan exportaciones en cola
+            self.statusBar().showMessage(f"PDF exportado: {Path(job.path).name}", 5000)
+        else:
+            QMessageBox.information(self, "Éxito", message)
 
     def export_to_docx(self):
         """Exportar a DOCX"""
@@ -757,43 +1932,11 @@ class MarkdownViewer(QMainWindow):
                 file_path += '.docx'
 
             try:
-                doc = Document()
-                markdown_text = self.editor.toPlainText()
-
-                # Parsear el Markdown manualmente para DOCX
-                lines = markdown_text.split('\n')
-
-                for line in lines:
-                    # Encabezados
-                    if line.startswith('# '):
-                        p = doc.add_heading(line[2:], level=1)
-                    elif line.startswith('## '):
-                        p = doc.add_heading(line[3:], level=2)
-                    elif line.startswith('### '):
-                        p = doc.add_heading(line[4:], level=3)
-                    elif line.startswith('#### '):
-                        p = doc.add_heading(line[5:], level=4)
-                    elif line.startswith('##### '):
-                        p = doc.add_heading(line[6:], level=5)
-                    elif line.startswith('###### '):
-                        p = doc.add_heading(line[7:], level=6)
-                    # Listas
-                    elif line.strip().startswith('- ') or line.strip().startswith('* '):
-                        doc.add_paragraph(line.strip()[2:], style='List Bullet')
-                    elif re.match(r'^\d+\.\s', line.strip()):
-                        text = re.sub(r'^\d+\.\s', '', line.strip())
-                        doc.add_paragraph(text, style='List Number')
-                    # Bloques de código
-                    elif line.strip().startswith('```'):
-                        continue
-                    # Texto normal
-                    elif line.strip():
-                        doc.add_paragraph(line)
-                    # Líneas vacías
-                    else:
-                        doc.add_paragraph()
-
-                doc.save(file_path)
+                timings = instrumentation.begin('export_to_docx', path=file_path)
+                with timings.stage('extract'):
+                    markdown_text = self.tab.document_model.snapshot().text()
+                exporters.write_docx(markdown_text, file_path, timings)
+                instrumentation.finish(timings)
                 QMessageBox.information(self, "Éxito", f"DOCX exportado a:\n{file_path}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error al exportar DOCX:\n{str(e)}")
@@ -812,9 +1955,11 @@ class MarkdownViewer(QMainWindow):
                 file_path += '.html'
 
             try:
-                html = self.markdown_to_html(self.editor.toPlainText())
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(html)
+                timings = instrumentation.begin('export_to_html', path=file_path)
+                with timings.stage('extract'):
+                    markdown_text = self.tab.document_model.snapshot().text()
+                exporters.write_html(markdown_text, file_path, timings)
+                instrumentation.finish(timings)
                 QMessageBox.information(self, "Éxito", f"HTML exportado a:\n{file_path}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error al exportar HTML:\n{str(e)}")
@@ -910,31 +2055,248 @@ class MarkdownViewer(QMainWindow):
             self.editor.setFont(font)
 
     def setup_auto_save(self):
-        """Configurar guardado automático"""
+        """Configurar guardado automático (en el diario de ediciones)"""
         self.auto_save_timer = QTimer()
         self.auto_save_timer.timeout.connect(self.auto_save)
-        self.auto_save_timer.start(60000)  # Auto-guardar cada 60 segundos
+        self.auto_save_timer.start(JOURNAL_INTERVAL)
 
     def auto_save(self):
-        """Guardar automáticamente si hay archivo y modificaciones"""
-        if self.current_file and self.is_modified:
-            self.save_to_file(self.current_file)
+        """Volcar a los diarios las ediciones recientes; compactarlos si han crecido mucho"""
+        errors = []
+        for tab in self.tabs:
+            journal = tab.journal
+            if journal is None:
+                continue
+            error = journal.take_error()
+            if error:
+                errors.append(error)
+            if journal.size > max(JOURNAL_COMPACT_BYTES, 2 * len(tab.document_model)):
+                # El texto actual pasa a ser la base y se descartan los deltas
+                snapshot = tab.document_model.snapshot()
+                base, records = journal.rebase(
+                    EditJournal.text_base(tab.path, snapshot.revision, snapshot)
+                )
+                self.save_pool.start(lambda journal=journal, base=base, records=records:
+                                     journal.write(base, records))
+            else:
+                records = journal.pending()
+                if records:
+                    self.save_pool.start(lambda journal=journal, records=records: journal.append(records))
+        if errors:
+            self.statusBar().showMessage("; ".join(errors), 10000)
+
+    # ------------------------------------------------------------------
+    # Diario de ediciones
+    # ------------------------------------------------------------------
+
+    def init_journal_dir(self):
+        """Preparar el directorio del diario y bloquearlo para esta sesión"""
+        directory = user_data_dir() / 'journal'
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning("Diario de ediciones desactivado: %s", e)
+            self.statusBar().showMessage(f"Diario de ediciones desactivado: {e}", 10000)
+            return None, None
+        # El bloqueo indica a otras instancias que esta sesión sigue viva
+        lock = QLockFile(str(directory / f'{self.journal_session}.lock'))
+        lock.setStaleLockTime(0)
+        if not lock.tryLock(0):
+            return None, None
+        return directory, lock
+
+    def journal_edit(self, before, position, removed, inserted):
+        """Anotar un delta en el diario del búfer (se crea con la primera edición)"""
+        if self._loading or self._journal_paused or self.journal_dir is None:
+            return
+        if self.tab.journal is None:
+            base = None
+            if self.tab.path and not self.tab.is_modified:
+                # Búfer limpio: basta con referenciar el archivo en disco
+                try:
+                    base = EditJournal.file_base(self.tab.path, before.revision)
+                except OSError:
+                    pass
+            if base is None:
+                base = EditJournal.text_base(self.tab.path, before.revision, before)
+            self.start_journal(base)
+        self.tab.journal.record(self.tab.document_model.revision, position, removed, inserted)
+
+    def start_journal(self, base, tab=None):
+        tab = tab or self.tab
+        self._journal_count += 1
+        path = self.journal_dir / f'{self.journal_session}-{self._journal_count}{JOURNAL_SUFFIX}'
+        journal = tab.journal = EditJournal(path, base)
+        self.save_pool.start(lambda: journal.write(base, []))
+
+    def discard_journal(self, tab=None):
+        tab = tab or self.tab
+        journal, tab.journal = tab.journal, None
+        if journal is not None:
+            self.save_pool.start(journal.discard)
+
+    def rebase_journal(self, task):
+        """Tras guardar, el archivo en disco pasa a ser la base del diario"""
+        tab = task.tab
+        if tab.journal is None or task.path != tab.path:
+            return
+        if not tab.is_modified:
+            self.discard_journal(tab)
+            return
+        try:
+            base = EditJournal.file_base(task.path, task.snapshot.revision)
+        except OSError:
+            return
+        journal = tab.journal
+        base, records = journal.rebase(base)
+        self.save_pool.start(lambda: journal.write(base, records))
+
+    def set_buffer_text(self, text):
+        """Sustituir el texto del búfer sin anotarlo en el diario"""
+        self._journal_paused = True
+        try:
+            self.editor.setPlainText(text)
+        finally:
+            self._journal_paused = False
+        self.discard_journal()
+
+    def orphan_journals(self):
+        """Diarios de sesiones que ya no están en ejecución, del más reciente al más antiguo"""
+        if self.journal_dir is None:
+            return []
+        orphans = []
+        paths = sorted(self.journal_dir.glob('*' + JOURNAL_SUFFIX),
+                       key=lambda p: p.stat().st_mtime, reverse=True)
+        for path in paths:
+            session = path.name.split('-', 1)[0]
+            if session == self.journal_session:
+                continue
+            lock = QLockFile(str(self.journal_dir / f'{session}.lock'))
+            lock.setStaleLockTime(0)
+            if lock.tryLock(0):
+                lock.unlock()
+                orphans.append(path)
+        return orphans
+
+    def recover_journals(self):
+        """Ofrecer recuperar los cambios de una sesión que terminó inesperadamente"""
+        for journal_path in self.orphan_journals():
+            try:
+                recovered = load_journal(journal_path)
+            except (OSError, ValueError, KeyError, JournalError) as e:
+                logger.warning("No se pudo recuperar el diario %s: %s", journal_path, e)
+                QMessageBox.warning(self, "Recuperar cambios",
+                                    f"No se pudieron recuperar los cambios de una sesión anterior:\n{str(e)}")
+                remove_journal(journal_path)
+                continue
+
+            name = Path(recovered.path).name if recovered.path else "Sin título"
+            damaged = "" if recovered.complete else (
+                "El diario está dañado: los últimos cambios no se pueden recuperar.\n"
+            )
+            reply = QMessageBox.question(
+                self,
+                "Recuperar cambios",
+                f"Se encontraron cambios sin guardar de una sesión anterior en «{name}».\n"
+                f"{damaged}¿Desea recuperarlos?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                remove_journal(journal_path)
+                continue
+
+            # Cada búfer recuperado en su pestaña
+            if not (self.tab.is_pristine() and self.tab.loaded):
+                self.activate_tab(self.add_tab(DocumentTab()))
+            self.set_large_file_mode(len(recovered.text) >= LARGE_FILE_THRESHOLD, keep_text=False)
+            self.set_buffer_text(recovered.text)
+            self.tab.path = recovered.path
+            # Se desconoce la versión en disco de la que partían los cambios
+            self.watch_file(recovered.path)
+            self.tab.is_modified = True
+            self.update_title()
+            # El texto recuperado pasa al diario de esta sesión antes de borrar el antiguo
+            snapshot = self.tab.document_model.snapshot()
+            self.start_journal(EditJournal.text_base(recovered.path, snapshot.revision, snapshot))
+            self.save_pool.start(lambda journal_path=journal_path: remove_journal(journal_path))
 
     def closeEvent(self, event):
         """Manejar cierre de ventana"""
-        if self.check_save_changes():
+        if self.pdf_exports.pending():
+            reply = QMessageBox.question(
+                self, "Exportación en curso",
+                "Hay exportaciones a PDF sin terminar. ¿Cerrar de todos modos?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+        if self.check_all_changes():
+            self.pdf_exports.cancel_pending()
+            if self._open_task is not None:
+                self._open_task.cancelled = True
+            if self._index_task is not None:
+                # Lo ya indexado queda guardado; se sigue la próxima vez
+                self._index_task.cancelled = True
+            # No cerrar con un guardado a medias
+            self.wait_for_saves()
+            # Cambios guardados o descartados: los diarios ya no hacen falta
+            for tab in self.tabs:
+                self.discard_journal(tab)
+            self.save_pool.waitForDone()
+            if self.journal_lock is not None:
+                self.journal_lock.unlock()
+            # Cancelar el renderizado en curso antes de destruir la ventana
+            self.revision += 1
+            self.render_pool.clear()
+            self.render_pool.waitForDone()
             event.accept()
         else:
             event.ignore()
 
 
 def main():
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(name)s: %(message)s')
+    # Errores en los argumentos: se muestran en la barra de estado al abrir la ventana
+    startup_errors = []
+
+    # Log de rendimiento: --perf-log [ruta] o variable de entorno MDVIEWER_PERF_LOG
+    if '--perf-log' in sys.argv:
+        index = sys.argv.index('--perf-log')
+        path = sys.argv[index + 1] if index + 1 < len(sys.argv) else None
+        if path and path.startswith('-'):
+            path = None
+        logger.info("Log de rendimiento: %s", instrumentation.enable_log(path))
+    else:
+        instrumentation.enable_log_from_env()
+
+    # Memoria para los renderizados de pestañas ocultas: --tab-budget MB o MDVIEWER_TAB_BUDGET_MB
+    render_budget = None
+    if '--tab-budget' in sys.argv:
+        index = sys.argv.index('--tab-budget')
+        try:
+            render_budget = int(float(sys.argv[index + 1]) * 1024 * 1024)
+        except (IndexError, ValueError):
+            startup_errors.append("--tab-budget necesita un tamaño en MB")
+
     app = QApplication(sys.argv)
     app.setApplicationName("Markdown Viewer & Editor")
 
-    viewer = MarkdownViewer()
+    viewer = MarkdownViewer(render_budget=render_budget)
     viewer.show()
 
+    # Carpeta de trabajo en la que buscar: --workspace DIR
+    if '--workspace' in sys.argv:
+        index = sys.argv.index('--workspace')
+        if index + 1 < len(sys.argv):
+            viewer.set_workspace(sys.argv[index + 1])
+        else:
+            startup_errors.append("--workspace necesita una carpeta")
+    for message in startup_errors:
+        logger.warning(message)
+    if startup_errors:
+        viewer.statusBar().showMessage("; ".join(startup_errors), 10000)
+
     sys.exit(app.exec())
 
 
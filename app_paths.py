@@ -0,0 +1,31 @@
+"""
+Rutas de usuario de MarkdownViewer (caché y datos) según la plataforma
+"""
+
+import os
+import sys
+from pathlib import Path
+
+APP_NAME = "MarkdownViewer"
+
+
+def user_cache_dir():
+    """Directorio de caché del usuario para la aplicación"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local'
+        return Path(base) / APP_NAME / 'Cache'
+    if sys.platform == 'darwin':
+        return Path.home() / 'Library' / 'Caches' / APP_NAME
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / APP_NAME
+
+
+def user_data_dir():
+    """Directorio de datos del usuario para la aplicación"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or Path.home() / 'AppData' / 'Local'
+        return Path(base) / APP_NAME
+    if sys.platform == 'darwin':
+        return Path.home() / 'Library' / 'Application Support' / APP_NAME
+    base = os.environ.get('XDG_DATA_HOME') or Path.home() / '.local' / 'share'
+    return Path(base) / APP_NAME
@@ -0,0 +1,9 @@
+"""
+Benchmarks de MarkdownViewer
+Genera documentos Markdown sintéticos y mide sin ventana las rutas de
+renderizado, exportación y apertura/guardado de archivos.
+
+Uso:
+    python -m benchmarks --sizes 10k,1m --out resultados.json
+    python -m benchmarks --compare base.json resultados.json
+"""
@@ -0,0 +1,129 @@
+"""
+Generador de corpus Markdown sintético para los benchmarks
+"""
+
+import random
+
+# Peso relativo de cada tipo de bloque en el documento generado
+DEFAULT_MIX = {
+    'heading': 1,
+    'paragraph': 6,
+    'table': 1,
+    'code': 2,
+    'list': 2,
+}
+
+MIXES = {
+    'default': DEFAULT_MIX,
+    'prose': {'heading': 1, 'paragraph': 10, 'list': 1},
+    'code': {'heading': 1, 'paragraph': 2, 'code': 6},
+    'tables': {'heading': 1, 'paragraph': 2, 'table': 5},
+}
+
+_WORDS = (
+    "markdown preview render block parser export documento tabla código "
+    "lista servidor cliente proceso memoria archivo índice rendimiento "
+    "configuración usuario sistema latencia página editor sección valor"
+).split()
+
+_CODE_SAMPLES = {
+    'python': "def handler(event, context):\n    items = [x * 2 for x in event['items']]\n    return {'count': len(items)}\n",
+    'bash': "set -euo pipefail\nfor f in *.md; do\n  echo \"procesando $f\"\ndone\n",
+    'json': '{\n  "name": "runbook",\n  "steps": [1, 2, 3],\n  "enabled": true\n}\n',
+    'sql': "SELECT id, name\nFROM users\nWHERE active = 1\nORDER BY name;\n",
+}
+
+
+def parse_size(value):
+    """Convertir '10k', '2m', '50mb' o '1024' a bytes"""
+    value = value.strip().lower().rstrip('b')
+    factor = 1
+    if value.endswith('k'):
+        factor, value = 1024, value[:-1]
+    elif value.endswith('m'):
+        factor, value = 1024 * 1024, value[:-1]
+    return int(float(value) * factor)
+
+
+class CorpusGenerator:
+    """Generador determinista de documentos Markdown con una mezcla de bloques"""
+
+    def __init__(self, mix=None, seed=0):
+        self.mix = dict(mix or DEFAULT_MIX)
+        self.rng = random.Random(seed)
+        self._kinds = list(self.mix)
+        self._weights = [self.mix[k] for k in self._kinds]
+        self._section = 0
+
+    def _words(self, count):
+        return ' '.join(self.rng.choice(_WORDS) for _ in range(count))
+
+    def _inline(self, count):
+        """Frase con marcado inline (negrita, cursiva, código y enlaces)"""
+        parts = []
+        for _ in range(count):
+            roll = self.rng.random()
+            word = self.rng.choice(_WORDS)
+            if roll < 0.08:
+                parts.append(f"**{word}**")
+            elif roll < 0.14:
+                parts.append(f"*{word}*")
+            elif roll < 0.19:
+                parts.append(f"`{word}()`")
+            elif roll < 0.22:
+                parts.append(f"[{word}](https://example.com/{word})")
+            else:
+                parts.append(word)
+        return ' '.join(parts)
+
+    def heading(self):
+        self._section += 1
+        level = self.rng.choice((1, 2, 2, 3, 3, 3, 4))
+        return f"{'#' * level} {self._section}. {self._words(self.rng.randint(2, 6)).capitalize()}"
+
+    def paragraph(self):
+        lines = [self._inline(self.rng.randint(8, 16)) for _ in range(self.rng.randint(1, 4))]
+        return '\n'.join(lines)
+
+    def table(self):
+        cols = self.rng.randint(2, 5)
+        rows = self.rng.randint(2, 8)
+        header = '| ' + ' | '.join(self._words(1).capitalize() for _ in range(cols)) + ' |'
+        sep = '|' + '|'.join('---' for _ in range(cols)) + '|'
+        body = [
+            '| ' + ' | '.join(self._inline(self.rng.randint(1, 3)) for _ in range(cols)) + ' |'
+            for _ in range(rows)
+        ]
+        return '\n'.join([header, sep] + body)
+
+    def code(self):
+        lang = self.rng.choice(list(_CODE_SAMPLES))
+        body = _CODE_SAMPLES[lang] * self.rng.randint(1, 3)
+        return f"```{lang}\n{body}```"
+
+    def list(self):
+        marker_ordered = self.rng.random() < 0.4
+        lines = []
+        for i in range(self.rng.randint(2, 6)):
+            marker = f"{i + 1}." if marker_ordered else '-'
+            lines.append(f"{marker} {self._inline(self.rng.randint(3, 10))}")
+            if self.rng.random() < 0.3:
+                for _ in range(self.rng.randint(1, 3)):
+                    lines.append(f"    - {self._inline(self.rng.randint(2, 6))}")
+        return '\n'.join(lines)
+
+    def generate(self, target_bytes):
+        """Generar un documento de aproximadamente ``target_bytes`` bytes (UTF-8)"""
+        blocks = [f"# Documento sintético ({target_bytes} bytes)"]
+        size = len(blocks[0])
+        while size < target_bytes:
+            kind = self.rng.choices(self._kinds, self._weights)[0]
+            block = getattr(self, kind)()
+            blocks.append(block)
+            size += len(block.encode('utf-8')) + 2
+        return '\n\n'.join(blocks) + '\n'
+
+
+def generate_document(target_bytes, mix=None, seed=0):
+    """Atajo para generar un documento con la mezcla y semilla indicadas"""
+    return CorpusGenerator(mix, seed).generate(target_bytes)
@@ -0,0 +1,192 @@
+"""
+Ejecución de benchmarks sin ventana y comparación de resultados
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+# Permitir ejecutar desde la raíz del repositorio sin instalar nada
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import exporters  # noqa: E402
+from benchmarks.corpus import MIXES, generate_document, parse_size  # noqa: E402
+from file_loader import read_text  # noqa: E402
+from file_saver import write_atomic  # noqa: E402
+from highlight_cache import highlight_cache  # noqa: E402
+from markdown_ir import document_cache  # noqa: E402
+from markdown_render import BlockRenderer, markdown_to_html  # noqa: E402
+from version import __version__  # noqa: E402
+
+
+def _case_markdown_to_html(text, workdir):
+    markdown_to_html(text)
+
+
+def _case_preview_cold(text, workdir):
+    BlockRenderer().render(text)
+
+
+def _case_preview_edit(text, workdir):
+    # Un carácter editado en mitad del documento con el renderizador ya caliente
+    renderer = BlockRenderer()
+    renderer.render(text)
+    middle = len(text) // 2
+    start = time.perf_counter()
+    renderer.render(text[:middle] + 'x' + text[middle:])
+    return time.perf_counter() - start
+
+
+def _case_export_html(text, workdir):
+    exporters.write_html(text, os.path.join(workdir, 'out.html'))
+
+
+def _case_export_pdf_native(text, workdir):
+    exporters.write_pdf_native(text, os.path.join(workdir, 'out.pdf'))
+
+
+def _case_export_docx(text, workdir):
+    exporters.write_docx(text, os.path.join(workdir, 'out.docx'))
+
+
+def _case_export_docx_object_model(text, workdir):
+    # Exportador DOCX anterior (python-docx), como referencia de export_docx
+    exporters.write_docx_object_model(text, os.path.join(workdir, 'out_om.docx'))
+
+
+def _case_export_all(text, workdir):
+    # Los tres formatos comparten un único parseo del documento
+    _case_export_html(text, workdir)
+    _case_export_pdf_native(text, workdir)
+    _case_export_docx(text, workdir)
+
+
+def _case_open(text, workdir):
+    read_text(os.path.join(workdir, 'doc.md'))
+
+
+def _case_save(text, workdir):
+    write_atomic(os.path.join(workdir, 'saved.md'), [text])
+
+
+CASES = {
+    'markdown_to_html': _case_markdown_to_html,
+    'preview_cold': _case_preview_cold,
+    'preview_edit': _case_preview_edit,
+    'export_html': _case_export_html,
+    'export_pdf_native': _case_export_pdf_native,
+    'export_docx': _case_export_docx,
+    'export_docx_object_model': _case_export_docx_object_model,
+    'export_all': _case_export_all,
+    'open': _case_open,
+    'save': _case_save,
+}
+
+DEFAULT_CASES = 'markdown_to_html,preview_cold,preview_edit,export_html,export_pdf_native,export_docx,open,save'
+
+
+def run_case(name, text, workdir, repeat, warm):
+    """Ejecutar un caso ``repeat`` veces y devolver los tiempos en segundos"""
+    func = CASES[name]
+    runs = []
+    for _ in range(repeat):
+        if not warm:
+            highlight_cache.clear()
+            document_cache.clear()
+        start = time.perf_counter()
+        measured = func(text, workdir)
+        elapsed = time.perf_counter() - start
+        # Algunos casos miden sólo una parte (p. ej. la edición tras precalentar)
+        runs.append(measured if measured is not None else elapsed)
+    return runs
+
+
+def run_benchmarks(sizes, cases, mix_name='default', repeat=3, seed=0, warm=False, log=print):
+    """Ejecutar la matriz tamaños × casos y devolver el informe como dict"""
+    report = {
+        'meta': {
+            'version': __version__,
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'mix': mix_name,
+            'repeat': repeat,
+            'seed': seed,
+            'warm_caches': warm,
+        },
+        'results': [],
+    }
+    with tempfile.TemporaryDirectory(prefix='mdviewer-bench-') as workdir:
+        for size in sizes:
+            text = generate_document(size, MIXES[mix_name], seed)
+            with open(os.path.join(workdir, 'doc.md'), 'w', encoding='utf-8') as f:
+                f.write(text)
+            for name in cases:
+                runs = run_case(name, text, workdir, repeat, warm)
+                entry = {
+                    'case': name,
+                    'size': size,
+                    'bytes': len(text.encode('utf-8')),
+                    'lines': text.count('\n') + 1,
+                    'runs_s': runs,
+                    'min_s': min(runs),
+                    'median_s': statistics.median(runs),
+                }
+                report['results'].append(entry)
+                log(f"{name:<20} {size:>12,} B  min {entry['min_s'] * 1000:10.1f} ms"
+                    f"  mediana {entry['median_s'] * 1000:10.1f} ms")
+    return report
+
+
+def compare(base_path, new_path, log=print):
+    """Mostrar la variación de la mediana entre dos informes JSON"""
+    with open(base_path, encoding='utf-8') as f:
+        base = {(r['case'], r['size']): r for r in json.load(f)['results']}
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)['results']
+    for r in new:
+        old = base.get((r['case'], r['size']))
+        if old is None:
+            continue
+        ratio = r['median_s'] / old['median_s'] if old['median_s'] else float('inf')
+        log(f"{r['case']:<20} {r['size']:>12,} B  {old['median_s'] * 1000:10.1f} ms -> "
+            f"{r['median_s'] * 1000:10.1f} ms  ({ratio:.2f}x)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Benchmarks de MarkdownViewer")
+    parser.add_argument('--sizes', default='10k,100k,1m',
+                        help="Tamaños de documento separados por comas (p. ej. 10k,1m,50m)")
+    parser.add_argument('--cases', default=DEFAULT_CASES,
+                        help=f"Casos separados por comas ({', '.join(CASES)})")
+    parser.add_argument('--mix', default='default', choices=sorted(MIXES),
+                        help="Mezcla de bloques del corpus")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones por caso")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla del generador")
+    parser.add_argument('--warm', action='store_true', help="No vaciar las cachés entre repeticiones")
+    parser.add_argument('--out', help="Fichero JSON donde guardar los resultados")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NUEVO'),
+                        help="Comparar dos ficheros de resultados y salir")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    cases = [c.strip() for c in args.cases.split(',') if c.strip()]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        parser.error(f"casos desconocidos: {', '.join(unknown)}")
+    sizes = [parse_size(s) for s in args.sizes.split(',') if s.strip()]
+
+    report = run_benchmarks(sizes, cases, args.mix, args.repeat, args.seed, args.warm)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados guardados en {args.out}")
+    return 0
@@ -64,6 +64,7 @@ a = Analysis(
         'markdown.extensions.extra',
         'docx',
         'reportlab',
+        'cli',
     ],
     hookspath=[],
     hooksconfig={{}},
@@ -0,0 +1,197 @@
+"""
+Exportación por lotes sin ventana
+    python MarkdownViewer.py export --to pdf,docx,html --jobs N [--out-dir DIR] PATRÓN...
+No importa Qt: usa los exportadores nativos (el PDF se genera con ReportLab)
+y reparte los archivos entre procesos. Termina con un resumen de tiempos por
+archivo y código de salida 1 si alguna conversión falló.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Permitir ejecutarlo como ``python cli.py`` desde cualquier directorio
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import exporters  # noqa: E402
+from file_loader import read_text  # noqa: E402
+from instrumentation import Timings, instrumentation  # noqa: E402
+
+WRITERS = {
+    'pdf': exporters.write_pdf_native,
+    'docx': exporters.write_docx,
+    'html': exporters.write_html,
+}
+MARKDOWN_PATTERN = os.path.join('**', '*.md')
+# Archivos más lentos que se listan en el resumen final
+SLOWEST_SHOWN = 10
+
+
+def expand_patterns(patterns):
+    """Archivos que coinciden con los patrones (las carpetas se recorren enteras)"""
+    files = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, MARKDOWN_PATTERN)
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            key = os.path.normcase(os.path.abspath(path))
+            if os.path.isfile(path) and key not in seen:
+                seen.add(key)
+                files.append(path)
+    return files
+
+
+def output_base(source, out_dir, root):
+    """Ruta de salida sin extensión; con ``out_dir`` se conserva la estructura bajo ``root``"""
+    stem = os.path.splitext(source)[0]
+    if out_dir is None:
+        return stem
+    return os.path.join(out_dir, os.path.relpath(os.path.abspath(stem), root))
+
+
+def export_file(source, formats, base):
+    """Convertir un archivo a cada formato (se ejecuta en los procesos de trabajo).
+    Devuelve los tiempos por etapa y, en ``meta['errors']``, los formatos que fallaron.
+    """
+    timings = Timings('cli_export', path=source, formats=formats)
+    errors = {}
+    try:
+        with timings.stage('read'):
+            text = read_text(source)
+        directory = os.path.dirname(base)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    except Exception as e:
+        errors['read'] = str(e)
+        formats = []
+    for fmt in formats:
+        started = time.perf_counter()
+        writer_timings = Timings(fmt)
+        try:
+            WRITERS[fmt](text, f'{base}.{fmt}', writer_timings)
+        except Exception as e:
+            errors[fmt] = str(e)
+        timings.add(fmt, time.perf_counter() - started)
+        if 'pages' in writer_timings.meta:
+            timings.meta['pages'] = writer_timings.meta['pages']
+    timings.meta['errors'] = errors
+    return timings
+
+
+def _format_stages(timings):
+    text = ' · '.join(f"{name} {secs * 1000:.1f}" for name, secs in timings.stages.items())
+    if 'pages' in timings.meta and timings.stages.get('pdf'):
+        text += f" · {timings.meta['pages']} págs, {timings.meta['pages'] / timings.stages['pdf']:.0f} págs/s"
+    return text
+
+
+def print_summary(results, failed, elapsed, jobs, out=print):
+    """Resumen final: totales por formato, archivos más lentos y errores"""
+    totals = {}
+    for timings in results:
+        for name, secs in timings.stages.items():
+            totals[name] = totals.get(name, 0.0) + secs
+    cpu = sum(totals.values())
+    out("")
+    out(f"{len(results)} archivos en {elapsed:.2f} s con {jobs} procesos "
+        f"(tiempo de conversión sumado {cpu:.2f} s, {len(failed)} con errores)")
+    for name, secs in totals.items():
+        out(f"  {name:<6} total {secs:9.2f} s  media {secs / max(1, len(results)) * 1000:9.1f} ms")
+    pages = sum(timings.meta.get('pages', 0) for timings in results)
+    if pages and totals.get('pdf'):
+        out(f"  PDF: {pages} páginas, {pages / totals['pdf']:.0f} páginas/s")
+    slowest = sorted(results, key=lambda t: t.total(), reverse=True)[:SLOWEST_SHOWN]
+    if len(results) > 1:
+        out("Más lentos:")
+        for timings in slowest:
+            out(f"  {timings.total() * 1000:9.1f} ms  {timings.meta['path']}  ({_format_stages(timings)})")
+    if failed:
+        out("Errores:")
+        for timings in failed:
+            for stage, message in timings.meta['errors'].items():
+                out(f"  {timings.meta['path']} [{stage}]: {message}")
+
+
+def run_export(files, formats, jobs, out_dir=None, out=print):
+    """Exportar los archivos repartidos entre ``jobs`` procesos; devuelve el código de salida"""
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files])
+    started = time.perf_counter()
+    results = []
+    failed = []
+
+    def collect(timings):
+        results.append(timings)
+        instrumentation.finish(timings)
+        if timings.meta['errors']:
+            failed.append(timings)
+            out(f"[{len(results)}/{len(files)}] ERROR {timings.meta['path']}: "
+                + '; '.join(f"{stage}: {message}" for stage, message in timings.meta['errors'].items()))
+        else:
+            out(f"[{len(results)}/{len(files)}] {timings.total() * 1000:9.1f} ms  "
+                f"{timings.meta['path']}  ({_format_stages(timings)})")
+
+    if jobs == 1:
+        for source in files:
+            collect(export_file(source, formats, output_base(source, out_dir, root)))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(export_file, source, formats, output_base(source, out_dir, root))
+                       for source in files]
+            try:
+                for future in as_completed(futures):
+                    collect(future.result())
+            except KeyboardInterrupt:
+                executor.shutdown(cancel_futures=True)
+                out("Exportación interrumpida")
+                return 130
+
+    print_summary(results, failed, time.perf_counter() - started, jobs, out)
+    return 1 if failed else 0
+
+
+def parse_formats(value):
+    formats = [f.strip().lower() for f in value.split(',') if f.strip()]
+    unknown = [f for f in formats if f not in WRITERS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(
+            f"formatos no válidos: {', '.join(unknown) or value} (disponibles: {', '.join(WRITERS)})"
+        )
+    # Sin repetir y en el orden indicado
+    return list(dict.fromkeys(formats))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='MarkdownViewer.py', description="MarkdownViewer sin ventana")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help="Exportar archivos Markdown por lotes")
+    export.add_argument('--to', type=parse_formats, default=['pdf'], metavar='FORMATOS',
+                        help=f"Formatos separados por comas ({', '.join(WRITERS)}); el PDF usa ReportLab")
+    export.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="Procesos en paralelo (por defecto, uno por núcleo)")
+    export.add_argument('--out-dir', help="Carpeta de salida (por defecto, junto a cada archivo)")
+    export.add_argument('--perf-log', nargs='?', const='1', metavar='RUTA',
+                        help="Guardar los tiempos en el log JSONL de rendimiento")
+    export.add_argument('patterns', nargs='+', metavar='PATRÓN',
+                        help="Archivos, carpetas o patrones glob (admite **)")
+    args = parser.parse_args(argv)
+
+    if args.perf_log:
+        print(f"Log de rendimiento: {instrumentation.enable_log(args.perf_log)}")
+    else:
+        instrumentation.enable_log_from_env()
+    if args.jobs < 1:
+        parser.error("--jobs debe ser al menos 1")
+    files = expand_patterns(args.patterns)
+    if not files:
+        print("Ningún archivo coincide con los patrones indicados", file=sys.stderr)
+        return 2
+    jobs = min(args.jobs, len(files))
+    return run_export(files, args.to, jobs, args.out_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
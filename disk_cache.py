@@ -0,0 +1,169 @@
+"""
+Caché en disco del HTML renderizado
+Asocia (hash del contenido, extensiones, versión del CSS) con el HTML de cada
+bloque para mostrar al instante el preview de documentos ya vistos.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import zlib
+
+from app_paths import user_cache_dir
+from markdown_render import CSS_VERSION, DEFAULT_EXTENSIONS, RenderResult
+
+# Versión del formato de las entradas; cambiarla invalida la caché
+CACHE_FORMAT = 1
+# Al expulsar se baja hasta esta fracción del límite, para no recorrer el
+# directorio en cada guardado cuando la caché está llena
+EVICT_TARGET = 0.9
+
+logger = logging.getLogger(__name__)
+
+
+def extension_signature(extensions):
+    """Identificador estable de un conjunto de extensiones Markdown"""
+    names = []
+    for ext in extensions:
+        if isinstance(ext, str):
+            names.append(ext)
+        else:
+            names.append(f"{type(ext).__module__}.{type(ext).__qualname__}")
+    return ','.join(names)
+
+
+class RenderCache:
+    """Caché direccionada por contenido con expulsión por tamaño total.
+
+    Cada entrada es un fichero JSON comprimido con las claves, el HTML y las
+    líneas de cada bloque. La fecha de modificación hace de marca LRU. El
+    tamaño total se calcula una vez y después se lleva la cuenta, de modo que
+    sólo se recorre el directorio cuando hay que expulsar entradas.
+    """
+
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024,
+                 extensions=DEFAULT_EXTENSIONS, css_version=CSS_VERSION):
+        self.directory = directory or (user_cache_dir() / 'render')
+        self.max_bytes = max_bytes
+        self._signature = f"{CACHE_FORMAT}|{extension_signature(extensions)}|{css_version}"
+        self._lock = threading.Lock()
+        # Bytes ocupados por la caché (None: aún sin calcular)
+        self._total = None
+
+    def key_hasher(self):
+        """Hash incremental de una clave: alimentarlo con el texto en UTF-8"""
+        h = hashlib.sha256(self._signature.encode('utf-8'))
+        h.update(b'\0')
+        return h
+
+    def make_key(self, text):
+        """Clave de caché de un documento"""
+        h = self.key_hasher()
+        h.update(text.encode('utf-8', 'surrogatepass'))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json.gz')
+
+    def load(self, key):
+        """Devolver el RenderResult cacheado o None"""
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            lines = [tuple(span) for span in data['lines']]
+            result = RenderResult(data['keys'], data['blocks'], lines, 0)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, KeyError, TypeError, zlib.error) as e:
+            # Entrada truncada o de otro formato: se borra para no volver a leerla
+            logger.warning("Entrada de la caché de renderizado dañada %s: %s", path, e)
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def _remove(self, path):
+        """Borrar una entrada y descontarla del tamaño total"""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError as e:
+            logger.warning("No se pudo eliminar %s de la caché: %s", path, e)
+            return
+        with self._lock:
+            if self._total is not None:
+                self._total -= size
+
+    def store(self, key, result):
+        """Guardar un RenderResult de forma atómica y aplicar el límite de tamaño"""
+        path = self._path(key)
+        data = {'keys': result.keys, 'blocks': result.blocks, 'lines': result.lines}
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=1) as f:
+                f.write(json.dumps(data).encode('utf-8'))
+            size = os.path.getsize(tmp_path)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("No se pudo escribir la caché de renderizado %s: %s", path, e)
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan()[1]
+            else:
+                self._total += size - replaced
+            full = self._total > self.max_bytes
+        if full:
+            self.evict()
+
+    def _scan(self):
+        """Entradas ``(mtime, tamaño, ruta)`` y tamaño total del directorio"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        return entries, total
+
+    def evict(self):
+        """Eliminar las entradas menos usadas si se supera ``max_bytes``"""
+        with self._lock:
+            # Recuento exacto: otras instancias pueden compartir el directorio
+            entries, total = self._scan()
+            if total > self.max_bytes:
+                entries.sort()
+                target = self.max_bytes * EVICT_TARGET
+                for _, size, path in entries:
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                        total -= size
+                    except OSError as e:
+                        logger.warning("No se pudo eliminar %s de la caché: %s", path, e)
+            self._total = total
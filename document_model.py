@@ -0,0 +1,205 @@
+"""
+Modelo de documento basado en una tabla de piezas (piece table)
+Se alimenta con los deltas de edición del editor, de modo que cada cambio
+cuesta el tamaño de la edición y no una copia completa del texto. Las
+instantáneas son inmutables y pueden leerse desde otros hilos.
+"""
+
+# Máximo de piezas antes de compactar el documento en un único fragmento
+MAX_PIECES = 1024
+# Piezas pequeñas que se amplían en lugar de partirse al escribir seguido
+SMALL_PIECE = 4096
+
+
+class Snapshot:
+    """Vista inmutable de una revisión del documento.
+
+    Sólo guarda referencias a fragmentos de texto inmutables; el texto se
+    materializa bajo demanda (normalmente en un hilo de trabajo).
+    """
+
+    __slots__ = ('revision', '_pieces', '_length')
+
+    def __init__(self, revision, pieces, length):
+        self.revision = revision
+        self._pieces = pieces
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def text(self):
+        """Texto completo de la revisión"""
+        pieces = self._pieces
+        if len(pieces) == 1:
+            chunk, start, end = pieces[0]
+            if start == 0 and end == len(chunk):
+                return chunk
+        return ''.join(chunk[start:end] for chunk, start, end in pieces)
+
+    def chunks(self):
+        """Iterar el texto por fragmentos (p. ej. para escribirlo a disco)"""
+        for chunk, start, end in self._pieces:
+            if start == 0 and end == len(chunk):
+                yield chunk
+            else:
+                yield chunk[start:end]
+
+    def slice(self, start, end):
+        """Texto entre las posiciones ``start`` y ``end``"""
+        out = []
+        offset = 0
+        for chunk, s, e in self._pieces:
+            length = e - s
+            if offset + length > start and offset < end:
+                a = s + max(0, start - offset)
+                b = s + min(length, end - offset)
+                out.append(chunk[a:b])
+            offset += length
+            if offset >= end:
+                break
+        return ''.join(out)
+
+    def line_count(self):
+        return 1 + sum(chunk.count('\n', s, e) for chunk, s, e in self._pieces)
+
+    def lines(self, start, end=None):
+        """Líneas ``[start, end)`` sin materializar el resto del documento"""
+        if end is None:
+            end = start + 1
+        out = []
+        current = []
+        line = 0
+        for chunk, s, e in self._pieces:
+            if line < start:
+                newlines = chunk.count('\n', s, e)
+                if line + newlines < start:
+                    line += newlines
+                    continue
+                while line < start:
+                    s = chunk.index('\n', s, e) + 1
+                    line += 1
+            while line < end:
+                nl = chunk.find('\n', s, e)
+                if nl == -1:
+                    current.append(chunk[s:e])
+                    break
+                current.append(chunk[s:nl])
+                out.append(''.join(current))
+                current = []
+                line += 1
+                s = nl + 1
+            if line >= end:
+                break
+        if start <= line < end:
+            out.append(''.join(current))
+        return out
+
+
+class PieceTable:
+    """Texto editable como secuencia de piezas ``(fragmento, inicio, fin)``.
+
+    Los fragmentos nunca se modifican, así que las instantáneas tomadas antes
+    de una edición siguen siendo válidas. Los suscriptores reciben cada delta
+    como ``(posición, eliminados, texto_insertado, revisión)``.
+    """
+
+    def __init__(self, text=''):
+        self._pieces = [(text, 0, len(text))] if text else []
+        self._length = len(text)
+        self.revision = 0
+        self._listeners = []
+
+    def __len__(self):
+        return self._length
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def snapshot(self):
+        return Snapshot(self.revision, tuple(self._pieces), self._length)
+
+    def text(self):
+        return self.snapshot().text()
+
+    def set_text(self, text):
+        """Sustituir todo el contenido"""
+        removed = self._length
+        self._pieces = [(text, 0, len(text))] if text else []
+        self._length = len(text)
+        self._changed(0, removed, text)
+
+    def replace(self, position, removed, inserted):
+        """Aplicar un delta: eliminar ``removed`` caracteres e insertar ``inserted``"""
+        if not 0 <= position <= self._length or position + removed > self._length:
+            raise ValueError(f"Delta fuera de rango: {position}+{removed} (longitud {self._length})")
+        if removed:
+            self._delete(position, removed)
+        if inserted:
+            self._insert(position, inserted)
+        if len(self._pieces) > MAX_PIECES:
+            self._compact()
+        self._changed(position, removed, inserted)
+
+    def _changed(self, position, removed, inserted):
+        self.revision += 1
+        for callback in list(self._listeners):
+            callback(position, removed, inserted, self.revision)
+
+    def _locate(self, position):
+        """Índice de la pieza que contiene ``position`` y desplazamiento dentro de ella"""
+        offset = 0
+        for index, (_, s, e) in enumerate(self._pieces):
+            length = e - s
+            if position < offset + length:
+                return index, position - offset
+            offset += length
+        return len(self._pieces), 0
+
+    def _insert(self, position, text):
+        index, offset = self._locate(position)
+        pieces = self._pieces
+
+        # Escritura continua: ampliar la pieza pequeña anterior
+        if offset == 0 and index > 0:
+            chunk, s, e = pieces[index - 1]
+            if e - s < SMALL_PIECE:
+                merged = chunk[s:e] + text
+                pieces[index - 1] = (merged, 0, len(merged))
+                self._length += len(text)
+                return
+
+        new = (text, 0, len(text))
+        if offset == 0:
+            pieces.insert(index, new)
+        else:
+            chunk, s, e = pieces[index]
+            pieces[index:index + 1] = [(chunk, s, s + offset), new, (chunk, s + offset, e)]
+        self._length += len(text)
+
+    def _delete(self, position, count):
+        index, offset = self._locate(position)
+        pieces = self._pieces
+        remaining = count
+        new = []
+        if offset:
+            chunk, s, e = pieces[index]
+            new.append((chunk, s, s + offset))
+        end_index = index
+        cut = offset
+        while remaining and end_index < len(pieces):
+            chunk, s, e = pieces[end_index]
+            available = e - s - cut
+            if remaining < available:
+                new.append((chunk, s + cut + remaining, e))
+                remaining = 0
+            else:
+                remaining -= available
+            end_index += 1
+            cut = 0
+        pieces[index:end_index] = new
+        self._length -= count
+
+    def _compact(self):
+        text = self.text()
+        self._pieces = [(text, 0, len(text))] if text else []
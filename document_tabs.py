@@ -0,0 +1,104 @@
+"""
+Estado de los documentos abiertos en pestañas
+Todas las pestañas comparten un único editor y un único preview: cada una
+guarda su texto (modelo de piezas e índice de encabezados), el último
+renderizado y el estado del archivo. Los renderizados de las pestañas
+ocultas se expulsan por orden LRU cuando superan el presupuesto de memoria.
+"""
+
+import logging
+import os
+from pathlib import Path
+
+from document_model import PieceTable
+from heading_index import HeadingIndex
+
+# Presupuesto (bytes) para los renderizados de las pestañas ocultas
+DEFAULT_RENDER_BUDGET = 64 * 1024 * 1024
+# Variable de entorno para cambiarlo, en MB
+RENDER_BUDGET_ENV = 'MDVIEWER_TAB_BUDGET_MB'
+
+logger = logging.getLogger(__name__)
+
+
+def render_budget_from_env(default=DEFAULT_RENDER_BUDGET):
+    """Presupuesto indicado en ``MDVIEWER_TAB_BUDGET_MB`` o el predeterminado"""
+    value = os.environ.get(RENDER_BUDGET_ENV)
+    if not value:
+        return default
+    try:
+        return max(0, int(float(value) * 1024 * 1024))
+    except ValueError:
+        logger.warning("Valor no válido en %s: %s", RENDER_BUDGET_ENV, value)
+        return default
+
+
+def render_size(result):
+    """Memoria aproximada (bytes) de un RenderResult"""
+    return (sum(map(len, result.blocks)) + sum(map(len, result.keys))
+            + 64 * len(result.blocks))
+
+
+class DocumentTab:
+    """Un documento abierto. Sólo la pestaña activa tiene el texto en el editor."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.is_modified = False
+        # Las pestañas con archivo se leen la primera vez que se activan
+        self.loaded = path is None
+        self.large_file_mode = False
+        # Formato del archivo en disco, para guardarlo como se leyó
+        self.encoding = 'utf-8'
+        self.bom = b''
+        # Al leerlo se sustituyeron bytes no válidos por U+FFFD
+        self.replaced_bytes = False
+        self.document_model = PieceTable()
+        self.heading_index = HeadingIndex()
+        # Último renderizado y revisión del modelo de la que procede (None si no está al día)
+        self.last_render = None
+        self.render_revision = None
+        self.render_bytes = 0
+        # (revisión, clave) del renderizado guardado en la caché en disco al expulsarlo
+        self.render_key = None
+        self.last_used = 0
+        self.cursor_position = 0
+        self.scroll_value = 0
+        # Línea a mostrar al terminar de leer el archivo (p. ej. un resultado de búsqueda)
+        self.pending_line = None
+        # Diario de ediciones y cambios externos
+        self.journal = None
+        self.watched_path = None
+        self.disk_snapshot = None
+        self.disk_stamp = None
+        self.reload_task = None
+        self.external_change = False
+
+    def display_name(self):
+        return Path(self.path).name if self.path else "Sin título"
+
+    def is_pristine(self):
+        """Pestaña sin archivo ni texto, que se puede reutilizar"""
+        return self.path is None and not self.is_modified and not len(self.document_model)
+
+    def set_render(self, result, revision):
+        self.last_render = result
+        self.render_revision = revision
+        self.render_bytes = render_size(result) if result is not None else 0
+
+    def drop_render(self):
+        self.set_render(None, None)
+
+
+def renders_to_evict(tabs, active, budget):
+    """Pestañas ocultas cuyos renderizados hay que liberar, de la menos usada a la más"""
+    hidden = sorted((tab for tab in tabs if tab is not active and tab.last_render is not None),
+                    key=lambda tab: tab.last_used)
+    total = sum(tab.render_bytes for tab in hidden)
+    evicted = []
+    for tab in hidden:
+        if total <= budget:
+            break
+        evicted.append(tab)
+        total -= tab.render_bytes
+    return evicted
@@ -0,0 +1,186 @@
+"""
+Escritura rápida de DOCX
+Genera word/document.xml como texto directamente a partir de los bloques
+del documento (markdown_ir) y lo escribe por lotes dentro del ZIP. El resto
+de partes (estilos, numeración, tema...) se copian tal cual de la plantilla
+de python-docx, de modo que el resultado usa los mismos estilos que el
+exportador basado en su modelo de objetos, sin crear un objeto por párrafo.
+"""
+
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+import docx
+
+import markdown_ir as ir
+from markdown_ir import BOLD, ITALIC, CODE, STRIKE, SUPERSCRIPT
+
+# Plantilla por defecto de python-docx (la misma que usa Document())
+TEMPLATE_PATH = os.path.join(os.path.dirname(docx.__file__), 'templates', 'default.docx')
+DOCUMENT_PART = 'word/document.xml'
+# Párrafos que se acumulan antes de comprimirlos en el ZIP
+BATCH_BLOCKS = 2000
+# Ancho del texto en la página de la plantilla (twips): carta menos márgenes
+TEXT_WIDTH = 8640
+CODE_FONT = 'Courier New'
+LINK_COLOR = '0366D6'
+# Alineación de párrafo (w:jc) de las columnas de tabla
+CELL_ALIGNS = {'left': 'left', 'center': 'center', 'right': 'right'}
+
+# Caracteres no admitidos en XML 1.0
+_INVALID_XML_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_BREAK = '</w:t><w:br/><w:t xml:space="preserve">'
+_TAB = '</w:t><w:tab/><w:t xml:space="preserve">'
+_RULE = ('<w:p><w:pPr><w:pBdr><w:bottom w:val="single" w:sz="6" w:space="1" w:color="auto"/>'
+         '</w:pBdr></w:pPr></w:p>')
+_TABLE_PROPERTIES = (
+    '<w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:type="auto" w:w="0"/>'
+    '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+    'w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+)
+
+# Inicio y final de document.xml de la plantilla (sin cuerpo)
+_template_parts = None
+
+
+def _template():
+    global _template_parts
+    if _template_parts is None:
+        with zipfile.ZipFile(TEMPLATE_PATH) as template:
+            xml = template.read(DOCUMENT_PART).decode('utf-8')
+        body = xml.index('<w:body>') + len('<w:body>')
+        _template_parts = (xml[:body], xml[xml.index('<w:sectPr', body):])
+    return _template_parts
+
+
+def _rpr(style, link):
+    """Propiedades de un fragmento, en el orden que exige el esquema de WordprocessingML"""
+    parts = []
+    if style & CODE:
+        parts.append(f'<w:rFonts w:ascii="{CODE_FONT}" w:hAnsi="{CODE_FONT}"/>')
+    if style & BOLD:
+        parts.append('<w:b/>')
+    if style & ITALIC:
+        parts.append('<w:i/>')
+    if style & STRIKE:
+        parts.append('<w:strike/>')
+    if link:
+        parts.append(f'<w:color w:val="{LINK_COLOR}"/><w:u w:val="single"/>')
+    if style & SUPERSCRIPT:
+        parts.append('<w:vertAlign w:val="superscript"/>')
+    return f"<w:rPr>{''.join(parts)}</w:rPr>" if parts else ''
+
+
+# Propiedades de todas las combinaciones de estilo, con y sin enlace: tabla fija
+# de sólo lectura que pueden compartir los hilos de exportación
+_STYLES = BOLD | ITALIC | CODE | STRIKE | SUPERSCRIPT
+_RUN_PROPERTIES = {(style, link): _rpr(style, link)
+                   for style in range(_STYLES + 1) for link in (False, True)}
+
+
+def _text(text):
+    text = escape(_INVALID_XML_RE.sub('', text))
+    if '\n' in text:
+        text = text.replace('\n', _BREAK)
+    if '\t' in text:
+        text = text.replace('\t', _TAB)
+    return f'<w:t xml:space="preserve">{text}</w:t>'
+
+
+def runs_xml(runs, extra_style=0):
+    """XML de una lista de fragmentos con estilo"""
+    parts = []
+    for run in runs:
+        if run.text == '\n':
+            parts.append('<w:r><w:br/></w:r>')
+        else:
+            rpr = _RUN_PROPERTIES[(run.style | extra_style) & _STYLES, bool(run.href)]
+            parts.append(f'<w:r>{rpr}{_text(run.text)}</w:r>')
+    return ''.join(parts)
+
+
+def paragraph_xml(content, style=None, align=None):
+    properties = ''
+    if style is not None:
+        properties += f'<w:pStyle w:val="{style}"/>'
+    if align is not None:
+        properties += f'<w:jc w:val="{align}"/>'
+    if not properties:
+        return f'<w:p>{content}</w:p>'
+    return f'<w:p><w:pPr>{properties}</w:pPr>{content}</w:p>'
+
+
+def table_xml(block):
+    columns = ir.table_columns(block)
+    if not columns:
+        # Una tabla sin celdas no se exporta
+        return ''
+    width = TEXT_WIDTH // columns
+    aligns = [CELL_ALIGNS.get(align) for align in ir.column_aligns(block, columns)]
+    cell_properties = f'<w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>'
+    parts = ['<w:tbl>', _TABLE_PROPERTIES, '<w:tblGrid>',
+             f'<w:gridCol w:w="{width}"/>' * columns, '</w:tblGrid>']
+    rows = [(block.header, BOLD)] if block.header else []
+    rows.extend((row, 0) for row in block.rows)
+    for cells, style in rows:
+        parts.append('<w:tr>')
+        for index in range(columns):
+            content = runs_xml(cells[index], style) if index < len(cells) else ''
+            parts.append(f'<w:tc>{cell_properties}{paragraph_xml(content, align=aligns[index])}</w:tc>')
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    return ''.join(parts)
+
+
+def blocks_xml(blocks, style=None, depth=0):
+    """Generar el XML de los bloques (un párrafo o tabla cada vez)"""
+    for block in blocks:
+        kind = type(block)
+        if kind is ir.Heading:
+            yield paragraph_xml(runs_xml(block.runs), f'Heading{block.level}')
+        elif kind is ir.Paragraph:
+            yield paragraph_xml(runs_xml(block.runs), style)
+        elif kind is ir.CodeBlock:
+            yield paragraph_xml(runs_xml((ir.Run(block.text, CODE, None),)))
+        elif kind is ir.ListBlock:
+            # La plantilla tiene estilos de lista hasta el nivel 3
+            suffix = str(min(depth + 1, 3)) if depth else ''
+            list_style = ('ListNumber' if block.ordered else 'ListBullet') + suffix
+            for item in block.items:
+                for index, child in enumerate(item):
+                    if type(child) is ir.Paragraph:
+                        yield paragraph_xml(runs_xml(child.runs),
+                                            list_style if index == 0 else 'ListContinue' + suffix)
+                    else:
+                        yield from blocks_xml([child], style, depth + 1)
+        elif kind is ir.Quote:
+            yield from blocks_xml(block.blocks, 'Quote', depth)
+        elif kind is ir.Table:
+            xml = table_xml(block)
+            if xml:
+                yield xml
+        elif kind is ir.Rule:
+            yield _RULE
+
+
+def write_blocks(blocks, file_path):
+    """Escribir un DOCX con los bloques a partir de la plantilla"""
+    head, tail = _template()
+    with zipfile.ZipFile(TEMPLATE_PATH) as template, \
+            zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as out:
+        for item in template.infolist():
+            if item.filename != DOCUMENT_PART:
+                out.writestr(item, template.read(item))
+                continue
+            with out.open(DOCUMENT_PART, 'w') as f:
+                f.write(head.encode('utf-8'))
+                batch = []
+                for xml in blocks_xml(blocks):
+                    batch.append(xml)
+                    if len(batch) >= BATCH_BLOCKS:
+                        f.write(''.join(batch).encode('utf-8'))
+                        batch.clear()
+                batch.append(tail)
+                f.write(''.join(batch).encode('utf-8'))
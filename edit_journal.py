@@ -0,0 +1,183 @@
+"""
+Diario de ediciones para recuperación tras un cierre inesperado
+Cada búfer con cambios sin guardar tiene un fichero JSONL en el directorio de
+datos: una línea base (el texto, o una referencia al archivo en disco si el
+búfer estaba limpio) seguida de los deltas de edición. Escribir un delta
+cuesta lo que ocupa la edición, no el documento entero.
+
+El estado del diario se modifica en el hilo de la interfaz; los métodos de
+E/S (write, append, discard) están pensados para un único hilo de trabajo.
+Sus errores se registran con logging y quedan en ``error`` para que la
+interfaz los muestre.
+"""
+
+import json
+import logging
+import os
+
+from document_model import PieceTable
+from file_loader import file_stamp, read_text
+from file_saver import write_atomic
+
+JOURNAL_FORMAT = 1
+JOURNAL_SUFFIX = '.journal'
+
+logger = logging.getLogger(__name__)
+
+
+class JournalError(Exception):
+    """El diario no se puede reproducir (p. ej. el archivo base cambió)"""
+
+
+class RecoveredBuffer:
+    """Texto reconstruido a partir de un diario"""
+
+    def __init__(self, journal_path, path, text, edits, complete=True):
+        self.journal_path = journal_path
+        self.path = path          # archivo del búfer, o None si no tenía nombre
+        self.text = text
+        self.edits = edits        # deltas aplicados sobre la base
+        self.complete = complete  # False si se descartaron deltas dañados
+
+
+class EditJournal:
+    """Diario de un búfer: base más deltas ``{r: revisión, p: posición,
+    d: eliminados, i: insertado}``.
+    """
+
+    def __init__(self, path, base):
+        self.path = path
+        self.base = base
+        self.records = []
+        self.size = 0
+        self._flushed = 0
+        self.error = None         # último error de E/S sin mostrar
+
+    @staticmethod
+    def file_base(path, revision):
+        """Base que referencia el archivo en disco (búfer sin cambios)"""
+        return {'revision': revision, 'path': path, 'file': file_stamp(path)}
+
+    @staticmethod
+    def text_base(path, revision, snapshot):
+        """Base con el texto completo (se materializa al escribirla)"""
+        return {'revision': revision, 'path': path, 'snapshot': snapshot}
+
+    def record(self, revision, position, removed, inserted):
+        self.records.append({'r': revision, 'p': position, 'd': removed, 'i': inserted})
+        self.size += len(inserted) + 32
+
+    def pending(self):
+        """Deltas aún no escritos; quedan marcados como escritos"""
+        chunk = self.records[self._flushed:]
+        self._flushed = len(self.records)
+        return chunk
+
+    def rebase(self, base):
+        """Sustituir la base conservando sólo los deltas posteriores a ella"""
+        self.base = base
+        self.records = [r for r in self.records if r['r'] > base['revision']]
+        self._flushed = len(self.records)
+        self.size = sum(len(r['i']) + 32 for r in self.records)
+        return base, list(self.records)
+
+    def take_error(self):
+        """Último error de escritura (y olvidarlo), o None"""
+        error, self.error = self.error, None
+        return error
+
+    # ------------------------------------------------------------------
+    # E/S (hilo de trabajo)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _base_line(base):
+        header = {'format': JOURNAL_FORMAT, 'revision': base['revision'], 'path': base['path']}
+        if 'snapshot' in base:
+            header['text'] = base['snapshot'].text()
+        else:
+            header['file'] = base['file']
+        return json.dumps(header, ensure_ascii=False) + '\n'
+
+    def write(self, base, records):
+        """Reescribir el diario completo (creación y compactación)"""
+        try:
+            lines = [self._base_line(base)]
+            lines.extend(json.dumps(r, ensure_ascii=False) + '\n' for r in records)
+            write_atomic(self.path, lines)
+        except Exception as e:
+            self._failed("Error al escribir el diario", e)
+
+    def append(self, records):
+        """Añadir deltas al final del diario"""
+        if not records:
+            return
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(r, ensure_ascii=False) + '\n' for r in records)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            self._failed("Error al escribir el diario", e)
+
+    def discard(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self._failed("Error al borrar el diario", e)
+
+    def _failed(self, message, error):
+        logger.error("%s %s: %s", message, self.path, error)
+        self.error = f"{message}: {error}"
+
+
+def remove_journal(journal_path):
+    """Borrar el diario de otra sesión (puede que otra instancia ya lo haya hecho)"""
+    try:
+        os.unlink(journal_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("No se pudo borrar el diario %s: %s", journal_path, e)
+
+
+def load_journal(journal_path):
+    """Reconstruir el texto de un búfer a partir de su diario"""
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            raise JournalError("Diario sin cabecera válida")
+        if header.get('format') != JOURNAL_FORMAT:
+            raise JournalError(f"Formato de diario no soportado: {header.get('format')}")
+
+        path = header.get('path')
+        if 'text' in header:
+            text = header['text']
+        else:
+            if file_stamp(path) != header['file']:
+                raise JournalError(f"El archivo cambió desde la sesión anterior: {path}")
+            text = read_text(path)
+
+        table = PieceTable(text)
+        edits = 0
+        complete = True
+        for line in f:
+            try:
+                r = json.loads(line)
+            except ValueError:
+                # La última línea puede estar cortada por el cierre inesperado
+                if f.readline():
+                    logger.warning("Diario %s dañado tras %d deltas", journal_path, edits)
+                    complete = False
+                break
+            try:
+                table.replace(r['p'], r['d'], r['i'])
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning("Delta %d no válido en el diario %s: %s", edits + 1, journal_path, e)
+                complete = False
+                break
+            edits += 1
+    return RecoveredBuffer(journal_path, path, table.text(), edits, complete)
@@ -0,0 +1,84 @@
+"""
+Widgets de edición de MarkdownViewer
+Editor de texto plano orientado a bloques con números de línea, usado en el
+modo de archivos grandes.
+"""
+
+from PyQt6.QtWidgets import QWidget, QPlainTextEdit
+from PyQt6.QtCore import Qt, QRect, QSize
+from PyQt6.QtGui import QColor, QPainter
+
+
+class LineNumberArea(QWidget):
+    """Margen izquierdo donde el editor pinta los números de línea"""
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+
+    def sizeHint(self):
+        return QSize(self.editor.line_number_area_width(), 0)
+
+    def paintEvent(self, event):
+        self.editor.paint_line_numbers(event)
+
+
+class CodeEditor(QPlainTextEdit):
+    """Editor de texto plano con números de línea.
+
+    QPlainTextEdit maqueta por bloques (líneas) y sólo calcula las
+    visibles, por lo que se mantiene fluido con cientos de miles de líneas.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.line_number_area = LineNumberArea(self)
+        self.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.blockCountChanged.connect(self.update_line_number_area_width)
+        self.updateRequest.connect(self.update_line_number_area)
+        self.update_line_number_area_width(0)
+
+    def line_number_area_width(self):
+        """Ancho del margen según el número de dígitos de la última línea"""
+        digits = len(str(max(1, self.blockCount())))
+        return 10 + self.fontMetrics().horizontalAdvance('9') * digits
+
+    def update_line_number_area_width(self, _count):
+        self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
+
+    def update_line_number_area(self, rect, dy):
+        """Desplazar o repintar el margen junto con el área de texto"""
+        if dy:
+            self.line_number_area.scroll(0, dy)
+        else:
+            self.line_number_area.update(0, rect.y(), self.line_number_area.width(), rect.height())
+        if rect.contains(self.viewport().rect()):
+            self.update_line_number_area_width(0)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        cr = self.contentsRect()
+        self.line_number_area.setGeometry(
+            QRect(cr.left(), cr.top(), self.line_number_area_width(), cr.height())
+        )
+
+    def paint_line_numbers(self, event):
+        """Pintar sólo los números de las líneas visibles"""
+        painter = QPainter(self.line_number_area)
+        painter.fillRect(event.rect(), QColor('#f6f8fa'))
+        painter.setPen(QColor('#6a737d'))
+
+        block = self.firstVisibleBlock()
+        number = block.blockNumber()
+        top = round(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
+        bottom = top + round(self.blockBoundingRect(block).height())
+        width = self.line_number_area.width() - 5
+        height = self.fontMetrics().height()
+
+        while block.isValid() and top <= event.rect().bottom():
+            if block.isVisible() and bottom >= event.rect().top():
+                painter.drawText(0, top, width, height, Qt.AlignmentFlag.AlignRight, str(number + 1))
+            block = block.next()
+            top = bottom
+            bottom = top + round(self.blockBoundingRect(block).height())
+            number += 1
@@ -0,0 +1,427 @@
+"""
+Exportadores de MarkdownViewer (PDF nativo, DOCX y HTML)
+No dependen de Qt, de modo que pueden usarse sin ventana (benchmarks, línea
+de comandos) además de desde el editor.
+"""
+
+from collections import deque
+from xml.sax.saxutils import escape, quoteattr
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import RGBColor
+
+# ReportLab para exportación PDF nativa
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, Preformatted, HRFlowable, Table, TableStyle
+)
+from reportlab.lib import colors
+
+import docx_writer
+import markdown_ir as ir
+from instrumentation import Timings
+from markdown_ir import BOLD, ITALIC, CODE, STRIKE, SUPERSCRIPT, document_cache
+from markdown_render import build_html_document
+
+# Estilos de ReportLab de cada nivel de encabezado
+PDF_HEADING_STYLES = {
+    1: 'CustomHeading1', 2: 'CustomHeading2', 3: 'CustomHeading3',
+    4: 'Heading4', 5: 'Heading5', 6: 'Heading6',
+}
+# Niveles de sangría de listas con estilo propio (los más profundos usan el último)
+LIST_DEPTHS = 4
+LINK_COLOR = '#0366d6'
+# Alineaciones de columna de tabla con estilo propio en el PDF ('left' usa el base)
+PDF_CELL_ALIGNS = {'center': TA_CENTER, 'right': TA_RIGHT}
+DOCX_CELL_ALIGNS = {
+    'left': WD_ALIGN_PARAGRAPH.LEFT,
+    'center': WD_ALIGN_PARAGRAPH.CENTER,
+    'right': WD_ALIGN_PARAGRAPH.RIGHT,
+}
+
+
+# --------------------------------------------------------------------------
+# PDF (ReportLab)
+# --------------------------------------------------------------------------
+
+def _pdf_styles():
+    """Hoja de estilos del PDF (se crea una vez, al importar el módulo)"""
+    styles = getSampleStyleSheet()
+
+    # Estilos personalizados
+    styles.add(ParagraphStyle(
+        name='CustomHeading1',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=12,
+        spaceBefore=12
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CustomHeading2',
+        parent=styles['Heading2'],
+        fontSize=18,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=10,
+        spaceBefore=10
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CustomHeading3',
+        parent=styles['Heading3'],
+        fontSize=14,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=8,
+        spaceBefore=8
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CustomCode',
+        parent=styles['Code'],
+        fontSize=9,
+        fontName='Courier',
+        backgroundColor=colors.HexColor('#f6f8fa'),
+        borderPadding=10,
+        leftIndent=10,
+        rightIndent=10
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CustomQuote',
+        parent=styles['BodyText'],
+        leftIndent=18,
+        textColor=colors.HexColor('#6a737d')
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CustomTableHeader',
+        parent=styles['BodyText'],
+        fontName='Helvetica-Bold'
+    ))
+
+    # Celdas de tabla alineadas: CustomTableHeader-center, BodyText-right...
+    for name in ('BodyText', 'CustomTableHeader'):
+        for align, alignment in PDF_CELL_ALIGNS.items():
+            styles.add(ParagraphStyle(name=f'{name}-{align}', parent=styles[name], alignment=alignment))
+
+    for depth in range(1, LIST_DEPTHS + 1):
+        styles.add(ParagraphStyle(
+            name=f'CustomList{depth}',
+            parent=styles['BodyText'],
+            leftIndent=18 * depth,
+            bulletIndent=18 * depth - 12
+        ))
+    return styles
+
+
+PDF_STYLES = _pdf_styles()
+
+
+def pdf_markup(runs):
+    """Marcado de párrafo de ReportLab de una lista de fragmentos"""
+    parts = []
+    for run in runs:
+        if run.text == '\n':
+            parts.append('<br/>')
+            continue
+        text = escape(run.text)
+        if run.style & CODE:
+            text = f'<font name="Courier" color="#c7254e" backColor="#f9f2f4">{text}</font>'
+        if run.style & BOLD:
+            text = f'<b>{text}</b>'
+        if run.style & ITALIC:
+            text = f'<i>{text}</i>'
+        if run.style & STRIKE:
+            text = f'<strike>{text}</strike>'
+        if run.style & SUPERSCRIPT:
+            text = f'<super>{text}</super>'
+        # Los enlaces internos (#ancla) no tienen destino en el PDF
+        if run.href and not run.href.startswith('#'):
+            text = f'<a href={quoteattr(run.href)} color="{LINK_COLOR}">{text}</a>'
+        parts.append(text)
+    return ''.join(parts)
+
+
+def _pdf_cell_styles(name, aligns):
+    styles = PDF_STYLES
+    return [styles[f'{name}-{align}'] if align in PDF_CELL_ALIGNS else styles[name] for align in aligns]
+
+
+def _pdf_table(block, width, columns):
+    aligns = ir.column_aligns(block, columns)
+    data = []
+    if block.header:
+        header_styles = _pdf_cell_styles('CustomTableHeader', aligns)
+        cells = [Paragraph(pdf_markup(cell), style) for cell, style in zip(block.header, header_styles)]
+        data.append(cells + [''] * (columns - len(cells)))
+    body_styles = _pdf_cell_styles('BodyText', aligns)
+    for row in block.rows:
+        cells = [Paragraph(pdf_markup(cell), style) for cell, style in zip(row, body_styles)]
+        data.append(cells + [''] * (columns - len(cells)))
+    table = Table(data, colWidths=[width / columns] * columns, repeatRows=1 if block.header else 0)
+    commands = [
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#dfe2e5')),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]
+    if block.header:
+        commands.append(('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f6f8fa')))
+    table.setStyle(TableStyle(commands))
+    return table
+
+
+def pdf_flowables(blocks, width, body='BodyText', depth=0):
+    """Generar los elementos de ReportLab de los bloques, a medida que se piden"""
+    styles = PDF_STYLES
+    for block in blocks:
+        kind = type(block)
+        if kind is ir.Heading:
+            yield Paragraph(pdf_markup(block.runs), styles[PDF_HEADING_STYLES[block.level]])
+            yield Spacer(1, 6)
+        elif kind is ir.Paragraph:
+            yield Paragraph(pdf_markup(block.runs), styles[body])
+            yield Spacer(1, 6)
+        elif kind is ir.CodeBlock:
+            yield Preformatted(block.text, styles['CustomCode'])
+            yield Spacer(1, 12)
+        elif kind is ir.ListBlock:
+            style = styles[f'CustomList{min(depth + 1, LIST_DEPTHS)}']
+            for number, item in enumerate(block.items, block.start):
+                bullet = f'{number}.' if block.ordered else '•'
+                for index, child in enumerate(item):
+                    if type(child) is ir.Paragraph:
+                        yield Paragraph(pdf_markup(child.runs), style,
+                                        bulletText=bullet if index == 0 else None)
+                    else:
+                        yield from pdf_flowables([child], width, body, depth + 1)
+            yield Spacer(1, 6)
+        elif kind is ir.Quote:
+            yield from pdf_flowables(block.blocks, width, 'CustomQuote', depth)
+        elif kind is ir.Table:
+            # Una tabla sin celdas no se exporta
+            columns = ir.table_columns(block)
+            if columns:
+                yield _pdf_table(block, width, columns)
+                yield Spacer(1, 12)
+        elif kind is ir.Rule:
+            yield Spacer(1, 12)
+            yield HRFlowable(width="100%", thickness=1, color=colors.grey)
+            yield Spacer(1, 12)
+
+
+class FlowableStream:
+    """Lista de elementos para ``doc.build`` que se llena desde un generador.
+
+    ReportLab consume la lista por delante (``del flowables[0]``) y devuelve
+    a ella los trozos de lo que parte entre páginas; aquí sólo se guardan
+    los pocos elementos pedidos por adelantado, de modo que los párrafos se
+    crean justo antes de maquetarse y se liberan al dibujarse.
+    """
+
+    # Elementos que se ven por delante (encadenado de keepWithNext)
+    LOOKAHEAD = 8
+
+    def __init__(self, flowables):
+        self._source = iter(flowables)
+        self._buffer = deque()
+        self.produced = 0
+
+    def _fill(self, count):
+        while len(self._buffer) < count and self._source is not None:
+            try:
+                self._buffer.append(next(self._source))
+                self.produced += 1
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill(self.LOOKAHEAD)
+        return len(self._buffer)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            self._fill(index.stop if index.stop is not None else self.LOOKAHEAD)
+            return list(self._buffer)[index]
+        self._fill(index + 1)
+        return self._buffer[index]
+
+    def __setitem__(self, index, values):
+        # Sólo ``flowables[0:0] = S``: devolver elementos al principio
+        if index != slice(0, 0):
+            raise TypeError("FlowableStream sólo admite insertar al principio")
+        self._buffer.extendleft(reversed(list(values)))
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            self._fill(index.stop)
+            for _ in range(len(range(*index.indices(len(self._buffer))))):
+                self._buffer.popleft()
+        elif index == 0:
+            self._fill(1)
+            self._buffer.popleft()
+        else:
+            raise TypeError("FlowableStream sólo admite borrar por delante")
+
+    def insert(self, index, flowable):
+        if index != 0:
+            raise TypeError("FlowableStream sólo admite insertar al principio")
+        self._buffer.appendleft(flowable)
+
+
+def write_pdf_native(markdown_text, file_path, timings=None):
+    """Exportar a PDF usando ReportLab (sin dependencias externas).
+
+    Los elementos se generan durante la maquetación y las páginas terminadas
+    se guardan comprimidas, de modo que la memoria no crece con los párrafos.
+    Deja en ``timings.meta`` las páginas y páginas por segundo.
+    """
+    if timings is None:
+        timings = Timings('write_pdf_native')
+    document = document_cache.get(markdown_text, timings)
+
+    # Crear documento PDF
+    doc = SimpleDocTemplate(
+        file_path,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=18,
+        pageCompression=1
+    )
+
+    # Maquetar y escribir mientras se generan los elementos
+    story = FlowableStream(pdf_flowables(document.blocks, doc.width))
+    with timings.stage('write'):
+        doc.build(story)
+    pages = doc.page
+    timings.meta['flowables'] = story.produced
+    timings.meta['pages'] = pages
+    timings.meta['pages_per_s'] = round(pages / max(timings.stages['write'], 1e-9), 1)
+
+
+# --------------------------------------------------------------------------
+# DOCX (python-docx)
+# --------------------------------------------------------------------------
+
+def _docx_runs(paragraph, runs):
+    for run in runs:
+        if run.text == '\n':
+            paragraph.add_run().add_break()
+            continue
+        r = paragraph.add_run(run.text)
+        if run.style & BOLD:
+            r.bold = True
+        if run.style & ITALIC:
+            r.italic = True
+        if run.style & CODE:
+            r.font.name = 'Courier New'
+        if run.style & STRIKE:
+            r.font.strike = True
+        if run.style & SUPERSCRIPT:
+            r.font.superscript = True
+        if run.href:
+            r.underline = True
+            r.font.color.rgb = RGBColor.from_string(LINK_COLOR[1:])
+
+
+def _docx_rule(doc):
+    """Párrafo vacío con borde inferior (línea horizontal)"""
+    paragraph = doc.add_paragraph()
+    borders = OxmlElement('w:pBdr')
+    bottom = OxmlElement('w:bottom')
+    for name, value in (('w:val', 'single'), ('w:sz', '6'), ('w:space', '1'), ('w:color', 'auto')):
+        bottom.set(qn(name), value)
+    borders.append(bottom)
+    paragraph._p.get_or_add_pPr().append(borders)
+
+
+def _docx_table(doc, block):
+    columns = ir.table_columns(block)
+    if not columns:
+        # Una tabla sin celdas no se exporta
+        return
+    aligns = [DOCX_CELL_ALIGNS.get(align) for align in ir.column_aligns(block, columns)]
+    table = doc.add_table(rows=0, cols=columns)
+    table.style = 'Table Grid'
+    rows = [[[ir.Run(r.text, r.style | BOLD, r.href) for r in runs] for runs in block.header]] if block.header else []
+    rows.extend(block.rows)
+    for row in rows:
+        for cell, align, runs in zip(table.add_row().cells, aligns, row):
+            paragraph = cell.paragraphs[0]
+            if align is not None:
+                paragraph.alignment = align
+            _docx_runs(paragraph, runs)
+
+
+def docx_blocks(doc, blocks, style=None, depth=0):
+    """Añadir al documento de python-docx los párrafos de los bloques"""
+    for block in blocks:
+        kind = type(block)
+        if kind is ir.Heading:
+            _docx_runs(doc.add_heading(level=block.level), block.runs)
+        elif kind is ir.Paragraph:
+            _docx_runs(doc.add_paragraph(style=style), block.runs)
+        elif kind is ir.CodeBlock:
+            doc.add_paragraph().add_run(block.text).font.name = 'Courier New'
+        elif kind is ir.ListBlock:
+            # La plantilla de python-docx tiene estilos de lista hasta el nivel 3
+            suffix = f' {min(depth + 1, 3)}' if depth else ''
+            list_style = ('List Number' if block.ordered else 'List Bullet') + suffix
+            for item in block.items:
+                for index, child in enumerate(item):
+                    if type(child) is ir.Paragraph:
+                        _docx_runs(doc.add_paragraph(style=list_style if index == 0 else 'List Continue' + suffix),
+                                   child.runs)
+                    else:
+                        docx_blocks(doc, [child], style, depth + 1)
+        elif kind is ir.Quote:
+            docx_blocks(doc, block.blocks, 'Quote', depth)
+        elif kind is ir.Table:
+            _docx_table(doc, block)
+        elif kind is ir.Rule:
+            _docx_rule(doc)
+
+
+def write_docx(markdown_text, file_path, timings=None):
+    """Exportar a DOCX escribiendo document.xml directamente (docx_writer)"""
+    if timings is None:
+        timings = Timings('write_docx')
+    document = document_cache.get(markdown_text, timings)
+    with timings.stage('write'):
+        docx_writer.write_blocks(document.blocks, file_path)
+
+
+def write_docx_object_model(markdown_text, file_path, timings=None):
+    """Exportar a DOCX con el modelo de objetos de python-docx (más lento;
+    se conserva como referencia para los benchmarks)"""
+    if timings is None:
+        timings = Timings('write_docx_object_model')
+    document = document_cache.get(markdown_text, timings)
+    with timings.stage('layout'):
+        doc = Document()
+        docx_blocks(doc, document.blocks)
+
+    with timings.stage('write'):
+        doc.save(file_path)
+
+
+# --------------------------------------------------------------------------
+# HTML
+# --------------------------------------------------------------------------
+
+def write_html(markdown_text, file_path, timings=None):
+    """Exportar a HTML con el CSS del preview incrustado"""
+    if timings is None:
+        timings = Timings('write_html')
+    document = document_cache.get(markdown_text, timings)
+    with timings.stage('wrap'):
+        html = build_html_document(document.html)
+    with timings.stage('write'):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(html)
@@ -0,0 +1,152 @@
+"""
+Lectura por fragmentos de ficheros de texto
+Decodifica el fichero a medida que se lee (con mmap cuando es posible),
+detecta la codificación por BOM o por muestreo y normaliza los saltos de
+línea como el modo texto de Python, también entre fragmentos.
+"""
+
+import codecs
+import io
+import mmap
+import os
+
+CHUNK_SIZE = 1024 * 1024
+# Primer fragmento pequeño para que la primera pantalla aparezca enseguida
+FIRST_CHUNK_SIZE = 64 * 1024
+# Codificación usada cuando el contenido no es UTF-8 válido
+FALLBACK_ENCODING = 'cp1252'
+
+# UTF-32 antes que UTF-16: el BOM de UTF-32 LE empieza como el de UTF-16 LE
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+# Codificación con la que se escribe el texto detrás de cada BOM al guardar
+# (con el mismo orden de bytes que el original)
+_BOM_WRITE_ENCODINGS = {
+    codecs.BOM_UTF32_LE: 'utf-32-le',
+    codecs.BOM_UTF32_BE: 'utf-32-be',
+    codecs.BOM_UTF8: 'utf-8',
+    codecs.BOM_UTF16_LE: 'utf-16-le',
+    codecs.BOM_UTF16_BE: 'utf-16-be',
+}
+
+
+class LoadCancelled(Exception):
+    """La lectura se canceló antes de terminar"""
+
+
+def detect_bom(sample):
+    """BOM con el que empiezan los bytes ``sample`` (b'' si no hay)"""
+    for bom, _ in _BOMS:
+        if sample.startswith(bom):
+            return bom
+    return b''
+
+
+def detect_encoding(sample):
+    """Codificación de un fichero a partir de sus primeros bytes"""
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # final=False: una secuencia cortada al final de la muestra no es un error
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+
+class TextFileReader:
+    """Lector de un fichero de texto por fragmentos ya decodificados.
+
+    Tras recorrer ``chunks()`` quedan disponibles ``encoding``, ``bom`` y
+    ``write_encoding`` (con los que volver a guardar el fichero en su
+    formato) y ``replaced`` (si hubo bytes inválidos sustituidos por U+FFFD).
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE, first_chunk_size=FIRST_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.first_chunk_size = first_chunk_size
+        self.size = os.path.getsize(path)
+        self.encoding = None
+        self.bom = b''
+        self.write_encoding = 'utf-8'
+        self.replaced = False
+
+    def _raw_chunks(self, f):
+        """Bytes del fichero, mapeado en memoria si el sistema lo permite"""
+        view = None
+        if self.size:
+            try:
+                view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                view = None
+        size = self.first_chunk_size
+        if view is None:
+            while True:
+                data = f.read(size)
+                if not data:
+                    return
+                yield data
+                size = self.chunk_size
+        with view:
+            position = 0
+            while position < len(view):
+                yield view[position:position + size]
+                position += size
+                size = self.chunk_size
+
+    def chunks(self, cancelled=None):
+        """Generar ``(texto, bytes_leídos)``; lanza LoadCancelled si se cancela"""
+        done = 0
+        with open(self.path, 'rb') as f:
+            decoder = None
+            for data in self._raw_chunks(f):
+                if cancelled is not None and cancelled():
+                    raise LoadCancelled()
+                if decoder is None:
+                    self.encoding = detect_encoding(data)
+                    self.bom = detect_bom(data)
+                    self.write_encoding = _BOM_WRITE_ENCODINGS.get(self.bom, self.encoding)
+                    raw = codecs.getincrementaldecoder(self.encoding)('strict')
+                    decoder = io.IncrementalNewlineDecoder(raw, translate=True)
+                done += len(data)
+                try:
+                    text = decoder.decode(data)
+                except UnicodeDecodeError:
+                    # Bytes inválidos más adelante en el fichero: sustituirlos
+                    raw.errors = 'replace'
+                    self.replaced = True
+                    text = decoder.decode(data)
+                if text:
+                    yield text, done
+            if decoder is not None:
+                text = decoder.decode(b'', final=True)
+                if text:
+                    yield text, done
+
+    def read(self):
+        """Texto completo del fichero"""
+        return ''.join(text for text, _ in self.chunks())
+
+
+def file_stamp(path):
+    """Tamaño y fecha de modificación con los que se reconoce una versión del archivo"""
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def read_text(path):
+    """Leer un fichero completo con detección de codificación"""
+    return TextFileReader(path).read()
+
+
+def decode_text(data):
+    """Decodificar el contenido completo de un fichero ya leído, como ``read_text``"""
+    text = data.decode(detect_encoding(data), 'replace')
+    return text.replace('\r\n', '\n').replace('\r', '\n')
@@ -0,0 +1,89 @@
+"""
+Escritura atómica de ficheros
+El contenido se escribe en un temporal del mismo directorio, se sincroniza
+con el disco y se renombra sobre el destino: un fallo a mitad de escritura
+nunca deja el fichero original truncado.
+"""
+
+import os
+import shutil
+import tempfile
+
+
+def _current_umask():
+    """Máscara de permisos del proceso.
+    ``os.umask`` sólo se puede leer cambiándola, así que se consulta una vez
+    al importar el módulo, antes de que haya hilos que creen ficheros."""
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+# Permisos de los ficheros nuevos, como los que daría open() (los existentes
+# conservan los suyos)
+NEW_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def _fsync_directory(directory):
+    """Persistir el renombrado (sólo POSIX; en Windows no se puede abrir un directorio)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _mkstemp_for(path):
+    return tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp',
+                            dir=os.path.dirname(path))
+
+
+def temp_path(path):
+    """Fichero temporal vacío junto a ``path`` para escribirlo y luego ``replace_file``"""
+    fd, tmp_path = _mkstemp_for(os.path.realpath(path))
+    os.close(fd)
+    return tmp_path
+
+
+def replace_file(tmp_path, path):
+    """Renombrar ``tmp_path`` sobre ``path`` con los permisos que le corresponden"""
+    # Si el destino es un enlace simbólico se sustituye el fichero enlazado
+    path = os.path.realpath(path)
+    if os.path.exists(path):
+        shutil.copymode(path, tmp_path)
+    else:
+        os.chmod(tmp_path, NEW_FILE_MODE)
+    os.replace(tmp_path, path)
+
+
+def remove_temp(tmp_path):
+    """Borrar un temporal que ya no se va a usar (si existe)"""
+    try:
+        os.unlink(tmp_path)
+    except OSError:
+        pass
+
+
+def write_atomic(path, chunks, encoding='utf-8', bom=b''):
+    """Escribir los fragmentos de texto ``chunks`` en ``path`` de forma atómica,
+    precedidos por los bytes ``bom`` si se indican"""
+    path = os.path.realpath(path)
+    fd, tmp_path = _mkstemp_for(path)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            if bom:
+                f.buffer.write(bom)
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        replace_file(tmp_path, path)
+    except BaseException:
+        remove_temp(tmp_path)
+        raise
+    _fsync_directory(os.path.dirname(path))
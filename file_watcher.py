@@ -0,0 +1,122 @@
+"""
+Vigilancia de cambios externos en los archivos abiertos
+Usa las notificaciones del sistema (QFileSystemWatcher) y sólo consulta el
+disco cuando llega una; los archivos que el sistema no puede vigilar (p. ej.
+borrados o en algunas unidades de red) se comprueban por tamaño y fecha
+con un sondeo lento. Sin cambios, vigilar cientos de archivos no cuesta nada.
+"""
+
+from PyQt6.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+from file_loader import file_stamp
+
+# Espera (ms) tras una notificación: un guardado suele generar varias
+SETTLE_INTERVAL = 200
+# Intervalo (ms) del sondeo de los archivos sin notificaciones del sistema
+POLL_INTERVAL = 2000
+
+
+def _stamp_or_none(path):
+    try:
+        return file_stamp(path)
+    except OSError:
+        return None
+
+
+class FileWatcher(QObject):
+    """Emite ``changed(ruta)`` cuando un archivo vigilado cambia en disco.
+
+    Cada archivo se compara con la última versión conocida (``set_stamp``
+    tras leerlo o guardarlo), de modo que las escrituras propias no cuentan
+    como cambios externos. Un archivo borrado se notifica una vez y después
+    se sondea hasta que vuelva a existir.
+    """
+    changed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_notified)
+        self._stamps = {}
+        # Archivos que se comprueban por sondeo
+        self._polled = set()
+        self._pending = set()
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.timeout.connect(self._check_pending)
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(POLL_INTERVAL)
+        self._poll_timer.timeout.connect(self._poll)
+
+    def watch(self, path, stamp=None):
+        """Vigilar ``path`` partiendo de la versión ``stamp`` (la actual si se omite)"""
+        if stamp is None:
+            stamp = _stamp_or_none(path)
+        self._stamps[path] = stamp
+        self._add(path)
+        # Si cambió desde que se tomó ``stamp`` se notificará enseguida
+        self._schedule(path)
+
+    def unwatch(self, path):
+        if path not in self._stamps:
+            return
+        del self._stamps[path]
+        if path in self._watcher.files():
+            self._watcher.removePath(path)
+        self._polled.discard(path)
+        self._pending.discard(path)
+        self._update_poll_timer()
+
+    def set_stamp(self, path, stamp):
+        """Registrar como conocida la versión ``stamp`` de un archivo vigilado"""
+        if path in self._stamps:
+            self._stamps[path] = stamp
+            # Por si hubo otra escritura justo después de la registrada
+            self._schedule(path)
+
+    def stamp(self, path):
+        return self._stamps.get(path)
+
+    def _add(self, path):
+        """Pedir notificaciones al sistema; si no es posible, sondear"""
+        if path in self._watcher.files() or self._watcher.addPath(path):
+            self._polled.discard(path)
+        else:
+            self._polled.add(path)
+        self._update_poll_timer()
+
+    def _update_poll_timer(self):
+        if self._polled and not self._poll_timer.isActive():
+            self._poll_timer.start()
+        elif not self._polled:
+            self._poll_timer.stop()
+
+    def _on_notified(self, path):
+        self._schedule(path)
+
+    def _schedule(self, path):
+        self._pending.add(path)
+        self._settle_timer.start(SETTLE_INTERVAL)
+
+    def _check_pending(self):
+        pending, self._pending = self._pending, set()
+        for path in pending:
+            self._check(path)
+
+    def _poll(self):
+        for path in list(self._polled):
+            self._check(path)
+
+    def _check(self, path):
+        if path not in self._stamps:
+            return
+        stamp = _stamp_or_none(path)
+        # Un guardado atómico sustituye el archivo y el sistema deja de vigilarlo
+        if stamp is not None and path not in self._watcher.files():
+            self._add(path)
+        elif stamp is None and path not in self._polled:
+            self._polled.add(path)
+            self._update_poll_timer()
+        if stamp != self._stamps[path]:
+            self._stamps[path] = stamp
+            self.changed.emit(path)
@@ -0,0 +1,174 @@
+"""
+Índice incremental de encabezados del documento
+Se actualiza con los deltas de edición (líneas sustituidas) sin volver a
+parsear el documento, y alimenta el panel de esquema. Sigue las reglas de
+python-markdown: encabezados ATX en la columna 0, encabezados Setext (línea
+subrayada con ``=`` o ``-`` al principio de un bloque) y bloques de código
+cercados cuya valla de cierre coincide con la de apertura.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+from itertools import compress, count
+
+from markdown.extensions.toc import slugify, unique
+
+Heading = namedtuple('Heading', 'level text slug line base occurrence')
+
+_HEADING_RE = re.compile(r'^(#{1,6})(.*?)#*\s*$')
+_FENCE_RE = re.compile(r'^(`{3,}|~{3,})[ ]*(\S*)')
+_SETEXT_RE = re.compile(r'^[=-]+[ ]*$')
+_HR_RE = re.compile(r'^ {0,3}([-*_])(?: *\1){2,} *$')
+_ATTR_ID_RE = re.compile(r'\s*\{[^}]*#([\w:.-]+)[^}]*\}\s*$')
+_INLINE_RES = (
+    (re.compile(r'!?\[([^\]]*)\](?:\([^)]*\)|\[[^\]]*\])'), r'\1'),
+    (re.compile(r'`([^`]*)`'), r'\1'),
+    (re.compile(r'<[^>]+>'), ''),
+    (re.compile(r'\*+|(?<!\w)_+|_+(?!\w)'), ''),
+    (re.compile(r'\\(.)'), r'\1'),
+)
+
+
+def _is_structural(line):
+    """Encabezado ATX, valla, subrayado o regla horizontal"""
+    first = line[:1]
+    if first == '#':
+        return bool(_HEADING_RE.match(line))
+    if first == '`' or first == '~':
+        return bool(_FENCE_RE.match(line))
+    return bool(_SETEXT_RE.match(line) or _HR_RE.match(line))
+
+
+def _setext_text(line):
+    """Texto de una línea que puede subrayarse como encabezado Setext, o None"""
+    if not line.strip() or line.startswith(('    ', '\t')) or _is_structural(line):
+        return None
+    return line.strip()
+
+
+def _starts_block(before):
+    """Si la línea que sigue a ``before`` empieza un bloque de python-markdown"""
+    return not before.strip() or _is_structural(before)
+
+
+def classify_line(line, previous='', before=''):
+    """Marca de una línea: encabezado, valla de código, subrayado Setext o None.
+    ``previous`` y ``before`` son las dos líneas anteriores ('' al principio).
+    El subrayado guarda el texto de la línea anterior y si ésta empieza un
+    bloque; sólo entonces python-markdown lo convierte en encabezado.
+    """
+    first = line[:1]
+    if first == '#':
+        m = _HEADING_RE.match(line)
+        if m:
+            return '#', len(m.group(1)), m.group(2).strip()
+    elif first == '`' or first == '~':
+        m = _FENCE_RE.match(line)
+        if m:
+            fence = m.group(1)
+            return fence, len(fence), bool(m.group(2))
+    elif first == '=' or first == '-':
+        if _SETEXT_RE.match(line):
+            return '=', 1 if first == '=' else 2, _setext_text(previous), _starts_block(before)
+    return None
+
+
+def _classify_lines(lines, context=()):
+    """Marcas de ``lines``; ``context`` son hasta dos líneas anteriores"""
+    context = list(context[-2:])
+    window = [''] * (2 - len(context)) + context + lines
+    return [classify_line(line, previous, before)
+            for line, previous, before in zip(lines, window[1:], window)]
+
+
+@lru_cache(maxsize=8192)
+def parse_heading(raw):
+    """Texto visible, id explícito ({#id}) y slug base de un encabezado"""
+    custom_id = None
+    m = _ATTR_ID_RE.search(raw)
+    if m:
+        custom_id = m.group(1)
+        raw = raw[:m.start()]
+    for pattern, repl in _INLINE_RES:
+        raw = pattern.sub(repl, raw)
+    text = raw.strip()
+    return text, custom_id, custom_id or slugify(text, '-')
+
+
+class HeadingIndex:
+    """Marcas por línea del documento y lista de encabezados derivada.
+
+    Cada delta sustituye sólo las líneas afectadas; la lista de encabezados
+    se recalcula bajo demanda recorriendo únicamente las líneas marcadas.
+    """
+
+    def __init__(self, text=''):
+        self.reset(text)
+
+    def reset(self, text):
+        self._marks = _classify_lines(text.split('\n'))
+        self._headings = None
+
+    def update(self, first, removed, lines, context=()):
+        """Sustituir ``removed`` líneas desde ``first`` por ``lines``.
+        ``context`` son las (hasta dos) líneas anteriores a ``first``, de las
+        que dependen los subrayados Setext del principio de ``lines``.
+        """
+        marks = self._marks
+        marks[first:first + removed] = _classify_lines(lines, context)
+        # Los subrayados que siguen a las líneas sustituidas dependen de ellas
+        window = [''] * 2 + list(context[-2:]) + lines
+        after = first + len(lines)
+        if after < len(marks) and marks[after] and marks[after][0] == '=':
+            marks[after] = ('=', marks[after][1], _setext_text(window[-1]), _starts_block(window[-2]))
+        if after + 1 < len(marks) and marks[after + 1] and marks[after + 1][0] == '=':
+            mark = marks[after + 1]
+            marks[after + 1] = ('=', mark[1], mark[2], _starts_block(window[-1]))
+        self._headings = None
+
+    def line_count(self):
+        return len(self._marks)
+
+    def headings(self):
+        if self._headings is None:
+            self._headings = self._build()
+        return self._headings
+
+    def _build(self):
+        marks = self._marks
+        marked = [(line, marks[line]) for line in compress(count(), marks)]
+        headings = []
+        used_ids = set()
+        occurrences = {}
+        i = 0
+        while i < len(marked):
+            line, mark = marked[i]
+            i += 1
+            kind = mark[0]
+            level = mark[1]
+            if kind == '=':
+                # Subrayado Setext: el encabezado es la línea anterior
+                if mark[2] is None or not mark[3]:
+                    continue
+                raw = mark[2]
+                line -= 1
+            elif kind == '#':
+                raw = mark[2]
+            else:
+                # Saltar el bloque de código si tiene valla de cierre; si no, es texto
+                for j in range(i, len(marked)):
+                    if marked[j][1][0] == kind and not marked[j][1][2]:
+                        i = j + 1
+                        break
+                continue
+            text, custom_id, base = parse_heading(raw)
+            if custom_id:
+                slug = custom_id
+                used_ids.add(slug)
+            else:
+                slug = unique(base, used_ids)
+            occurrence = occurrences.get(base, 0)
+            occurrences[base] = occurrence + 1
+            headings.append(Heading(level, text, slug, line, base, occurrence))
+        return headings
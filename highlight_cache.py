@@ -0,0 +1,158 @@
+"""
+Caché LRU de bloques de código resaltados con Pygments
+Evita volver a ejecutar Pygments sobre bloques de código que no cambiaron
+entre actualizaciones del preview o exportaciones.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from markdown.extensions import Extension
+from markdown.extensions.codehilite import CodeHilite, CodeHiliteExtension
+from markdown.extensions.fenced_code import FencedBlockPreprocessor
+from markdown.preprocessors import Preprocessor
+
+from instrumentation import instrumentation
+
+
+class HighlightCache:
+    """Caché LRU acotada por número de entradas y por memoria.
+
+    Las claves son (lenguaje, hash del código, opciones del resaltador).
+    El tamaño se estima con la longitud del HTML generado.
+    """
+
+    def __init__(self, max_entries=4096, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(code, lang, options):
+        digest = hashlib.blake2b(code.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+        return lang or '', digest, repr(sorted(options.items()))
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self, key, html):
+        size = len(html)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = html
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def highlight(self, code, lang, options):
+        """Devolver el HTML resaltado de ``code``, usando la caché si es posible"""
+        key = self.make_key(code, lang, options)
+        html = self.get(key)
+        if html is None:
+            start = time.perf_counter()
+            local = dict(options)
+            style = local.pop('pygments_style', 'default')
+            html = CodeHilite(code, lang=lang, style=style, **local).hilite(shebang=False)
+            self.put(key, html)
+            instrumentation.add_current('highlight', time.perf_counter() - start)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Aciertos, fallos y ocupación de la caché"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+
+# Caché compartida por el preview y las exportaciones
+highlight_cache = HighlightCache()
+
+
+class CachedFencedCodePreprocessor(Preprocessor):
+    """Resaltar bloques de código cercados a través de la caché.
+
+    Se ejecuta antes que ``fenced_code`` y sólo trata los bloques simples
+    (con o sin lenguaje); los que llevan atributos o ``hl_lines`` se dejan
+    para ``fenced_code``.
+    """
+
+    def __init__(self, md, cache):
+        super().__init__(md)
+        self.cache = cache
+
+    def _codehilite_config(self):
+        for ext in self.md.registeredExtensions:
+            if isinstance(ext, CodeHiliteExtension):
+                return ext.getConfigs()
+        return None
+
+    def run(self, lines):
+        config = self._codehilite_config()
+        if not config or not config['use_pygments']:
+            return lines
+
+        text = '\n'.join(lines)
+        if '```' not in text and '~~~' not in text:
+            return lines
+
+        parts = []
+        index = 0
+        for m in FencedBlockPreprocessor.FENCED_BLOCK_RE.finditer(text):
+            if m.group('attrs') or m.group('hl_lines'):
+                continue
+            html = self.cache.highlight(m.group('code'), m.group('lang') or None, config)
+            placeholder = self.md.htmlStash.store(html)
+            parts.append(text[index:m.start()])
+            parts.append(f'\n{placeholder}\n')
+            index = m.end()
+
+        if not parts:
+            return lines
+        parts.append(text[index:])
+        return ''.join(parts).split('\n')
+
+
+class HighlightCacheExtension(Extension):
+    """Extensión Markdown que sirve el resaltado de código desde la caché"""
+
+    def __init__(self, cache=None, **kwargs):
+        self.cache = cache or highlight_cache
+        super().__init__(**kwargs)
+
+    def extendMarkdown(self, md):
+        # Prioridad mayor que fenced_code (25) para procesar antes los bloques
+        md.preprocessors.register(
+            CachedFencedCodePreprocessor(md, self.cache), 'cached_fenced_code', 26
+        )
@@ -0,0 +1,129 @@
+"""
+Instrumentación de rendimiento de MarkdownViewer
+Registra tiempos por etapa (extracción, parseo, resaltado, HTML, carga,
+escritura) de cada operación y, si se habilita, los vuelca a un log JSONL
+rotativo.
+
+El log se activa con la variable de entorno MDVIEWER_PERF_LOG (ruta del
+fichero, o "1" para la ruta por defecto) o con la opción --perf-log.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from app_paths import user_cache_dir
+
+PERF_LOG_ENV = 'MDVIEWER_PERF_LOG'
+
+
+class Timings:
+    """Tiempos por etapa de una operación"""
+
+    def __init__(self, operation, **meta):
+        self.operation = operation
+        self.meta = meta
+        self.stages = {}
+        self.timestamp = time.time()
+
+    def add(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def exclude(self, stage, nested):
+        """Descontar de ``stage`` el tiempo de una etapa medida dentro de ella"""
+        if stage in self.stages:
+            self.stages[stage] -= self.stages.get(nested, 0.0)
+
+    @contextmanager
+    def stage(self, name):
+        """Medir el bloque ``with`` como la etapa ``name``"""
+        self.stages.setdefault(name, 0.0)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def total(self):
+        return sum(self.stages.values())
+
+    def summary(self):
+        """Texto breve para la barra de estado"""
+        parts = ' · '.join(f"{name} {secs * 1000:.1f}" for name, secs in self.stages.items())
+        return f"{self.operation}: {self.total() * 1000:.1f} ms ({parts})"
+
+    def to_dict(self):
+        return {
+            'ts': self.timestamp,
+            'operation': self.operation,
+            'total_ms': round(self.total() * 1000, 3),
+            'stages_ms': {name: round(secs * 1000, 3) for name, secs in self.stages.items()},
+            'meta': self.meta,
+        }
+
+
+class Instrumentation:
+    """Punto central donde se publican los tiempos de todas las operaciones"""
+
+    def __init__(self):
+        self._listeners = []
+        self._local = threading.local()
+        self._logger = None
+
+    def enable_log(self, path=None, max_bytes=5 * 1024 * 1024, backups=3):
+        """Activar el log JSONL rotativo"""
+        if not path or path == '1':
+            path = user_cache_dir() / 'perf.jsonl'
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger = logging.getLogger('markdownviewer.perf')
+        logger.handlers[:] = [handler]
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        self._logger = logger
+        return path
+
+    def enable_log_from_env(self):
+        path = os.environ.get(PERF_LOG_ENV)
+        if path:
+            return self.enable_log(path)
+        return None
+
+    def subscribe(self, callback):
+        """Registrar un callable que recibirá cada Timings terminado"""
+        self._listeners.append(callback)
+
+    def begin(self, operation, **meta):
+        return Timings(operation, **meta)
+
+    def finish(self, timings):
+        """Publicar una operación terminada"""
+        if self._logger is not None:
+            self._logger.info(json.dumps(timings.to_dict(), ensure_ascii=False))
+        for callback in list(self._listeners):
+            callback(timings)
+
+    @contextmanager
+    def activate(self, timings):
+        """Hacer de ``timings`` el destino de add_current() en este hilo"""
+        previous = getattr(self._local, 'current', None)
+        self._local.current = timings
+        try:
+            yield timings
+        finally:
+            self._local.current = previous
+
+    def add_current(self, stage, seconds):
+        """Sumar tiempo a la operación activa en este hilo, si la hay"""
+        timings = getattr(self._local, 'current', None)
+        if timings is not None:
+            timings.add(stage, seconds)
+
+
+# Instancia compartida por toda la aplicación
+instrumentation = Instrumentation()
@@ -0,0 +1,267 @@
+"""
+Resaltado de sintaxis Markdown para el editor
+QSyntaxHighlighter con estado por bloque (código cercado, front matter,
+tablas): al editar sólo se vuelven a resaltar los bloques cuyo estado cambia.
+El código cercado se analiza con Pygments entero, no línea a línea, para que
+los tokens de varias líneas (cadenas, comentarios de bloque) se coloreen
+igual que en el preview.
+"""
+
+import re
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QColor, QFont, QSyntaxHighlighter, QTextBlockUserData, QTextCharFormat
+from pygments.lexers import get_lexer_by_name
+from pygments.styles import get_style_by_name
+from pygments.util import ClassNotFound
+
+# Estados de bloque (QTextBlock.userState)
+NORMAL = 0
+FRONT_MATTER = 1
+TABLE = 2
+# Los bloques dentro de código cercado usan FENCE_BASE + índice de la valla
+FENCE_BASE = 16
+
+_FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})\s*([\w#.+-]*)')
+_HEADING_RE = re.compile(r'^ {0,3}#{1,6}(\s|$)')
+_HR_RE = re.compile(r'^ {0,3}([-*_])(\s*\1){2,}\s*$')
+_LIST_RE = re.compile(r'^\s*([-*+]|\d+[.)])\s')
+_QUOTE_RE = re.compile(r'^ {0,3}>')
+_TABLE_RE = re.compile(r'^\s*\|')
+_INLINE_RULES = (
+    ('code', re.compile(r'`[^`\n]+`')),
+    ('bold', re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')),
+    ('italic', re.compile(r'(?<![*\w])([*_])(?=\S)(.+?)(?<=\S)\1(?![*\w])')),
+    ('link', re.compile(r'!?\[[^\]\n]*\]\([^)\n]*\)')),
+)
+
+
+class _CodeLine(QTextBlockUserData):
+    """Tokens de una línea de código cercado, calculados al analizar la valla entera"""
+
+    def __init__(self, state, text, spans):
+        super().__init__()
+        self.state = state
+        self.text = text
+        self.spans = spans      # (inicio, longitud, tipo de token)
+        self.applied = False    # ya se aplicaron los formatos al bloque
+
+
+def _format(color=None, bold=False, italic=False, background=None, family=None):
+    fmt = QTextCharFormat()
+    if color:
+        fmt.setForeground(QColor(color))
+    if bold:
+        fmt.setFontWeight(QFont.Weight.Bold)
+    if italic:
+        fmt.setFontItalic(True)
+    if background:
+        fmt.setBackground(QColor(background))
+    if family:
+        fmt.setFontFamilies([family])
+    return fmt
+
+
+class MarkdownHighlighter(QSyntaxHighlighter):
+    """Resaltador Markdown incremental.
+
+    El coste por pulsación se limita al bloque editado salvo que cambie su
+    estado (p. ej. al abrir o cerrar una valla de código), en cuyo caso Qt
+    continúa con los bloques siguientes hasta que el estado se estabiliza.
+    """
+
+    def __init__(self, document, pygments_style='default'):
+        super().__init__(document)
+        self.formats = {
+            'heading': _format('#2c3e50', bold=True),
+            'bold': _format(bold=True),
+            'italic': _format(italic=True),
+            'code': _format('#c7254e', background='#f6f8fa'),
+            'link': _format('#0366d6'),
+            'quote': _format('#6a737d', italic=True),
+            'list': _format('#d73a49', bold=True),
+            'hr': _format('#6a737d'),
+            'fence': _format('#6a737d', background='#f6f8fa'),
+            'front_matter': _format('#6a737d'),
+            'table': _format('#6a737d', bold=True),
+        }
+        self._style = get_style_by_name(pygments_style)
+        self._token_formats = {}
+        self._lexers = {}
+        # Vallas distintas vistas: (carácter, longitud, lenguaje) -> índice
+        self._fences = []
+        self._fence_index = {}
+
+    # ------------------------------------------------------------------
+    # Código cercado con Pygments
+    # ------------------------------------------------------------------
+
+    def _fence_state(self, char, length, lang):
+        key = (char, length, lang)
+        index = self._fence_index.get(key)
+        if index is None:
+            index = self._fence_index[key] = len(self._fences)
+            self._fences.append(key)
+        return FENCE_BASE + index
+
+    def _lexer(self, lang):
+        if lang not in self._lexers:
+            try:
+                self._lexers[lang] = get_lexer_by_name(lang, stripnl=False, ensurenl=False) if lang else None
+            except ClassNotFound:
+                self._lexers[lang] = None
+        return self._lexers[lang]
+
+    def _token_format(self, ttype):
+        fmt = self._token_formats.get(ttype)
+        if fmt is None:
+            style = self._style.style_for_token(ttype)
+            fmt = _format(
+                '#' + style['color'] if style['color'] else None,
+                bold=style['bold'],
+                italic=style['italic'],
+                background='#f6f8fa',
+            )
+            self._token_formats[ttype] = fmt
+        return fmt
+
+    def _fence_body(self, opener, state):
+        """Bloques de una valla desde la línea que la abre hasta su cierre"""
+        char, length, _ = self._fences[state - FENCE_BASE]
+        blocks = []
+        block = opener.next()
+        while block.isValid():
+            m = _FENCE_RE.match(block.text())
+            if m and m.group(1)[0] == char and len(m.group(1)) >= length and not m.group(2):
+                break
+            blocks.append(block)
+            block = block.next()
+        return blocks
+
+    def _lex_fence(self, opener, state, lexer):
+        """Analizar la valla entera y guardar los tokens de cada línea en su bloque.
+        Devuelve los números de bloque cuyos tokens han cambiado."""
+        blocks = self._fence_body(opener, state)
+        texts = [block.text() for block in blocks]
+        lines = [[] for _ in texts]
+        row = col = 0
+        for ttype, value in lexer.get_tokens('\n'.join(texts) + '\n'):
+            for i, part in enumerate(value.split('\n')):
+                if i:
+                    row += 1
+                    col = 0
+                if part and row < len(lines):
+                    lines[row].append((col, len(part), ttype))
+                    col += len(part)
+        changed = []
+        for block, text, spans in zip(blocks, texts, lines):
+            old = block.userData()
+            if isinstance(old, _CodeLine) and old.state == state and old.spans == spans:
+                old.text = text
+            else:
+                changed.append(block.blockNumber())
+                block.setUserData(_CodeLine(state, text, spans))
+        return changed
+
+    def _rehighlight_later(self, numbers):
+        """Volver a resaltar bloques cuyo color cambió por una edición en otra línea"""
+        document = self.document()
+
+        def rehighlight():
+            if self.document() is not document:
+                return
+            for number in numbers:
+                block = document.findBlockByNumber(number)
+                # Los que Qt ya resaltó después del análisis no hace falta repetirlos
+                data = block.userData() if block.isValid() else None
+                if isinstance(data, _CodeLine) and not data.applied:
+                    self.rehighlightBlock(block)
+
+        QTimer.singleShot(0, rehighlight)
+
+    def _highlight_code(self, text, state):
+        lang = self._fences[state - FENCE_BASE][2]
+        lexer = self._lexer(lang)
+        if lexer is None:
+            self.setFormat(0, len(text), self.formats['fence'])
+            return
+        data = self.currentBlockUserData()
+        if not (isinstance(data, _CodeLine) and data.state == state and data.text == text):
+            # Línea editada o valla sin analizar: se vuelve a analizar entera
+            block = self.currentBlock()
+            opener = block.previous()
+            while opener.previous().userState() == state:
+                opener = opener.previous()
+            number = block.blockNumber()
+            changed = [n for n in self._lex_fence(opener, state, lexer) if n != number]
+            if changed:
+                self._rehighlight_later(changed)
+            data = self.currentBlockUserData()
+            if not isinstance(data, _CodeLine):
+                self.setFormat(0, len(text), self.formats['fence'])
+                return
+        data.applied = True
+        for start, length, ttype in data.spans:
+            self.setFormat(start, length, self._token_format(ttype))
+
+    # ------------------------------------------------------------------
+    # Resaltado por bloque
+    # ------------------------------------------------------------------
+
+    def _highlight_inline(self, text):
+        for name, pattern in _INLINE_RULES:
+            fmt = self.formats[name]
+            for m in pattern.finditer(text):
+                self.setFormat(m.start(), m.end() - m.start(), fmt)
+
+    def highlightBlock(self, text):
+        previous = self.previousBlockState()
+
+        # Dentro de código cercado
+        if previous >= FENCE_BASE:
+            char, length, _ = self._fences[previous - FENCE_BASE]
+            m = _FENCE_RE.match(text)
+            if m and m.group(1)[0] == char and len(m.group(1)) >= length and not m.group(2):
+                self.setFormat(0, len(text), self.formats['fence'])
+                self.setCurrentBlockState(NORMAL)
+            else:
+                self._highlight_code(text, previous)
+                self.setCurrentBlockState(previous)
+            return
+
+        # Front matter YAML al inicio del documento
+        if previous == FRONT_MATTER or (self.currentBlock().blockNumber() == 0 and text == '---'):
+            self.setFormat(0, len(text), self.formats['front_matter'])
+            closing = previous == FRONT_MATTER and text in ('---', '...')
+            self.setCurrentBlockState(NORMAL if closing else FRONT_MATTER)
+            return
+
+        m = _FENCE_RE.match(text)
+        if m:
+            self.setFormat(0, len(text), self.formats['fence'])
+            fence = m.group(1)
+            self.setCurrentBlockState(self._fence_state(fence[0], len(fence), m.group(2).lower()))
+            return
+
+        if _TABLE_RE.match(text):
+            self._highlight_inline(text)
+            pipe = self.formats['table']
+            for i, ch in enumerate(text):
+                if ch == '|':
+                    self.setFormat(i, 1, pipe)
+            self.setCurrentBlockState(TABLE)
+            return
+
+        self.setCurrentBlockState(NORMAL)
+        if _HEADING_RE.match(text):
+            self.setFormat(0, len(text), self.formats['heading'])
+        elif _HR_RE.match(text):
+            self.setFormat(0, len(text), self.formats['hr'])
+        elif _QUOTE_RE.match(text):
+            self.setFormat(0, len(text), self.formats['quote'])
+            self._highlight_inline(text)
+        else:
+            m = _LIST_RE.match(text)
+            if m:
+                self.setFormat(m.start(1), len(m.group(1)), self.formats['list'])
+            self._highlight_inline(text)
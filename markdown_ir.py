@@ -0,0 +1,303 @@
+"""
+Representación intermedia de un documento Markdown para las exportaciones
+El documento se parsea una sola vez con python-markdown (las mismas
+extensiones que el preview) y del mismo árbol salen el HTML y una lista
+compacta de bloques con fragmentos de texto con estilo, que recorren los
+exportadores PDF y DOCX. Así los tres formatos coinciden y exportar un
+documento a varios formatos lo parsea una vez (caché por contenido).
+"""
+
+import hashlib
+import html as html_lib
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from markdown import util
+
+from instrumentation import Timings, instrumentation
+from markdown_render import converter_pool
+
+# Estilos de un fragmento (se combinan con |)
+BOLD = 1
+ITALIC = 2
+CODE = 4
+STRIKE = 8
+SUPERSCRIPT = 16
+
+# Fragmento de texto con estilo; ``href`` si forma parte de un enlace. '\n' es un salto de línea
+Run = namedtuple('Run', 'text style href')
+
+# Bloques
+Heading = namedtuple('Heading', 'level runs anchor')
+Paragraph = namedtuple('Paragraph', 'runs')
+CodeBlock = namedtuple('CodeBlock', 'text')
+ListBlock = namedtuple('ListBlock', 'ordered start items')   # items: tupla de tuplas de bloques
+Quote = namedtuple('Quote', 'blocks')
+Table = namedtuple('Table', 'header rows aligns')            # celdas: tuplas de Run
+Rule = namedtuple('Rule', '')
+
+
+def table_columns(table):
+    """Columnas de una tabla: las de su fila más larga (0 si no tiene celdas)"""
+    return max([len(table.header)] + [len(row) for row in table.rows])
+
+
+def column_aligns(table, columns):
+    """Alineación de cada columna ('left', 'center', 'right' o None)"""
+    aligns = list(table.aligns[:columns])
+    return aligns + [None] * (columns - len(aligns))
+
+_HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+_BLOCK_TAGS = {'p', 'ul', 'ol', 'pre', 'blockquote', 'table', 'hr', 'div', 'dl', 'dt', 'dd',
+               'details', 'summary', 'figure', 'section', 'article', 'aside'} | set(_HEADING_TAGS)
+_INLINE_STYLES = {'strong': BOLD, 'b': BOLD, 'em': ITALIC, 'i': ITALIC, 'code': CODE,
+                  'del': STRIKE, 's': STRIKE, 'strike': STRIKE, 'sup': SUPERSCRIPT}
+_PLACEHOLDER_RE = re.compile(util.STX + r'([^' + util.ETX + r']*)' + util.ETX)
+_STASH_RE = re.compile(r'wzxhzdk:(\d+)$')
+_TAG_RE = re.compile(r'<[^>]+>')
+_PRE_RE = re.compile(r'<pre[^>]*>(.*)</pre>', re.DOTALL)
+_ALIGN_RE = re.compile(r'text-align:\s*(\w+)')
+_SPACE_RE = re.compile(r'[ \t]*\n[ \t]*')
+
+
+class MarkdownDocument:
+    """Documento parseado: HTML del cuerpo y bloques para los exportadores nativos"""
+
+    __slots__ = ('html', 'blocks')
+
+    def __init__(self, html, blocks):
+        self.html = html            # cuerpo HTML, igual que markdown_to_html sin la hoja de estilos
+        self.blocks = blocks        # tupla de bloques
+
+
+def html_text(html):
+    """Texto visible de un fragmento de HTML"""
+    return html_lib.unescape(_TAG_RE.sub('', html))
+
+
+class _Converter:
+    """Recorrido del árbol de python-markdown que produce los bloques"""
+
+    def __init__(self, stash):
+        self.stash = stash
+
+    def resolve(self, text):
+        """Sustituir los marcadores de python-markdown por su texto"""
+        if util.STX not in text:
+            return text
+
+        def replace(m):
+            stashed = _STASH_RE.match(m.group(1))
+            if stashed:
+                item = self.stash[int(stashed.group(1))]
+                return html_text(item) if isinstance(item, str) else ''.join(item.itertext())
+            if m.group(1) == 'amp':
+                return '&'
+            # Espacios y enlaces de vuelta de las notas al pie
+            return ' ' if m.group(1).startswith('qq') else ''
+
+        return _PLACEHOLDER_RE.sub(replace, text)
+
+    # -- En línea --------------------------------------------------------
+
+    def add_text(self, runs, text, style, href):
+        if not text:
+            return
+        if not style & CODE:
+            text = _SPACE_RE.sub(' ', self.resolve(text))
+            if not runs or runs[-1].text == '\n':
+                text = text.lstrip(' ')
+            if not text:
+                return
+        if runs and runs[-1].style == style and runs[-1].href == href and runs[-1].text != '\n':
+            runs[-1] = Run(runs[-1].text + text, style, href)
+        else:
+            runs.append(Run(text, style, href))
+
+    def inline(self, el, runs, style=0, href=None):
+        """Fragmentos del contenido en línea de ``el`` (sin su ``tail``)"""
+        self.add_text(runs, el.text, style, href)
+        for child in el:
+            self.inline_element(child, runs, style, href)
+            self.add_text(runs, child.tail, style, href)
+
+    def inline_element(self, el, runs, style, href):
+        tag = el.tag
+        if tag == 'br':
+            runs.append(Run('\n', style, href))
+        elif tag == 'img':
+            self.add_text(runs, el.get('alt') or el.get('src', ''), style | ITALIC, href)
+        elif tag == 'code':
+            # El texto del código va escapado en el árbol
+            self.add_text(runs, html_lib.unescape(''.join(el.itertext())), style | CODE, href)
+        elif tag == 'a':
+            if 'footnote-backref' in (el.get('class') or ''):
+                return
+            self.inline(el, runs, style, el.get('href') or href)
+        else:
+            self.inline(el, runs, style | _INLINE_STYLES.get(tag, 0), href)
+
+    @staticmethod
+    def trimmed(runs):
+        while runs and runs[-1].text == '\n':
+            runs.pop()
+        if runs and not runs[-1].style & CODE:
+            last = runs[-1]
+            runs[-1] = Run(last.text.rstrip(), last.style, last.href)
+            if not runs[-1].text:
+                runs.pop()
+        return tuple(runs)
+
+    def runs_of(self, el, style=0):
+        runs = []
+        self.inline(el, runs, style)
+        return self.trimmed(runs)
+
+    # -- Bloques ---------------------------------------------------------
+
+    def blocks(self, container):
+        """Bloques de un contenedor que puede mezclar texto en línea y bloques (p. ej. ``li``)"""
+        out = []
+        pending = []
+
+        def flush():
+            runs = self.trimmed(pending[:])
+            if runs:
+                out.append(Paragraph(runs))
+            pending.clear()
+
+        self.add_text(pending, container.text, 0, None)
+        for child in container:
+            if child.tag in _BLOCK_TAGS:
+                flush()
+                self.block(child, out)
+            else:
+                self.inline_element(child, pending, 0, None)
+            self.add_text(pending, child.tail, 0, None)
+        flush()
+        return out
+
+    def block(self, el, out):
+        tag = el.tag
+        if tag in _HEADING_TAGS:
+            out.append(Heading(_HEADING_TAGS[tag], self.runs_of(el), el.get('id')))
+        elif tag == 'p':
+            if len(el) == 0 and el.text and _PLACEHOLDER_RE.fullmatch(el.text.strip()):
+                self.stashed_block(el.text.strip(), out)
+                return
+            runs = self.runs_of(el)
+            if runs:
+                out.append(Paragraph(runs))
+        elif tag in ('ul', 'ol'):
+            items = tuple(tuple(self.blocks(li)) for li in el if li.tag == 'li')
+            start = el.get('start')
+            out.append(ListBlock(tag == 'ol', int(start) if start and start.isdigit() else 1, items))
+        elif tag == 'pre':
+            out.append(CodeBlock(html_lib.unescape(''.join(el.itertext())).rstrip('\n')))
+        elif tag in ('blockquote', 'dd'):
+            out.append(Quote(tuple(self.blocks(el))))
+        elif tag == 'dt':
+            runs = self.runs_of(el, BOLD)
+            if runs:
+                out.append(Paragraph(runs))
+        elif tag == 'hr':
+            out.append(Rule())
+        elif tag == 'table':
+            self.table(el, out)
+        else:
+            # div (notas al pie, [TOC], md_in_html), dl y demás contenedores
+            out.extend(self.blocks(el))
+
+    def stashed_block(self, placeholder, out):
+        """Bloque guardado en el almacén: código resaltado o HTML en bruto"""
+        stashed = _STASH_RE.match(placeholder[1:-1])
+        if not stashed:
+            return
+        item = self.stash[int(stashed.group(1))]
+        if not isinstance(item, str):
+            # Bloque HTML con markdown="1" (md_in_html): su contenido ya está parseado
+            out.extend(self.blocks(item))
+            return
+        pre = _PRE_RE.search(item)
+        if pre is not None:
+            out.append(CodeBlock(html_text(pre.group(1)).rstrip('\n')))
+            return
+        text = html_text(self.resolve(item)).strip()
+        if text:
+            out.append(Paragraph((Run(_SPACE_RE.sub(' ', text), 0, None),)))
+
+    def table(self, el, out):
+        header = ()
+        rows = []
+        aligns = ()
+        for section in el:
+            for tr in (section if section.tag in ('thead', 'tbody') else [section]):
+                if tr.tag != 'tr':
+                    continue
+                cells = tuple(self.runs_of(cell) for cell in tr)
+                if all(cell.tag == 'th' for cell in tr) and not header:
+                    header = cells
+                    aligns = tuple(self.alignment(cell) for cell in tr)
+                else:
+                    rows.append(cells)
+        out.append(Table(header, tuple(rows), aligns))
+
+    @staticmethod
+    def alignment(cell):
+        m = _ALIGN_RE.search(cell.get('style') or '')
+        return m.group(1) if m else cell.get('align')
+
+
+def parse_document(markdown_text, timings=None):
+    """Parsear un documento (sin caché)"""
+    if timings is None:
+        timings = Timings('parse_document')
+    with instrumentation.activate(timings), timings.stage('parse'):
+        html, root, stash = converter_pool.convert_tree(markdown_text)
+    timings.exclude('parse', 'highlight')
+    with timings.stage('ir'):
+        blocks = tuple(_Converter(stash).blocks(root))
+    return MarkdownDocument(html, blocks)
+
+
+class DocumentCache:
+    """Últimos documentos parseados, por hash del contenido"""
+
+    def __init__(self, max_entries=2):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(markdown_text):
+        return hashlib.blake2b(markdown_text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    def get(self, markdown_text, timings=None):
+        """Documento parseado de ``markdown_text``, de la caché si ya se parseó"""
+        if timings is None:
+            timings = Timings('parse_document')
+        started = time.perf_counter()
+        key = self.make_key(markdown_text)
+        with self._lock:
+            document = self._entries.get(key)
+            if document is not None:
+                self._entries.move_to_end(key)
+        timings.add('hash', time.perf_counter() - started)
+        timings.meta['ir_cache_hit'] = document is not None
+        if document is None:
+            document = parse_document(markdown_text, timings)
+            with self._lock:
+                self._entries[key] = document
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return document
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Caché compartida por las exportaciones
+document_cache = DocumentCache()
@@ -0,0 +1,637 @@
+"""
+Motor de renderizado Markdown de MarkdownViewer
+Reutiliza conversores markdown.Markdown ya configurados en lugar de
+construir uno nuevo (y registrar todas las extensiones) en cada preview.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import markdown
+from markdown import util
+from markdown.extensions import Extension
+from markdown.postprocessors import Postprocessor
+
+from highlight_cache import HighlightCacheExtension, highlight_cache
+from instrumentation import Timings, instrumentation
+
+
+class StashedHtmlPostprocessor(Postprocessor):
+    """``raw_html`` que no recorre el almacén de HTML si el texto no tiene marcadores.
+    ``toc`` ejecuta los postprocesadores con cada encabezado: sin este atajo el
+    coste crece con encabezados × bloques de código del documento.
+    """
+
+    def __init__(self, inner):
+        super().__init__(inner.md)
+        self.inner = inner
+
+    def run(self, text):
+        if util.STX not in text:
+            return text
+        return self.inner.run(text)
+
+
+class StashedHtmlExtension(Extension):
+    """Envuelve el ``raw_html`` registrado (el de md_in_html si está ``extra``)"""
+
+    def extendMarkdown(self, md):
+        inner = md.postprocessors['raw_html']
+        md.postprocessors.register(StashedHtmlPostprocessor(inner), 'raw_html', 30)
+
+
+# Extensiones usadas por el preview y las exportaciones
+DEFAULT_EXTENSIONS = (
+    'fenced_code',
+    'tables',
+    'toc',
+    'nl2br',
+    'sane_lists',
+    'codehilite',
+    'extra',
+    HighlightCacheExtension(highlight_cache),
+    StashedHtmlExtension(),
+)
+
+
+class ConverterPool:
+    """Pool de conversores Markdown por hilo y por configuración de extensiones.
+
+    Cada configuración se construye una sola vez por hilo y se reinicia con
+    ``reset()`` entre documentos. Los conversores nunca se comparten entre
+    hilos, de modo que preview y exportaciones concurrentes no comparten estado.
+    """
+
+    def __init__(self, max_per_thread=2):
+        self.max_per_thread = max_per_thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {
+            'setups': 0,
+            'setup_time': 0.0,
+            'conversions': 0,
+            'convert_time': 0.0,
+        }
+
+    @staticmethod
+    def _key(extensions, extension_configs):
+        configs = repr(sorted((extension_configs or {}).items()))
+        return tuple(extensions), configs
+
+    def _free_list(self, key):
+        pools = getattr(self._local, 'pools', None)
+        if pools is None:
+            pools = self._local.pools = {}
+        return pools.setdefault(key, [])
+
+    def _record(self, counter, timer, elapsed):
+        with self._lock:
+            self._stats[counter] += 1
+            self._stats[timer] += elapsed
+
+    @contextmanager
+    def acquire(self, extensions=DEFAULT_EXTENSIONS, extension_configs=None):
+        """Obtener un conversor listo para usar en el hilo actual"""
+        free = self._free_list(self._key(extensions, extension_configs))
+        if free:
+            md = free.pop()
+        else:
+            start = time.perf_counter()
+            md = markdown.Markdown(
+                extensions=list(extensions),
+                extension_configs=extension_configs or {}
+            )
+            self._record('setups', 'setup_time', time.perf_counter() - start)
+        try:
+            yield md
+        finally:
+            md.reset()
+            if len(free) < self.max_per_thread:
+                free.append(md)
+
+    def convert(self, text, extensions=DEFAULT_EXTENSIONS, extension_configs=None):
+        """Convertir Markdown a HTML reutilizando un conversor del pool"""
+        with self.acquire(extensions, extension_configs) as md:
+            start = time.perf_counter()
+            html = md.convert(text)
+            self._record('conversions', 'convert_time', time.perf_counter() - start)
+        return html
+
+    def convert_tree(self, text, extensions=DEFAULT_EXTENSIONS, extension_configs=None):
+        """Como ``convert``, pero conserva también el árbol del documento.
+        Devuelve ``(html, árbol, almacén de HTML)``; los marcadores del árbol
+        remiten a las entradas del almacén.
+        """
+        with self.acquire(extensions, extension_configs) as md:
+            start = time.perf_counter()
+            html, root = _convert_keeping_tree(md, text)
+            # reset() crea un almacén nuevo: esta lista sigue siendo válida
+            stash = md.htmlStash.rawHtmlBlocks
+            self._record('conversions', 'convert_time', time.perf_counter() - start)
+        return html, root, stash
+
+    def stats(self):
+        """Copia de los contadores de preparación y conversión"""
+        with self._lock:
+            return dict(self._stats)
+
+    def timing_report(self):
+        """Resumen legible del tiempo de preparación frente al de conversión"""
+        s = self.stats()
+        total = s['setup_time'] + s['convert_time']
+        share = (s['setup_time'] / total * 100) if total else 0.0
+        return (
+            f"Preparación: {s['setups']} conversores, {s['setup_time'] * 1000:.1f} ms | "
+            f"Conversión: {s['conversions']} documentos, {s['convert_time'] * 1000:.1f} ms | "
+            f"Preparación {share:.1f}% del total"
+        )
+
+
+def _convert_keeping_tree(md, source):
+    """Los mismos pasos que ``Markdown.convert``, devolviendo también el árbol"""
+    if not source.strip():
+        return '', md.parser.parseDocument([]).getroot()
+    md.lines = source.split('\n')
+    for prep in md.preprocessors:
+        md.lines = prep.run(md.lines)
+    root = md.parser.parseDocument(md.lines).getroot()
+    for treeprocessor in md.treeprocessors:
+        new_root = treeprocessor.run(root)
+        if new_root is not None:
+            root = new_root
+    output = md.serializer(root)
+    start = output.find(f'<{md.doc_tag}>')
+    end = output.rfind(f'</{md.doc_tag}>')
+    output = output[start + len(md.doc_tag) + 2:end].strip() if start != -1 and end != -1 else ''
+    for pp in md.postprocessors:
+        output = pp.run(output)
+    return output.strip(), root
+
+
+# Pool compartido por toda la aplicación
+converter_pool = ConverterPool()
+
+
+# --------------------------------------------------------------------------
+# Renderizado incremental por bloques
+# --------------------------------------------------------------------------
+
+_FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_LIST_RE = re.compile(r'^ {0,3}(?:[-*+]|\d+[.)])\s')
+# Definiciones que afectan a otros bloques (referencias de enlaces y abreviaturas)
+_CONTEXT_RE = re.compile(r'^(?: {0,3}\[(?!\^)[^\]]+\]:[ \t]*\S.*|\*\[[^\]]+\]:.*)$', re.MULTILINE)
+# Construcciones que sólo se resuelven sobre el documento completo
+_WHOLE_DOC_RE = re.compile(r'^(?:\[\^[^\]]+\]:|\[TOC\][ \t]*$)', re.MULTILINE)
+
+
+def _closes_fence(fence, line):
+    m = _FENCE_RE.match(line)
+    return (
+        m is not None
+        and m.group(1)[0] == fence[0]
+        and len(m.group(1)) >= len(fence)
+        and not line[m.end():].strip()
+    )
+
+
+def split_blocks(text):
+    """Dividir el documento en bloques Markdown de primer nivel.
+
+    Devuelve una lista de tuplas ``(linea_inicio, linea_fin)`` (fin exclusivo).
+    Los bloques se separan por líneas en blanco fuera de bloques de código,
+    salvo que la siguiente línea continúe el bloque (sangría o lista).
+    """
+    lines = text.split('\n')
+    blocks = []
+    start = None
+    last = None
+    fence = None
+    is_list = False
+
+    for i, line in enumerate(lines):
+        if fence is not None:
+            if _closes_fence(fence, line):
+                fence = None
+            last = i
+            continue
+
+        if not line.strip():
+            continue
+
+        if start is not None and last < i - 1:
+            continues = line[0] in ' \t' or (is_list and _LIST_RE.match(line))
+            if not continues:
+                blocks.append((start, last + 1))
+                start = None
+
+        if start is None:
+            start = i
+            is_list = bool(_LIST_RE.match(line))
+
+        m = _FENCE_RE.match(line)
+        if m:
+            fence = m.group(1)
+        last = i
+
+    if start is not None:
+        blocks.append((start, last + 1))
+    return lines, blocks
+
+
+def diff_blocks(old_keys, new_keys):
+    """Calcular el rango cambiado entre dos secuencias de claves de bloque.
+
+    Devuelve ``(inicio, eliminados, fin_nuevo)``: hay que sustituir
+    ``old_keys[inicio:inicio + eliminados]`` por ``new_keys[inicio:fin_nuevo]``.
+    """
+    limit = min(len(old_keys), len(new_keys))
+    prefix = 0
+    while prefix < limit and old_keys[prefix] == new_keys[prefix]:
+        prefix += 1
+    suffix = 0
+    while (suffix < limit - prefix
+           and old_keys[-1 - suffix] == new_keys[-1 - suffix]):
+        suffix += 1
+    return prefix, len(old_keys) - prefix - suffix, len(new_keys) - suffix
+
+
+class RenderCancelled(Exception):
+    """El renderizado se abandonó porque el documento cambió mientras tanto"""
+
+
+class RenderResult:
+    """Resultado de un renderizado por bloques"""
+
+    __slots__ = ('keys', 'blocks', 'lines', 'rendered', 'elapsed')
+
+    def __init__(self, keys, blocks, lines, rendered, elapsed=0.0):
+        self.keys = keys            # claves (hash de contenido) de cada bloque
+        self.blocks = blocks        # HTML de cada bloque, ya envuelto
+        self.lines = lines          # (linea_inicio, linea_fin) de cada bloque
+        self.rendered = rendered    # bloques convertidos en esta pasada
+        self.elapsed = elapsed      # segundos empleados en el renderizado
+
+    def html(self):
+        return ''.join(self.blocks)
+
+
+class BlockRenderer:
+    """Renderizador que sólo convierte los bloques cuyo contenido cambió.
+
+    Cada bloque se identifica por el hash de su texto (más las definiciones
+    de referencias del documento, que pueden afectarle). El HTML de los
+    bloques del último documento se conserva para la siguiente pasada.
+    """
+
+    def __init__(self, pool=None, extensions=DEFAULT_EXTENSIONS):
+        self.pool = pool or converter_pool
+        self.extensions = extensions
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _hash(*parts):
+        h = hashlib.blake2b(digest_size=12)
+        for part in parts:
+            h.update(part.encode('utf-8', 'surrogatepass'))
+        return h.hexdigest()
+
+    def _wrap(self, html):
+        return f'<div class="md-block">{html}</div>'
+
+    def render(self, text, cancelled=None):
+        """Renderizar ``text`` reutilizando los bloques ya convertidos.
+
+        ``cancelled`` es un callable opcional que se consulta entre bloques;
+        si devuelve True se lanza RenderCancelled conservando en caché los
+        bloques ya convertidos.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            cache = dict(self._cache)
+
+        if _WHOLE_DOC_RE.search(text):
+            # Notas al pie y [TOC] dependen del documento completo
+            lines = text.split('\n')
+            spans = [(0, len(lines))]
+            sources = [text]
+            context = ''
+        else:
+            lines, spans = split_blocks(text)
+            sources = ['\n'.join(lines[s:e]) for s, e in spans]
+            context = '\n'.join(m.group(0) for m in _CONTEXT_RE.finditer(text))
+
+        context_key = self._hash(context) if context else ''
+        keys = []
+        blocks = []
+        rendered = 0
+        new_cache = {}
+        for source in sources:
+            key = self._hash(context_key, source)
+            html = new_cache.get(key) or cache.get(key)
+            if html is None:
+                if cancelled is not None and cancelled():
+                    with self._lock:
+                        self._cache.update(new_cache)
+                    raise RenderCancelled()
+                body = f'{source}\n\n{context}' if context else source
+                html = self._wrap(self.pool.convert(body, self.extensions))
+                rendered += 1
+            new_cache[key] = html
+            keys.append(key)
+            blocks.append(html)
+
+        with self._lock:
+            self._cache = new_cache
+        return RenderResult(keys, blocks, spans, rendered, time.perf_counter() - started)
+
+    def seed(self, result):
+        """Precargar los bloques de un renderizado previo (p. ej. desde disco)"""
+        with self._lock:
+            self._cache.update(zip(result.keys, result.blocks))
+
+    def clear(self):
+        with self._lock:
+            self._cache = {}
+
+
+# --------------------------------------------------------------------------
+# Programación del preview
+# --------------------------------------------------------------------------
+
+class AdaptiveDebounce:
+    """Retardo de actualización del preview adaptado al coste medido.
+
+    El retardo crece con el coste reciente de renderizado y con el intervalo
+    entre pulsaciones (para renderizar en las pausas), siempre entre
+    ``min_delay`` y ``max_delay`` milisegundos. Si se sigue escribiendo sin
+    pausa, el retardo se acorta para que el preview no se quede más de
+    ``budget`` milisegundos por detrás del texto.
+    """
+
+    def __init__(self, min_delay=60, max_delay=1500, budget=1000, alpha=0.3):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget = budget / 1000.0
+        self.alpha = alpha
+        self.render_cost = 0.05
+        self.key_interval = None
+        self._last_key = None
+        self._pending_since = None
+
+    def _ewma(self, current, sample):
+        if current is None:
+            return sample
+        return current + self.alpha * (sample - current)
+
+    def record_keystroke(self, now):
+        """Registrar una edición (``now`` en segundos monotónicos)"""
+        if self._last_key is not None:
+            gap = now - self._last_key
+            # Las pausas largas no cuentan como ritmo de escritura
+            if gap < 2.0:
+                self.key_interval = self._ewma(self.key_interval, gap)
+        self._last_key = now
+        if self._pending_since is None:
+            self._pending_since = now
+
+    def record_render(self, seconds):
+        """Registrar la duración de un renderizado"""
+        self.render_cost = self._ewma(self.render_cost, seconds)
+
+    def render_started(self):
+        """Las ediciones pendientes pasan a estar en el renderizado en curso"""
+        self._pending_since = None
+
+    def overdue(self, now):
+        """Indicar si el preview ya agotó el presupuesto de retraso"""
+        if self._pending_since is None:
+            return False
+        slack = self.min_delay / 1000.0
+        return now - self._pending_since + self.render_cost + slack >= self.budget
+
+    def next_delay(self, now):
+        """Milisegundos a esperar antes del próximo renderizado.
+        Con ediciones pendientes nunca se pasa del plazo del presupuesto (ni
+        por ``min_delay``): cada pulsación reinicia el temporizador, pero no
+        puede retrasar el renderizado más allá de ese plazo.
+        """
+        delay = 2.0 * self.render_cost
+        if self.key_interval is not None:
+            delay = max(delay, 1.5 * self.key_interval)
+        delay_ms = max(self.min_delay, min(self.max_delay, int(delay * 1000)))
+        if self._pending_since is not None:
+            remaining = self._pending_since + self.budget - self.render_cost - now
+            delay_ms = max(0, min(delay_ms, int(remaining * 1000)))
+        return delay_ms
+
+
+# --------------------------------------------------------------------------
+# Documento HTML y página base del preview
+# --------------------------------------------------------------------------
+
+# Versión de la hoja de estilos; cambiarla invalida el HTML cacheado
+CSS_VERSION = 1
+
+PREVIEW_CSS = """
+body {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    line-height: 1.6;
+    color: #333;
+    max-width: 900px;
+    margin: 20px auto;
+    padding: 20px;
+    background-color: #f9f9f9;
+}
+h1, h2, h3, h4, h5, h6 {
+    color: #2c3e50;
+    margin-top: 24px;
+    margin-bottom: 16px;
+    font-weight: 600;
+    line-height: 1.25;
+}
+h1 {
+    font-size: 2em;
+    border-bottom: 2px solid #eaecef;
+    padding-bottom: 0.3em;
+}
+h2 {
+    font-size: 1.5em;
+    border-bottom: 1px solid #eaecef;
+    padding-bottom: 0.3em;
+}
+h3 { font-size: 1.25em; }
+h4 { font-size: 1em; }
+h5 { font-size: 0.875em; }
+h6 { font-size: 0.85em; color: #6a737d; }
+
+p {
+    margin-bottom: 16px;
+}
+
+code {
+    background-color: #f6f8fa;
+    padding: 2px 6px;
+    border-radius: 3px;
+    font-family: 'Consolas', 'Monaco', monospace;
+    font-size: 0.9em;
+}
+
+pre {
+    background-color: #f6f8fa;
+    padding: 16px;
+    border-radius: 6px;
+    overflow-x: auto;
+    margin-bottom: 16px;
+}
+
+pre code {
+    background-color: transparent;
+    padding: 0;
+}
+
+blockquote {
+    border-left: 4px solid #dfe2e5;
+    padding-left: 16px;
+    color: #6a737d;
+    margin-left: 0;
+}
+
+table {
+    border-collapse: collapse;
+    width: 100%;
+    margin-bottom: 16px;
+}
+
+table th, table td {
+    border: 1px solid #dfe2e5;
+    padding: 8px 12px;
+    text-align: left;
+}
+
+table th {
+    background-color: #f6f8fa;
+    font-weight: 600;
+}
+
+table tr:nth-child(even) {
+    background-color: #f9f9f9;
+}
+
+ul, ol {
+    padding-left: 2em;
+    margin-bottom: 16px;
+}
+
+li {
+    margin-bottom: 4px;
+}
+
+a {
+    color: #0366d6;
+    text-decoration: none;
+}
+
+a:hover {
+    text-decoration: underline;
+}
+
+img {
+    max-width: 100%;
+    height: auto;
+}
+
+hr {
+    border: 0;
+    border-top: 2px solid #eaecef;
+    margin: 24px 0;
+}
+"""
+
+_HTML_HEAD = (
+    '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="UTF-8">\n'
+    '<style>' + PREVIEW_CSS + '</style>\n</head>\n<body>\n'
+)
+_HTML_TAIL = '\n</body>\n</html>\n'
+
+# Script del preview: sustituye un rango de bloques sin recargar la página
+PREVIEW_SCRIPT = """
+<script>
+window.mdPatch = function (start, removeCount, blocks) {
+    var root = document.getElementById('md-content');
+    var ref = root.children[start + removeCount] || null;
+    for (var i = 0; i < removeCount; i++) {
+        root.removeChild(root.children[start]);
+    }
+    var tpl = document.createElement('template');
+    tpl.innerHTML = blocks.join('');
+    root.insertBefore(tpl.content, ref);
+};
+window.mdScrollToHeading = function (base, occurrence) {
+    // Los ids repetidos llevan sufijo _N, salvo entre bloques renderizados por separado
+    var nodes = document.querySelectorAll('h1[id], h2[id], h3[id], h4[id], h5[id], h6[id]');
+    var seen = 0;
+    for (var i = 0; i < nodes.length; i++) {
+        var id = nodes[i].id;
+        var suffix = id.slice(base.length + 1);
+        var match = id === base || (id.indexOf(base + '_') === 0 && /^[0-9]+$/.test(suffix));
+        if (match && seen++ === occurrence) {
+            nodes[i].scrollIntoView();
+            return;
+        }
+    }
+};
+window.mdScrollToBlock = function (index, fraction) {
+    var node = document.getElementById('md-content').children[index];
+    if (node) {
+        var rect = node.getBoundingClientRect();
+        window.scrollTo(0, window.scrollY + rect.top + fraction * rect.height);
+    }
+};
+document.addEventListener('click', function (event) {
+    // Informar al editor del bloque pulsado (los enlaces siguen funcionando)
+    if (event.target.closest('a')) {
+        return;
+    }
+    var root = document.getElementById('md-content');
+    var node = event.target;
+    while (node && node.parentNode !== root) {
+        node = node.parentNode;
+    }
+    if (!node) {
+        return;
+    }
+    var index = Array.prototype.indexOf.call(root.children, node);
+    var rect = node.getBoundingClientRect();
+    var fraction = rect.height > 0 ? (event.clientY - rect.top) / rect.height : 0;
+    window.location.href = 'mdviewer:block/' + index + '/' + fraction.toFixed(3);
+});
+</script>
+"""
+
+# Esquema de las URL con las que el preview notifica clics (ver PREVIEW_SCRIPT)
+PREVIEW_SCHEME = 'mdviewer'
+
+
+def build_html_document(body, script=''):
+    """Envolver contenido HTML en un documento completo con la hoja de estilos"""
+    return ''.join((_HTML_HEAD, body, script, _HTML_TAIL))
+
+
+def markdown_to_html(markdown_text, timings=None):
+    """Convertir un documento Markdown completo a HTML con estilo"""
+    if timings is None:
+        timings = Timings('markdown_to_html')
+    # Conversor reutilizado del pool (extensiones ya registradas)
+    with instrumentation.activate(timings), timings.stage('parse'):
+        html_content = converter_pool.convert(markdown_text)
+    timings.exclude('parse', 'highlight')
+    with timings.stage('wrap'):
+        return build_html_document(html_content)
+
+
+# Página base del preview: se carga una sola vez y luego sólo se parchean bloques
+PREVIEW_SHELL = build_html_document('<div id="md-content"></div>', PREVIEW_SCRIPT)
@@ -0,0 +1,291 @@
+"""
+Exportación a PDF con Qt WebEngine como trabajo asíncrono
+Cada exportación prepara el HTML completo del documento en un hilo de
+trabajo, lo carga en una página oculta (sin vista, de modo que el preview
+visible no se vuelve a dibujar) y espera a que Chromium termine de escribir
+el archivo (``pdfPrintingFinished``). Si WebEngine falla o no responde se
+genera el PDF con el exportador nativo (ReportLab), también fuera del hilo
+de la interfaz. Las exportaciones pedidas mientras tanto esperan en cola.
+Ambos exportadores escriben en un temporal junto al destino que sólo se
+renombra sobre él al terminar bien: una impresión de Chromium que acaba
+tarde no puede pisar el PDF generado por el método nativo.
+"""
+
+import logging
+import os
+import tempfile
+import time
+from collections import deque
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, QUrl, pyqtSignal
+from PyQt6.QtWebEngineCore import QWebEnginePage
+
+import exporters
+from file_saver import remove_temp, replace_file, temp_path
+from instrumentation import instrumentation
+from markdown_ir import document_cache
+from markdown_render import build_html_document
+
+# Tiempo máximo (ms) para cargar e imprimir un documento antes de usar el método nativo
+JOB_TIMEOUT = 120000
+
+# Etapas de un trabajo, tal como se muestran en la barra de estado
+STAGE_LABELS = {
+    'prepare': "preparando",
+    'load': "maquetando",
+    'print': "imprimiendo",
+    'native': "generando con ReportLab",
+}
+
+logger = logging.getLogger(__name__)
+
+
+class PdfJob:
+    """Exportación pendiente o en curso.
+    Al terminar, ``method`` indica qué exportador generó el archivo
+    ('webengine' o 'native'), ``error`` es None si se generó y
+    ``webengine_error`` explica por qué se recurrió al nativo.
+    """
+
+    def __init__(self, path, snapshot):
+        self.path = path
+        self.snapshot = snapshot
+        self.markdown_text = None
+        self.timings = instrumentation.begin('export_to_pdf', path=path)
+        self.stage = None
+        self.html_path = None
+        self.print_path = None    # temporal en el que imprime WebEngine
+        self.method = 'webengine'
+        self.error = None
+        self.webengine_error = None
+
+
+class _JobSignals(QObject):
+    finished = pyqtSignal()
+
+
+class _PrepareTask(QRunnable):
+    """Parsear el documento y escribir su HTML en un archivo temporal.
+    La página se carga desde archivo: ``setHtml`` no admite más de 2 MB.
+    """
+
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+        self.signals = _JobSignals()
+
+    def run(self):
+        job = self.job
+        try:
+            with job.timings.stage('extract'):
+                job.markdown_text = job.snapshot.text()
+            document = document_cache.get(job.markdown_text, job.timings)
+            with job.timings.stage('wrap'):
+                fd, path = tempfile.mkstemp(prefix='mdviewer-pdf-', suffix='.html')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(build_html_document(document.html))
+            job.html_path = path
+        except Exception as e:
+            job.error = str(e)
+        self.signals.finished.emit()
+
+
+class _NativeTask(QRunnable):
+    """Generar el PDF con ReportLab"""
+
+    def __init__(self, job):
+        super().__init__()
+        self.job = job
+        self.signals = _JobSignals()
+
+    def run(self):
+        job = self.job
+        try:
+            if job.markdown_text is None:
+                job.markdown_text = job.snapshot.text()
+            path = temp_path(job.path)
+            try:
+                exporters.write_pdf_native(job.markdown_text, path, job.timings)
+                replace_file(path, job.path)
+            except BaseException:
+                remove_temp(path)
+                raise
+        except Exception as e:
+            job.error = str(e)
+        self.signals.finished.emit()
+
+
+class PdfExportQueue(QObject):
+    """Cola de exportaciones a PDF que se procesan de una en una.
+
+    Emite ``progress(ruta, etapa, pendientes)`` al cambiar de etapa y
+    ``finished(job)`` cuando el archivo está escrito (o falló también el
+    método nativo). La página de WebEngine se crea con la primera
+    exportación y se reutiliza.
+    """
+    progress = pyqtSignal(str, str, int)
+    finished = pyqtSignal(object)
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self._pool = pool if pool is not None else QThreadPool.globalInstance()
+        self._page = None
+        self._jobs = deque()
+        self._current = None
+        self._stage_started = 0.0
+        self._timeout = QTimer(self)
+        self._timeout.setSingleShot(True)
+        self._timeout.timeout.connect(self._on_timeout)
+
+    def submit(self, path, snapshot):
+        """Encolar la exportación a ``path`` de una instantánea del documento"""
+        job = PdfJob(path, snapshot)
+        self._jobs.append(job)
+        self._start_next()
+        return job
+
+    def pending(self):
+        """Exportaciones sin terminar, incluida la que está en curso"""
+        return len(self._jobs) + (self._current is not None)
+
+    def cancel_pending(self):
+        """Descartar las exportaciones que aún no han empezado"""
+        self._jobs.clear()
+
+    def _page_or_none(self):
+        if self._page is None:
+            try:
+                page = QWebEnginePage(self)
+            except Exception as e:
+                logger.warning("Qt WebEngine no disponible para exportar: %s", e)
+                return None
+            page.loadFinished.connect(self._on_loaded)
+            page.pdfPrintingFinished.connect(self._on_printed)
+            self._page = page
+        return self._page
+
+    def _set_stage(self, job, stage):
+        job.stage = stage
+        self._stage_started = time.perf_counter()
+        self.progress.emit(job.path, STAGE_LABELS[stage], self.pending())
+
+    def _end_stage(self, job):
+        job.timings.add(job.stage, time.perf_counter() - self._stage_started)
+
+    def _start_next(self):
+        if self._current is not None or not self._jobs:
+            return
+        job = self._current = self._jobs.popleft()
+        self._set_stage(job, 'prepare')
+        task = _PrepareTask(job)
+        task.signals.finished.connect(lambda: self._on_prepared(job))
+        self._pool.start(task)
+
+    def _on_prepared(self, job):
+        if job is not self._current:
+            return
+        if job.error is not None:
+            self._fallback(job)
+            return
+        page = self._page_or_none()
+        if page is None:
+            job.error = "Qt WebEngine no está disponible"
+            self._fallback(job)
+            return
+        self._set_stage(job, 'load')
+        self._timeout.start(JOB_TIMEOUT)
+        page.load(QUrl.fromLocalFile(job.html_path))
+
+    def _on_loaded(self, ok):
+        job = self._current
+        if job is None or job.stage != 'load':
+            return
+        self._end_stage(job)
+        if not ok:
+            job.error = "No se pudo cargar el documento en WebEngine"
+            self._fallback(job)
+            return
+        try:
+            job.print_path = temp_path(job.path)
+        except OSError as e:
+            job.error = f"No se pudo crear el archivo temporal: {e}"
+            self._fallback(job)
+            return
+        self._set_stage(job, 'print')
+        self._page.printToPdf(job.print_path)
+
+    def _on_printed(self, path, ok):
+        job = self._current
+        if job is None or job.stage != 'print' or path != job.print_path:
+            return
+        self._end_stage(job)
+        if ok and os.path.exists(path) and os.path.getsize(path) > 0:
+            try:
+                replace_file(path, job.path)
+            except OSError as e:
+                job.error = f"No se pudo escribir el PDF: {e}"
+                self._fallback(job)
+                return
+            job.print_path = None
+            self._finish(job)
+        else:
+            job.error = "Qt WebEngine no pudo generar el PDF"
+            self._fallback(job)
+
+    def _on_timeout(self):
+        job = self._current
+        if job is None or job.stage not in ('load', 'print'):
+            return
+        self._end_stage(job)
+        job.error = "Qt WebEngine no respondió a tiempo"
+        # Una página bloqueada no sirve para las siguientes exportaciones. Se
+        # libera tras otro plazo; si entretanto Chromium termina de imprimir,
+        # se borra el temporal que escriba
+        page, self._page = self._page, None
+        page.loadFinished.disconnect(self._on_loaded)
+        page.pdfPrintingFinished.disconnect(self._on_printed)
+        page.pdfPrintingFinished.connect(lambda path, ok: remove_temp(path))
+        QTimer.singleShot(JOB_TIMEOUT, page.deleteLater)
+        self._fallback(job)
+
+    def _fallback(self, job):
+        """Repetir la exportación con ReportLab"""
+        self._timeout.stop()
+        logger.warning("La exportación con WebEngine falló, usando método nativo: %s", job.error)
+        self._discard_print(job)
+        job.webengine_error = job.error
+        job.error = None
+        job.method = 'native'
+        self._set_stage(job, 'native')
+        task = _NativeTask(job)
+        task.signals.finished.connect(lambda: self._finish(job))
+        self._pool.start(task)
+
+    @staticmethod
+    def _discard_print(job):
+        """Borrar el temporal de WebEngine; si Chromium lo escribe después, nadie lo usa"""
+        if job.print_path is not None:
+            remove_temp(job.print_path)
+            job.print_path = None
+
+    def _finish(self, job):
+        if job is not self._current:
+            return
+        self._timeout.stop()
+        self._discard_print(job)
+        if job.html_path is not None:
+            try:
+                os.remove(job.html_path)
+            except OSError:
+                pass
+        job.stage = 'done'
+        job.snapshot = job.markdown_text = None
+        job.timings.meta['method'] = job.method
+        if job.webengine_error is not None:
+            job.timings.meta['webengine_error'] = job.webengine_error
+        if job.error is not None:
+            job.timings.meta['error'] = job.error
+        instrumentation.finish(job.timings)
+        self._current = None
+        self.finished.emit(job)
+        self._start_next()
@@ -0,0 +1,37 @@
+"""
+Procesos de trabajo sin interfaz
+Los procesos ``spawn`` importan el módulo principal del padre antes de
+ejecutar ninguna tarea; lanzados desde la interfaz cargarían MarkdownViewer
+con PyQt6 y WebEngine. Mientras se crean, este módulo (sin Qt) hace de módulo
+principal, así que cada proceso sólo importa lo que necesitan sus tareas.
+Las tareas deben ser funciones de módulos que tampoco importen Qt.
+"""
+
+import importlib.util
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Límite de procesos de ProcessPoolExecutor en Windows
+MAX_WORKERS = 61
+
+
+def spawn_pool(max_workers=None):
+    """ProcessPoolExecutor (spawn) con todos sus procesos ya arrancados"""
+    workers = max_workers or min(os.cpu_count() or 1, MAX_WORKERS)
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    main = sys.modules['__main__']
+    spec = getattr(main, '__spec__', None)
+    # multiprocessing pasa a los procesos el módulo principal por su __spec__
+    main.__spec__ = importlib.util.find_spec(__name__)
+    try:
+        # Los procesos se crean al enviar las primeras tareas
+        for future in [executor.submit(os.getpid) for _ in range(workers)]:
+            future.result()
+    except BaseException:
+        executor.shutdown(cancel_futures=True)
+        raise
+    finally:
+        main.__spec__ = spec
+    return executor
@@ -0,0 +1,51 @@
+from markdown_render import AdaptiveDebounce
+
+
+def simulate_typing(debounce, interval, duration, render_cost):
+    """Pulsaciones cada ``interval`` s durante ``duration`` s con un temporizador
+    de un disparo que cada pulsación reinicia, como on_text_changed.
+    Devuelve los instantes en que empezó cada renderizado."""
+    renders = []
+    now = 0.0
+    deadline = None
+    while now < duration:
+        # El temporizador vence antes de la siguiente pulsación
+        if deadline is not None and deadline <= now:
+            renders.append(deadline)
+            debounce.render_started()
+            debounce.record_render(render_cost)
+            deadline = None
+        debounce.record_keystroke(now)
+        deadline = now + debounce.next_delay(now) / 1000.0
+        now += interval
+    return renders
+
+
+def test_rapid_typing_renders_within_budget():
+    debounce = AdaptiveDebounce(budget=1000)
+    renders = simulate_typing(debounce, interval=0.04, duration=4.0, render_cost=0.05)
+    assert renders, "escribiendo sin pausa no se llegó a renderizar"
+    # El preview nunca se queda más atrás que el presupuesto
+    gaps = [b - a for a, b in zip([0.0] + renders, renders)]
+    assert max(gaps) <= 1.0 + 1e-9
+    assert 4.0 - renders[-1] <= 1.0
+
+
+def test_key_repeat_faster_than_min_delay_still_renders():
+    debounce = AdaptiveDebounce(min_delay=60, budget=300)
+    renders = simulate_typing(debounce, interval=0.02, duration=2.0, render_cost=0.01)
+    assert len(renders) >= 5
+
+
+def test_delay_never_exceeds_remaining_budget():
+    debounce = AdaptiveDebounce(min_delay=60, budget=1000)
+    debounce.record_keystroke(10.0)
+    assert debounce.next_delay(10.99) == 0
+    assert debounce.next_delay(10.9) <= 50
+
+
+def test_pause_between_keystrokes_uses_min_delay():
+    debounce = AdaptiveDebounce(min_delay=60)
+    debounce.render_cost = 0.001
+    debounce.record_keystroke(0.0)
+    assert debounce.next_delay(0.0) == 60
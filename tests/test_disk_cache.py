@@ -0,0 +1,80 @@
+import gzip
+import os
+
+from disk_cache import RenderCache
+from markdown_render import RenderResult
+
+
+def make_result(text):
+    return RenderResult(['k'], [text], [(0, 1)], 1)
+
+
+def cache_size(directory):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(directory) for name in files)
+
+
+def test_store_and_load_roundtrip(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    key = cache.make_key("# Hola")
+    cache.store(key, make_result("<h1>Hola</h1>"))
+    result = cache.load(key)
+    assert result.blocks == ["<h1>Hola</h1>"]
+    assert result.lines == [(0, 1)]
+
+
+def test_store_tracks_size_without_rescanning(tmp_path, monkeypatch):
+    cache = RenderCache(str(tmp_path))
+    cache.store(cache.make_key("a"), make_result("a"))
+    # Tras el primer recuento no se vuelve a recorrer el directorio
+    scans = []
+    original = cache._scan
+    monkeypatch.setattr(cache, '_scan', lambda: scans.append(1) or original())
+    for i in range(20):
+        cache.store(cache.make_key(str(i)), make_result(str(i) * 100))
+    # Sobrescribir una entrada no la cuenta dos veces
+    cache.store(cache.make_key("0"), make_result("0" * 100))
+    assert scans == []
+    assert cache._total == cache_size(tmp_path)
+
+
+def test_eviction_keeps_cache_under_limit(tmp_path):
+    cache = RenderCache(str(tmp_path), max_bytes=4000)
+    for i in range(100):
+        cache.store(cache.make_key(str(i)), make_result(os.urandom(100).hex()))
+    assert cache_size(tmp_path) <= 4000
+    assert cache._total == cache_size(tmp_path)
+
+
+def test_write_failure_is_logged(tmp_path, caplog):
+    blocker = tmp_path / 'fichero'
+    blocker.write_text('x')
+    cache = RenderCache(str(blocker))
+    cache.store(cache.make_key("a"), make_result("a"))
+    assert "No se pudo escribir la caché" in caplog.text
+
+
+def test_truncated_entry_is_discarded(tmp_path, caplog):
+    cache = RenderCache(str(tmp_path))
+    key = cache.make_key("# Hola")
+    cache.store(key, make_result("<h1>Hola</h1>" * 100))
+    path = cache._path(key)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:len(data) // 2])
+    assert cache.load(key) is None
+    assert "dañada" in caplog.text
+    assert not os.path.exists(path)
+
+
+def test_entry_without_keys_is_discarded(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    key = cache.make_key("# Hola")
+    cache.store(key, make_result("x"))
+    path = cache._path(key)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write('{"blocks": []}')
+    assert cache.load(key) is None
+    assert not os.path.exists(path)
+    assert cache.load(cache.make_key("otro")) is None
@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from document_model import MAX_PIECES, SMALL_PIECE, PieceTable
+
+
+def check(table, oracle):
+    """Comparar la tabla y una instantánea suya con el texto de referencia"""
+    assert len(table) == len(oracle)
+    snapshot = table.snapshot()
+    assert snapshot.text() == oracle
+    assert ''.join(snapshot.chunks()) == oracle
+    assert snapshot.line_count() == oracle.count('\n') + 1
+
+
+def test_random_edits_match_string_oracle():
+    rng = random.Random(1234)
+    oracle = "primera línea\nsegunda\n" * 50
+    table = PieceTable(oracle)
+    for _ in range(3000):
+        position = rng.randint(0, len(oracle))
+        removed = rng.randint(0, min(8, len(oracle) - position))
+        inserted = rng.choice(['', 'a', 'xyz', '\n', 'línea\nnueva', 'ñ' * rng.randint(1, 20)])
+        table.replace(position, removed, inserted)
+        oracle = oracle[:position] + inserted + oracle[position + removed:]
+        assert len(table) == len(oracle)
+    check(table, oracle)
+
+
+def test_slice_and_lines_match_oracle():
+    rng = random.Random(99)
+    oracle = ''.join(f"línea {i}\n" for i in range(200))
+    table = PieceTable(oracle)
+    for _ in range(300):
+        position = rng.randint(0, len(oracle))
+        inserted = 'x\n' if rng.random() < 0.3 else 'x'
+        table.replace(position, 0, inserted)
+        oracle = oracle[:position] + inserted + oracle[position:]
+    snapshot = table.snapshot()
+    lines = oracle.split('\n')
+    for _ in range(200):
+        a = rng.randint(0, len(oracle))
+        b = rng.randint(a, len(oracle))
+        assert snapshot.slice(a, b) == oracle[a:b]
+        start = rng.randint(0, len(lines) - 1)
+        end = rng.randint(start, len(lines))
+        assert snapshot.lines(start, end) == lines[start:end]
+    assert snapshot.lines(len(lines) - 1) == [lines[-1]]
+
+
+def test_sequential_typing_grows_small_piece():
+    table = PieceTable("base\n")
+    oracle = "base\n"
+    for _ in range(SMALL_PIECE + 10):
+        table.replace(len(oracle), 0, 'a')
+        oracle += 'a'
+    check(table, oracle)
+    # La pieza anterior se amplía hasta SMALL_PIECE y luego empieza otra
+    sizes = [e - s for _, s, e in table._pieces]
+    assert sizes == [SMALL_PIECE, len(oracle) - SMALL_PIECE]
+
+
+def test_compaction_after_max_pieces():
+    oracle = 'x' * (4 * MAX_PIECES)
+    table = PieceTable(oracle)
+    # Inserciones en mitad de piezas: cada una añade dos piezas
+    position = 1
+    while True:
+        before = len(table._pieces)
+        table.replace(position, 0, '|')
+        oracle = oracle[:position] + '|' + oracle[position:]
+        position += 3
+        if len(table._pieces) < before:
+            break
+        assert len(table._pieces) <= MAX_PIECES
+    # Al pasar de MAX_PIECES se compacta en un solo fragmento
+    assert len(table._pieces) == 1
+    check(table, oracle)
+
+
+def test_snapshots_stay_immutable():
+    table = PieceTable("hola mundo\n")
+    first = table.snapshot()
+    table.replace(5, 5, "a todos")
+    second = table.snapshot()
+    table.replace(0, len(table), "")
+    table.replace(0, 0, "otro texto")
+    for _ in range(MAX_PIECES + 10):
+        table.replace(1, 0, "z")
+    assert first.text() == "hola mundo\n"
+    assert first.revision == 0
+    assert second.text() == "hola a todos\n"
+    assert second.lines(0) == ["hola a todos"]
+    assert table.text() == "o" + "z" * (MAX_PIECES + 10) + "tro texto"
+
+
+def test_deltas_reach_listeners():
+    table = PieceTable("abc")
+    deltas = []
+    table.subscribe(lambda *delta: deltas.append(delta))
+    table.replace(1, 1, "XY")
+    table.set_text("nuevo")
+    assert deltas == [(1, 1, "XY", 1), (0, 4, "nuevo", 2)]
+
+
+def test_out_of_range_delta_is_rejected():
+    table = PieceTable("abc")
+    with pytest.raises(ValueError):
+        table.replace(2, 5, "")
+    with pytest.raises(ValueError):
+        table.replace(4, 0, "x")
+    assert table.text() == "abc"
+    assert table.revision == 0
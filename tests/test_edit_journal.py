@@ -0,0 +1,117 @@
+import os
+
+import pytest
+
+from document_model import PieceTable
+from edit_journal import EditJournal, JournalError, load_journal, remove_journal
+
+
+def edit(table, journal, position, removed, inserted):
+    table.replace(position, removed, inserted)
+    journal.record(table.revision, position, removed, inserted)
+
+
+def test_replay_with_text_base(tmp_path):
+    table = PieceTable("# Título\n\nTexto inicial\n")
+    journal = EditJournal(str(tmp_path / 'a.journal'), None)
+    base = EditJournal.text_base(None, table.revision, table.snapshot())
+    journal.write(base, [])
+    edit(table, journal, 2, 6, "Encabezado")
+    edit(table, journal, len(table), 0, "línea nueva\n")
+    journal.append(journal.pending())
+    edit(table, journal, 0, 1, "##")
+    journal.append(journal.pending())
+
+    recovered = load_journal(journal.path)
+    assert recovered.path is None
+    assert recovered.text == table.text()
+    assert recovered.edits == 3
+    assert recovered.complete
+
+
+def test_replay_with_file_base(tmp_path):
+    document = tmp_path / 'doc.md'
+    document.write_text("uno\ndos\n", encoding='utf-8')
+    table = PieceTable("uno\ndos\n")
+    journal = EditJournal(str(tmp_path / 'b.journal'), None)
+    journal.write(EditJournal.file_base(str(document), table.revision), [])
+    edit(table, journal, 4, 3, "DOS")
+    journal.append(journal.pending())
+
+    recovered = load_journal(journal.path)
+    assert recovered.path == str(document)
+    assert recovered.text == "uno\nDOS\n"
+    assert recovered.edits == 1
+
+    # Si el archivo base cambió, el diario ya no se puede reproducir
+    document.write_text("otro contenido\n", encoding='utf-8')
+    with pytest.raises(JournalError):
+        load_journal(journal.path)
+
+
+def test_rebase_keeps_later_edits(tmp_path):
+    table = PieceTable("abc")
+    journal = EditJournal(str(tmp_path / 'c.journal'), None)
+    journal.write(EditJournal.text_base(None, table.revision, table.snapshot()), [])
+    edit(table, journal, 3, 0, "d")
+    journal.append(journal.pending())
+    base, records = journal.rebase(EditJournal.text_base(None, table.revision, table.snapshot()))
+    edit(table, journal, 0, 1, "A")
+    journal.write(base, records + journal.pending())
+    recovered = load_journal(journal.path)
+    assert recovered.text == "Abcd"
+    assert recovered.edits == 1
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    table = PieceTable("hola")
+    journal = EditJournal(str(tmp_path / 'd.journal'), None)
+    journal.write(EditJournal.text_base(None, table.revision, table.snapshot()), [])
+    edit(table, journal, 4, 0, " mundo")
+    journal.append(journal.pending())
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"r": 2, "p": 0, "d"')
+    recovered = load_journal(journal.path)
+    assert recovered.text == "hola mundo"
+    assert recovered.complete
+
+
+def test_damaged_journal_is_reported(tmp_path, caplog):
+    table = PieceTable("hola")
+    journal = EditJournal(str(tmp_path / 'e.journal'), None)
+    journal.write(EditJournal.text_base(None, table.revision, table.snapshot()), [])
+    edit(table, journal, 4, 0, "!")
+    journal.append(journal.pending())
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"r": 2, "p": 99, "d": 0, "i": "x"}\n')
+    recovered = load_journal(journal.path)
+    assert recovered.text == "hola!"
+    assert not recovered.complete
+    assert "no válido" in caplog.text
+
+
+def test_write_errors_are_kept_for_the_window(tmp_path, caplog):
+    journal = EditJournal(str(tmp_path / 'no-existe' / 'f.journal'), None)
+    table = PieceTable("x")
+    journal.write(EditJournal.text_base(None, table.revision, table.snapshot()), [])
+    assert "Error al escribir el diario" in caplog.text
+    error = journal.take_error()
+    assert error.startswith("Error al escribir el diario")
+    assert journal.take_error() is None
+    assert not os.path.exists(journal.path)
+
+
+def test_remove_journal_tolerates_missing_and_unremovable_files(tmp_path, monkeypatch, caplog):
+    path = tmp_path / 'huerfano.journal'
+    path.write_text('{}\n')
+    remove_journal(str(path))
+    assert not path.exists()
+    # Otra instancia ya lo borró
+    remove_journal(str(path))
+
+    def denied(_):
+        raise PermissionError("solo lectura")
+    path.write_text('{}\n')
+    monkeypatch.setattr(os, 'unlink', denied)
+    remove_journal(str(path))
+    assert "No se pudo borrar el diario" in caplog.text
@@ -0,0 +1,75 @@
+import zipfile
+
+import docx
+
+import docx_writer
+import exporters
+import markdown_ir as ir
+
+ALIGNED_TABLE = """\
+| Izquierda | Centro | Derecha |
+|:----------|:------:|--------:|
+| a | b | c |
+| d | e |
+"""
+
+
+def test_table_aligns_are_parsed():
+    table = ir.parse_document(ALIGNED_TABLE).blocks[0]
+    assert ir.table_columns(table) == 3
+    assert ir.column_aligns(table, 3) == ['left', 'center', 'right']
+    assert ir.column_aligns(ir.Table((), ((),), ()), 2) == [None, None]
+
+
+def test_docx_keeps_column_alignment(tmp_path):
+    path = tmp_path / 'tabla.docx'
+    exporters.write_docx(ALIGNED_TABLE, str(path))
+    with zipfile.ZipFile(path) as f:
+        xml = f.read('word/document.xml').decode('utf-8')
+    # Cabecera y dos filas, cada una con una celda por columna
+    assert xml.count('<w:jc w:val="center"/>') == 3
+    assert xml.count('<w:jc w:val="right"/>') == 3
+    table = docx.Document(str(path)).tables[0]
+    assert [cell.text for cell in table.rows[2].cells] == ['d', 'e', '']
+
+
+def test_docx_object_model_keeps_column_alignment(tmp_path):
+    path = tmp_path / 'tabla.docx'
+    exporters.write_docx_object_model(ALIGNED_TABLE, str(path))
+    table = docx.Document(str(path)).tables[0]
+    aligns = [cell.paragraphs[0].alignment for cell in table.rows[1].cells]
+    assert aligns == [docx.enum.text.WD_ALIGN_PARAGRAPH.LEFT, docx.enum.text.WD_ALIGN_PARAGRAPH.CENTER,
+                      docx.enum.text.WD_ALIGN_PARAGRAPH.RIGHT]
+
+
+def test_pdf_cells_use_aligned_styles():
+    table = ir.parse_document(ALIGNED_TABLE).blocks[0]
+    flowable = next(exporters.pdf_flowables([table], 400))
+    styles = [[cell.style.name if cell else None for cell in row] for row in flowable._cellvalues]
+    assert styles[0] == ['CustomTableHeader', 'CustomTableHeader-center', 'CustomTableHeader-right']
+    assert styles[2] == ['BodyText', 'BodyText-center', 'BodyText-right']
+
+
+def test_empty_table_is_skipped(tmp_path):
+    empty = ir.Table((), (), ())
+    assert list(exporters.pdf_flowables([empty], 400)) == []
+    document = docx.Document()
+    exporters.docx_blocks(document, [empty])
+    assert document.tables == []
+
+
+def test_docx_writer_skips_empty_table(tmp_path):
+    path = tmp_path / 'vacia.docx'
+    docx_writer.write_blocks([ir.Paragraph((ir.Run('antes', 0, None),)), ir.Table((), (), ())], str(path))
+    document = docx.Document(str(path))
+    assert document.tables == []
+    assert [p.text for p in document.paragraphs] == ['antes']
+
+
+def test_docx_run_properties():
+    xml = docx_writer.runs_xml([ir.Run('x', ir.BOLD | ir.CODE, 'https://example.com'), ir.Run('y', 0, None)])
+    assert xml == (
+        '<w:r><w:rPr><w:rFonts w:ascii="Courier New" w:hAnsi="Courier New"/><w:b/>'
+        '<w:color w:val="0366D6"/><w:u w:val="single"/></w:rPr><w:t xml:space="preserve">x</w:t></w:r>'
+        '<w:r><w:t xml:space="preserve">y</w:t></w:r>'
+    )
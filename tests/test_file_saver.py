@@ -0,0 +1,59 @@
+import codecs
+import os
+import stat
+
+from file_loader import TextFileReader
+from file_saver import write_atomic
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_file_gets_same_mode_as_open(tmp_path):
+    plain = tmp_path / 'plain.md'
+    with open(plain, 'w'):
+        pass
+    saved = tmp_path / 'saved.md'
+    write_atomic(str(saved), ['# Hola\n'])
+    assert saved.read_text(encoding='utf-8') == '# Hola\n'
+    assert mode(saved) == mode(plain)
+
+
+def test_existing_file_keeps_its_mode(tmp_path):
+    path = tmp_path / 'privado.md'
+    path.write_text('antes')
+    os.chmod(path, 0o600)
+    write_atomic(str(path), ['después'])
+    assert path.read_text(encoding='utf-8') == 'después'
+    assert mode(path) == 0o600
+
+
+def test_symlink_target_is_replaced(tmp_path):
+    target = tmp_path / 'real.md'
+    target.write_text('antes')
+    link = tmp_path / 'enlace.md'
+    link.symlink_to(target)
+    write_atomic(str(link), ['después'])
+    assert link.is_symlink()
+    assert target.read_text(encoding='utf-8') == 'después'
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith('.tmp')] == []
+
+
+def test_file_is_saved_back_in_its_encoding(tmp_path):
+    text = 'Título ñ\nsegunda línea\n'
+    originals = [
+        text.encode('utf-8'),
+        codecs.BOM_UTF8 + text.encode('utf-8'),
+        codecs.BOM_UTF16_LE + text.encode('utf-16-le'),
+        codecs.BOM_UTF16_BE + text.encode('utf-16-be'),
+        codecs.BOM_UTF32_BE + text.encode('utf-32-be'),
+        text.encode('cp1252'),
+    ]
+    for i, data in enumerate(originals):
+        path = tmp_path / f'{i}.md'
+        path.write_bytes(data)
+        reader = TextFileReader(str(path))
+        assert reader.read() == text
+        write_atomic(str(path), [text], reader.write_encoding, reader.bom)
+        assert path.read_bytes() == data
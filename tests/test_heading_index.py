@@ -0,0 +1,86 @@
+import re
+
+import markdown
+
+from heading_index import HeadingIndex
+
+DOCUMENT = """\
+Introducción
+============
+
+Texto de la introducción.
+
+# Uso
+
+Uso
+---
+
+párrafo
+no es encabezado
+---
+
+```
+Dentro de código
+---
+```
+Tras la valla
+-------------
+
+# Uso
+"""
+
+
+def rendered_ids(text):
+    html = markdown.markdown(text, extensions=['fenced_code', 'toc', 'attr_list'])
+    return re.findall(r'<h\d id="([^"]+)"', html)
+
+
+def apply_edit(index, lines, first, removed, new):
+    """Aplicar un delta a las líneas y al índice como hace el editor"""
+    lines[first:first + removed] = new
+    index.update(first, removed, new, lines[max(0, first - 2):first])
+
+
+def test_setext_headings_match_rendered_ids():
+    index = HeadingIndex(DOCUMENT)
+    headings = index.headings()
+    assert [h.slug for h in headings] == rendered_ids(DOCUMENT)
+    assert [(h.level, h.text, h.line) for h in headings] == [
+        (1, 'Introducción', 0),
+        (1, 'Uso', 5),
+        (2, 'Uso', 7),
+        (2, 'Tras la valla', 18),
+        (1, 'Uso', 21),
+    ]
+    assert [h.occurrence for h in headings if h.base == 'uso'] == [0, 1, 2]
+
+
+def test_delta_updates_track_setext_headings():
+    lines = DOCUMENT.split('\n')
+    index = HeadingIndex(DOCUMENT)
+    # Texto delante del segundo "Uso": deja de empezar un bloque
+    apply_edit(index, lines, 6, 1, ['texto'])
+    # Separar "no es encabezado" del párrafo: ahora sí es un encabezado
+    apply_edit(index, lines, 11, 0, [''])
+    # Cambiar el texto subrayado y el subrayado de la introducción
+    apply_edit(index, lines, 0, 2, ['Presentación', '---'])
+    # Un subrayado nuevo tras una línea nueva al final
+    apply_edit(index, lines, len(lines) - 1, 1, ['', 'Final', '===', ''])
+    text = '\n'.join(lines)
+    assert index.headings() == HeadingIndex(text).headings()
+    assert [h.slug for h in index.headings()] == rendered_ids(text)
+    assert [h.text for h in index.headings()] == [
+        'Presentación', 'Uso', 'no es encabezado', 'Tras la valla', 'Uso', 'Final']
+
+
+def test_editing_text_line_updates_following_underline():
+    lines = ['', 'Título', '===', 'otro']
+    index = HeadingIndex('\n'.join(lines))
+    assert [h.text for h in index.headings()] == ['Título']
+    apply_edit(index, lines, 1, 1, ['Nuevo título'])
+    assert [h.text for h in index.headings()] == ['Nuevo título']
+    # Una línea de texto delante del encabezado lo convierte en párrafo
+    apply_edit(index, lines, 0, 1, ['texto'])
+    assert index.headings() == []
+    apply_edit(index, lines, 0, 1, [''])
+    assert [h.text for h in index.headings()] == ['Nuevo título']
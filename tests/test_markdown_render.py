@@ -0,0 +1,76 @@
+from markdown_render import BlockRenderer, diff_blocks, split_blocks
+
+
+def spans(text):
+    return split_blocks(text)[1]
+
+
+def test_paragraphs_split_on_blank_lines():
+    assert spans("uno\ndos\n\ntres\n\n\ncuatro") == [(0, 2), (3, 4), (6, 7)]
+
+
+def test_fence_with_blank_lines_is_one_block():
+    text = "```python\na = 1\n\n\nb = 2\n```\n\ndespués"
+    assert spans(text) == [(0, 6), (7, 8)]
+
+
+def test_unclosed_fence_runs_to_the_end():
+    assert spans("~~~\ncódigo\n\nmás") == [(0, 4)]
+
+
+def test_fence_closed_only_by_same_marker():
+    text = "````\n```\n\n````\n\nfin"
+    assert spans(text) == [(0, 4), (5, 6)]
+
+
+def test_loose_list_and_indented_continuation_stay_together():
+    text = "- uno\n\n- dos\n\n  sigue dos\n\npárrafo"
+    assert spans(text) == [(0, 5), (6, 7)]
+
+
+def test_list_after_paragraph_starts_a_new_block():
+    assert spans("párrafo\n\n1. uno\n2. dos") == [(0, 1), (2, 4)]
+
+
+def test_table_is_one_block():
+    text = "| a | b |\n|---|---|\n| 1 | 2 |\n\ntexto"
+    assert spans(text) == [(0, 3), (4, 5)]
+
+
+def test_front_matter_is_one_block():
+    text = "---\ntítulo: x\nautor: y\n---\n\n# Encabezado"
+    assert spans(text) == [(0, 4), (5, 6)]
+
+
+def test_diff_blocks():
+    assert diff_blocks(['a', 'b', 'c'], ['a', 'b', 'c']) == (3, 0, 3)
+    assert diff_blocks(['a', 'b', 'c'], ['a', 'x', 'c']) == (1, 1, 2)
+    assert diff_blocks(['a', 'b'], ['a', 'b', 'c']) == (2, 0, 3)
+    assert diff_blocks(['a', 'b', 'c'], ['c']) == (0, 2, 0)
+    # Bloques repetidos: el prefijo y el sufijo no se solapan
+    assert diff_blocks(['a', 'a'], ['a', 'a', 'a']) == (2, 0, 3)
+
+
+def test_footnotes_render_the_whole_document():
+    text = "Texto[^1]\n\nOtro párrafo\n\n[^1]: La nota."
+    result = BlockRenderer().render(text)
+    assert result.lines == [(0, 5)]
+    assert 'class="footnote"' in result.html()
+    assert 'href="#fn:1"' in result.html()
+
+
+def test_toc_renders_the_whole_document():
+    text = "[TOC]\n\n# Uno\n\n## Dos"
+    result = BlockRenderer().render(text)
+    assert result.lines == [(0, 5)]
+    assert 'class="toc"' in result.html()
+
+
+def test_incremental_render_matches_fresh_render():
+    text = "# Título\n\nUno\n\n```\na\n\nb\n```\n\n- x\n\n- y\n\nFin [ref]\n\n[ref]: http://x"
+    renderer = BlockRenderer()
+    renderer.render(text)
+    edited = text.replace("Uno", "Uno editado")
+    result = renderer.render(edited)
+    assert result.rendered == 1
+    assert result.blocks == BlockRenderer().render(edited).blocks
@@ -0,0 +1,89 @@
+import random
+
+from text_merge import changed_range, merge3
+
+BASE = "uno\ndos\ntres\ncuatro\ncinco\nseis\n"
+
+
+def test_one_sided_changes_are_taken():
+    ours = BASE.replace("dos", "DOS")
+    assert merge3(BASE, ours, BASE) == (ours, 0)
+    assert merge3(BASE, BASE, ours) == (ours, 0)
+    assert merge3(BASE, ours, ours) == (ours, 0)
+
+
+def test_non_overlapping_edits_are_combined():
+    ours = BASE.replace("dos\n", "dos\nnueva del editor\n")
+    theirs = BASE.replace("cinco", "CINCO")
+    result = merge3(BASE, ours, theirs)
+    assert result.conflicts == 0
+    assert result.text == "uno\ndos\nnueva del editor\ntres\ncuatro\nCINCO\nseis\n"
+
+
+def test_overlapping_edits_leave_conflict_markers():
+    ours = BASE.replace("tres", "tres (editor)")
+    theirs = BASE.replace("tres", "tres (disco)")
+    result = merge3(BASE, ours, theirs)
+    assert result.conflicts == 1
+    assert result.text == (
+        "uno\ndos\n"
+        "<<<<<<< editor\ntres (editor)\n=======\ntres (disco)\n>>>>>>> disco\n"
+        "cuatro\ncinco\nseis\n"
+    )
+
+
+def test_conflict_labels_and_deletion_against_edit():
+    ours = BASE.replace("cuatro\n", "")
+    theirs = BASE.replace("cuatro", "CUATRO")
+    result = merge3(BASE, ours, theirs, 'mío', 'suyo')
+    assert result.conflicts == 1
+    assert "<<<<<<< mío\n=======\nCUATRO\n>>>>>>> suyo\n" in result.text
+
+
+def test_edits_on_both_sides_at_start():
+    ours = "cero\n" + BASE
+    theirs = "CERO\n" + BASE
+    result = merge3(BASE, ours, theirs)
+    assert result.conflicts == 1
+    assert result.text == "<<<<<<< editor\ncero\n=======\nCERO\n>>>>>>> disco\n" + BASE
+    # Editor al principio y disco al final: sin conflicto
+    theirs = BASE + "siete\n"
+    assert merge3(BASE, ours, theirs) == ("cero\n" + BASE + "siete\n", 0)
+
+
+def test_edits_on_both_sides_at_end_without_newline():
+    base = "a\nb\nc"
+    ours = "a\nb\nc editor"
+    theirs = "a\nb\nc disco"
+    result = merge3(base, ours, theirs)
+    assert result.conflicts == 1
+    assert result.text == "a\nb\n<<<<<<< editor\nc editor\n=======\nc disco\n>>>>>>> disco\n"
+    # El mismo cambio en los dos lados no es un conflicto
+    assert merge3(base, ours, ours) == (ours, 0)
+    # Añadir el salto final en disco y editar otra línea en el editor
+    assert merge3(base, "A\nb\nc", base + "\n") == ("A\nb\nc\n", 0)
+
+
+def test_random_one_sided_edits_match():
+    rng = random.Random(7)
+    for _ in range(200):
+        lines = [f"l{i}\n" for i in range(rng.randint(0, 30))]
+        base = ''.join(lines)
+        edited = list(lines)
+        for _ in range(rng.randint(0, 4)):
+            k = rng.randint(0, len(edited))
+            if edited and rng.random() < 0.5:
+                del edited[k - 1]
+            else:
+                edited.insert(k, f"nueva {rng.random():.3f}\n")
+        ours = ''.join(edited)
+        assert merge3(base, ours, base) == (ours, 0)
+        assert merge3(base, base, ours) == (ours, 0)
+
+
+def test_changed_range():
+    assert changed_range("abcdef", "abXYef") == (2, 4, "XY")
+    assert changed_range("abc", "abc") == (3, 3, "")
+    assert changed_range("", "nuevo") == (0, 0, "nuevo")
+    start, end, text = changed_range("aaaa", "aa")
+    assert "aaaa"[:start] + text + "aaaa"[end:] == "aa"
@@ -0,0 +1,51 @@
+import os
+
+from workspace_index import CHUNK_ID_BITS, PARALLEL_MIN_FILES, WorkspaceIndex
+
+
+def write(path, text):
+    path.write_text(text, encoding='utf-8')
+
+
+def chunk_rows(index):
+    return index._conn.execute("SELECT rowid, file_id FROM chunks").fetchall()
+
+
+def test_incremental_update_replaces_only_changed_files(tmp_path):
+    root = tmp_path / 'ws'
+    root.mkdir()
+    for i in range(5):
+        write(root / f'd{i}.md', f"# Documento {i}\n\ntexto común\n\n## Detalle\n\nvalor{i}\n")
+    index = WorkspaceIndex(str(root), tmp_path / 'index.sqlite')
+    stats = index.update(jobs=1)
+    assert (stats.files, stats.indexed) == (5, 5)
+    assert len(index.search('común')) == 5
+
+    write(root / 'd1.md', "# Documento 1\n\notra cosa\n")
+    os.remove(root / 'd2.md')
+    stats = index.update(jobs=1)
+    assert (stats.files, stats.indexed, stats.removed) == (4, 1, 1)
+    assert sorted(os.path.basename(hit.path) for hit in index.search('común')) == ['d0.md', 'd3.md', 'd4.md']
+    assert [os.path.basename(hit.path) for hit in index.search('otra')] == ['d1.md']
+    assert index.search('valor2') == []
+    # Cada sección está en el tramo de rowid de su archivo
+    rows = chunk_rows(index)
+    assert all(rowid >> CHUNK_ID_BITS == file_id for rowid, file_id in rows)
+    assert len(rows) == 3 * 2 + 1
+    index.close()
+
+
+def test_parallel_update_matches_serial(tmp_path):
+    root = tmp_path / 'ws'
+    root.mkdir()
+    for i in range(PARALLEL_MIN_FILES + 4):
+        write(root / f'd{i}.md', f"# Nota {i}\n\npalabra{i % 7}\n")
+    parallel = WorkspaceIndex(str(root), tmp_path / 'parallel.sqlite')
+    serial = WorkspaceIndex(str(root), tmp_path / 'serial.sqlite')
+    assert parallel.update(jobs=2).indexed == PARALLEL_MIN_FILES + 4
+    serial.update(jobs=1)
+    for query in ('palabra3', 'nota 1'):
+        assert (sorted(hit.path for hit in parallel.search(query, limit=200))
+                == sorted(hit.path for hit in serial.search(query, limit=200)))
+    parallel.close()
+    serial.close()
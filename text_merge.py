@@ -0,0 +1,165 @@
+"""
+Comparación y combinación de versiones de un texto
+Se usa al detectar cambios externos en un archivo abierto: ``changed_range``
+localiza la zona que difiere para sustituir sólo esa parte del editor y
+``merge3`` combina por líneas los cambios del editor y los del disco
+respecto a la última versión común (como diff3).
+"""
+
+from collections import namedtuple
+from difflib import SequenceMatcher
+
+MergeResult = namedtuple('MergeResult', 'text conflicts')
+
+# Las comparaciones se hacen por bloques para que el trabajo quede en C
+_BLOCK = 64 * 1024
+
+
+def common_prefix(a, b):
+    """Longitud del prefijo común de dos cadenas"""
+    n = min(len(a), len(b))
+    i = 0
+    while i + _BLOCK <= n and a[i:i + _BLOCK] == b[i:i + _BLOCK]:
+        i += _BLOCK
+    # Búsqueda binaria dentro del bloque que difiere
+    hi = min(i + _BLOCK, n)
+    while i < hi:
+        mid = (i + hi + 1) // 2
+        if a[i:mid] == b[i:mid]:
+            i = mid
+        else:
+            hi = mid - 1
+    return i
+
+
+def common_suffix(a, b, limit=None):
+    """Longitud del sufijo común de dos cadenas, como mucho ``limit``"""
+    n = min(len(a), len(b))
+    if limit is not None:
+        n = min(n, limit)
+    la, lb = len(a), len(b)
+    i = 0
+    while i + _BLOCK <= n and a[la - i - _BLOCK:la - i] == b[lb - i - _BLOCK:lb - i]:
+        i += _BLOCK
+    hi = min(i + _BLOCK, n)
+    while i < hi:
+        mid = (i + hi + 1) // 2
+        if a[la - mid:la - i] == b[lb - mid:lb - i]:
+            i = mid
+        else:
+            hi = mid - 1
+    return i
+
+
+def changed_range(old, new):
+    """Zona que cambia de ``old`` a ``new``: ``(inicio, fin_en_old, texto_nuevo)``"""
+    prefix = common_prefix(old, new)
+    suffix = common_suffix(old, new, min(len(old), len(new)) - prefix)
+    return prefix, len(old) - suffix, new[prefix:len(new) - suffix]
+
+
+def _split_lines(text):
+    """Líneas con su salto final (sólo ``\\n``, como el texto del editor)"""
+    lines = [line + '\n' for line in text.split('\n')]
+    last = lines.pop()[:-1]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def _matching_blocks(base, other):
+    """Bloques de líneas iguales entre dos versiones.
+    Las líneas iniciales y finales comunes se emparejan directamente: así
+    SequenceMatcher sólo compara la zona editada y no todo el documento.
+    """
+    n = min(len(base), len(other))
+    start = 0
+    while start < n and base[start] == other[start]:
+        start += 1
+    end = 0
+    while end < n - start and base[-1 - end] == other[-1 - end]:
+        end += 1
+    blocks = [(0, 0, start)] if start else []
+    matcher = SequenceMatcher(None, base[start:len(base) - end], other[start:len(other) - end])
+    blocks.extend((a + start, b + start, size) for a, b, size in matcher.get_matching_blocks() if size)
+    if end:
+        blocks.append((len(base) - end, len(other) - end, end))
+    return blocks
+
+
+def _sync_regions(base, ours, theirs):
+    """Tramos de ``base`` que coinciden a la vez en las otras dos versiones"""
+    ours_blocks = _matching_blocks(base, ours)
+    theirs_blocks = _matching_blocks(base, theirs)
+    regions = []
+    i = j = 0
+    while i < len(ours_blocks) and j < len(theirs_blocks):
+        a_base, a_match, a_len = ours_blocks[i]
+        b_base, b_match, b_len = theirs_blocks[j]
+        start = max(a_base, b_base)
+        end = min(a_base + a_len, b_base + b_len)
+        if start < end:
+            a_start = a_match + start - a_base
+            b_start = b_match + start - b_base
+            regions.append((start, end, a_start, a_start + end - start, b_start, b_start + end - start))
+        if a_base + a_len < b_base + b_len:
+            i += 1
+        else:
+            j += 1
+    regions.append((len(base), len(base), len(ours), len(ours), len(theirs), len(theirs)))
+    return regions
+
+
+def _line_bounds(base, ours, theirs):
+    """Prefijo y sufijo comunes a las tres versiones, ajustados a líneas completas"""
+    prefix = min(common_prefix(base, ours), common_prefix(base, theirs))
+    prefix = base.rfind('\n', 0, prefix) + 1
+    limit = min(len(base), len(ours), len(theirs)) - prefix
+    suffix = min(common_suffix(base, ours, limit), common_suffix(base, theirs, limit))
+    if suffix:
+        # El sufijo debe empezar tras un salto de línea común
+        newline = base.find('\n', len(base) - suffix)
+        suffix = len(base) - newline - 1 if newline != -1 else 0
+    return prefix, suffix
+
+
+def merge3(base, ours, theirs, ours_label='editor', theirs_label='disco'):
+    """Combinar por líneas dos versiones derivadas de ``base``.
+
+    Los cambios que sólo hizo una de las partes se aplican sin más; si ambas
+    tocan las mismas líneas de forma distinta se deja un bloque de conflicto
+    con marcas ``<<<<<<<``/``=======``/``>>>>>>>``.
+    """
+    # Sólo se compara por líneas la zona central en la que difieren
+    prefix, suffix = _line_bounds(base, ours, theirs)
+    head, tail = base[:prefix], base[len(base) - suffix:]
+    base_lines = _split_lines(base[prefix:len(base) - suffix])
+    ours_lines = _split_lines(ours[prefix:len(ours) - suffix])
+    theirs_lines = _split_lines(theirs[prefix:len(theirs) - suffix])
+
+    out = [head]
+    conflicts = 0
+    z = a = b = 0
+    for z_start, z_end, a_start, a_end, b_start, b_end in _sync_regions(base_lines, ours_lines, theirs_lines):
+        base_chunk = base_lines[z:z_start]
+        ours_chunk = ours_lines[a:a_start]
+        theirs_chunk = theirs_lines[b:b_start]
+        if ours_chunk == theirs_chunk or base_chunk == ours_chunk:
+            out.extend(theirs_chunk)
+        elif base_chunk == theirs_chunk:
+            out.extend(ours_chunk)
+        else:
+            conflicts += 1
+            out.append(f'<<<<<<< {ours_label}\n')
+            out.extend(ours_chunk)
+            if ours_chunk and not ours_chunk[-1].endswith('\n'):
+                out.append('\n')
+            out.append('=======\n')
+            out.extend(theirs_chunk)
+            if theirs_chunk and not theirs_chunk[-1].endswith('\n'):
+                out.append('\n')
+            out.append(f'>>>>>>> {theirs_label}\n')
+        out.extend(base_lines[z_start:z_end])
+        z, a, b = z_end, a_end, b_end
+    out.append(tail)
+    return MergeResult(''.join(out), conflicts)
@@ -0,0 +1,289 @@
+"""
+Índice de búsqueda de texto completo de una carpeta (espacio de trabajo)
+Los documentos Markdown se dividen en secciones (por encabezados y cada
+pocas líneas) y se indexan con SQLite FTS5 en el directorio de caché. El
+índice se actualiza de forma incremental: sólo se vuelven a leer los
+archivos cuyo tamaño o fecha cambió, y sólo se reindexan si además cambió
+su hash. La primera construcción reparte la lectura entre procesos y se
+confirma por lotes, de modo que si se interrumpe se retoma donde quedó.
+Las secciones de cada archivo ocupan un tramo propio de rowid, así que
+reindexar o quitar un archivo borra por rowid sin recorrer la tabla FTS5.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import unicodedata
+from collections import namedtuple
+from concurrent.futures.process import BrokenProcessPool
+
+from app_paths import user_cache_dir
+from file_loader import decode_text
+from heading_index import HeadingIndex
+from process_pool import spawn_pool
+
+# Versión del esquema; cambiarla reconstruye los índices existentes
+INDEX_FORMAT = 2
+MARKDOWN_SUFFIXES = ('.md', '.markdown')
+# Líneas como mucho por sección indexada
+CHUNK_LINES = 40
+# Archivos leídos por lote; cada lote se confirma en la base de datos
+BATCH_FILES = 256
+# Con menos archivos pendientes no compensa arrancar procesos
+PARALLEL_MIN_FILES = 64
+# Directorios que no se recorren además de los ocultos
+SKIPPED_DIRS = {'node_modules', '__pycache__'}
+# rowid de una sección: (id del archivo << CHUNK_ID_BITS) + número de sección
+CHUNK_ID_BITS = 24
+
+SearchHit = namedtuple('SearchHit', 'path line title snippet')
+UpdateStats = namedtuple('UpdateStats', 'files indexed unchanged removed cancelled')
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r'\w+')
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL,"
+    " size INTEGER, mtime_ns INTEGER, hash TEXT)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(title, body, file_id UNINDEXED,"
+    " line UNINDEXED, tokenize='unicode61 remove_diacritics 2')",
+)
+
+
+def index_path(root):
+    """Fichero del índice de una carpeta en la caché del usuario"""
+    digest = hashlib.sha1(os.path.normcase(os.path.abspath(root)).encode('utf-8')).hexdigest()
+    return user_cache_dir() / 'workspaces' / f'{digest[:16]}.sqlite'
+
+
+def scan_workspace(root):
+    """Archivos Markdown de la carpeta: ``(ruta relativa, tamaño, mtime_ns)``"""
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.') and d not in SKIPPED_DIRS]
+        for name in filenames:
+            if not name.lower().endswith(MARKDOWN_SUFFIXES):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            yield os.path.relpath(path, root), st.st_size, st.st_mtime_ns
+
+
+def split_chunks(text, title=''):
+    """Secciones del documento: ``(primera línea, encabezado, texto)``"""
+    lines = text.split('\n')
+    starts = [(h.line, h.text) for h in HeadingIndex(text).headings()]
+    if not starts or starts[0][0] != 0:
+        starts.insert(0, (0, title))
+    starts.append((len(lines), None))
+    chunks = []
+    for (start, heading), (end, _) in zip(starts, starts[1:]):
+        for first in range(start, end, CHUNK_LINES):
+            body = '\n'.join(lines[first:min(first + CHUNK_LINES, end)])
+            if body.strip():
+                chunks.append((first, heading, body))
+    return chunks
+
+
+def index_file(path):
+    """Hash y secciones de un archivo (se ejecuta en los procesos de trabajo)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    title = os.path.splitext(os.path.basename(path))[0]
+    return digest, split_chunks(decode_text(data), title)
+
+
+def _fold(text):
+    """Texto sin mayúsculas ni diacríticos, como lo compara el tokenizador"""
+    decomposed = unicodedata.normalize('NFD', text.casefold())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def build_query(text):
+    """Consulta FTS5 a partir de lo escrito: todas las palabras, la última como prefijo"""
+    words = _WORD_RE.findall(text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def match_line(body, text):
+    """Línea de la sección en la que aparece la primera palabra buscada"""
+    words = [_fold(word) for word in _WORD_RE.findall(text)]
+    for offset, line in enumerate(body.split('\n')):
+        folded = _fold(line)
+        if any(word in folded for word in words):
+            return offset
+    return 0
+
+
+class WorkspaceIndex:
+    """Índice persistente de los documentos Markdown de ``root``.
+
+    ``search`` usa la conexión del hilo que creó el índice; ``update`` abre
+    la suya, de modo que puede ejecutarse en un hilo de trabajo mientras se
+    sigue buscando en los resultados ya confirmados.
+    """
+
+    def __init__(self, root, path=None):
+        self.root = os.path.abspath(root)
+        self.path = str(path or index_path(self.root))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = self._connect()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            row = conn.execute("SELECT value FROM meta WHERE key = 'format'").fetchone()
+            if row is None or row[0] != str(INDEX_FORMAT):
+                conn.execute("DELETE FROM files")
+                conn.execute("DELETE FROM chunks")
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('format', ?)", (str(INDEX_FORMAT),))
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('root', ?)", (self.root,))
+        return conn
+
+    def close(self):
+        self._conn.close()
+
+    def file_count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def update(self, jobs=None, progress=None, cancelled=None):
+        """Poner el índice al día con la carpeta.
+
+        ``progress(hechos, total)`` se llama tras cada lote; si ``cancelled()``
+        devuelve True se para tras confirmar el lote en curso.
+        """
+        conn = self._connect()
+        try:
+            return self._update(conn, jobs, progress, cancelled)
+        finally:
+            conn.close()
+
+    def _update(self, conn, jobs, progress, cancelled):
+        known = {path: (file_id, size, mtime_ns, digest)
+                 for file_id, path, size, mtime_ns, digest
+                 in conn.execute("SELECT id, path, size, mtime_ns, hash FROM files")}
+        seen = set()
+        pending = []
+        for path, size, mtime_ns in scan_workspace(self.root):
+            seen.add(path)
+            old = known.get(path)
+            if old is None or old[1] != size or old[2] != mtime_ns:
+                pending.append((path, size, mtime_ns))
+
+        removed = [known[path][0] for path in known.keys() - seen]
+        with conn:
+            for file_id in removed:
+                self._delete_file(conn, file_id)
+
+        indexed = unchanged = done = 0
+        is_cancelled = False
+        executor = None
+        if len(pending) >= PARALLEL_MIN_FILES and jobs != 1:
+            # spawn: no se duplica el proceso de la interfaz con sus hilos
+            try:
+                executor = spawn_pool(jobs)
+            except (OSError, BrokenProcessPool) as e:
+                logger.warning("Indexado en paralelo no disponible: %s", e)
+        try:
+            for start in range(0, len(pending), BATCH_FILES):
+                if cancelled is not None and cancelled():
+                    is_cancelled = True
+                    break
+                batch = pending[start:start + BATCH_FILES]
+                paths = [os.path.join(self.root, path) for path, _, _ in batch]
+                results = None
+                if executor is not None:
+                    try:
+                        results = list(executor.map(_index_file_or_error, paths, chunksize=8))
+                    except BrokenProcessPool as e:
+                        # Sin procesos de trabajo se sigue en este hilo
+                        logger.warning("Indexado en paralelo no disponible: %s", e)
+                        executor.shutdown(cancel_futures=True)
+                        executor = None
+                if results is None:
+                    results = map(_index_file_or_error, paths)
+                with conn:
+                    for (path, size, mtime_ns), result in zip(batch, results):
+                        if result is None:
+                            continue
+                        digest, chunks = result
+                        old = known.get(path)
+                        if old is not None and old[3] == digest:
+                            # Sólo cambió la fecha: el contenido indexado sigue valiendo
+                            conn.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?",
+                                         (size, mtime_ns, old[0]))
+                            unchanged += 1
+                            continue
+                        if old is not None:
+                            self._delete_file(conn, old[0])
+                        file_id = conn.execute(
+                            "INSERT INTO files (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                            (path, size, mtime_ns, digest)
+                        ).lastrowid
+                        first = file_id << CHUNK_ID_BITS
+                        conn.executemany(
+                            "INSERT INTO chunks (rowid, title, body, file_id, line) VALUES (?, ?, ?, ?, ?)",
+                            ((first + number, title, body, file_id, line)
+                             for number, (line, title, body) in enumerate(chunks))
+                        )
+                        indexed += 1
+                done += len(batch)
+                if progress is not None:
+                    progress(done, len(pending))
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        if indexed or removed:
+            with conn:
+                conn.execute("INSERT INTO chunks (chunks) VALUES ('optimize')")
+        return UpdateStats(len(seen), indexed, unchanged, len(removed), is_cancelled)
+
+    @staticmethod
+    def _delete_file(conn, file_id):
+        first = file_id << CHUNK_ID_BITS
+        conn.execute("DELETE FROM chunks WHERE rowid BETWEEN ? AND ?",
+                     (first, first + (1 << CHUNK_ID_BITS) - 1))
+        conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def search(self, text, limit=50):
+        """Secciones que contienen todas las palabras, de más a menos relevante"""
+        query = build_query(text)
+        if query is None:
+            return []
+        try:
+            rows = self._conn.execute(
+                "SELECT files.path, chunks.line, chunks.title, chunks.body,"
+                " snippet(chunks, 1, '«', '»', '…', 12)"
+                " FROM chunks JOIN files ON files.id = chunks.file_id"
+                " WHERE chunks MATCH ? ORDER BY bm25(chunks, 4.0, 1.0) LIMIT ?",
+                (query, limit)
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning("Error en la búsqueda «%s»: %s", text, e)
+            return []
+        return [SearchHit(os.path.join(self.root, path), line + match_line(body, text), title or '',
+                          ' '.join(snippet.split()))
+                for path, line, title, body, snippet in rows]
+
+
+def _index_file_or_error(path):
+    """``index_file`` que devuelve None si el archivo no se puede leer"""
+    try:
+        return index_file(path)
+    except OSError as e:
+        logger.warning("No se pudo indexar %s: %s", path, e)
+        return None